@@ -15,15 +15,132 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: str
     
+    # Async database access (PostgREST connection pool)
+    db_pool_size: int = 20
+    db_timeout_seconds: float = 10.0
+    
     # Gemini AI
     gemini_api_key: str
     gemini_model: str = "gemini-1.5-flash"  # Cheapest model: gemini-1.5-flash (free tier available)
     
+    # AI executor (bounded concurrency for model calls)
+    ai_max_concurrency: int = 8
+    ai_max_queue: int = 100
+    ai_call_timeout_seconds: float = 20.0
+    
+    # Gemini quota scheduling: token buckets mirroring the provider limits,
+    # interactive calls ahead of background ones
+    ai_requests_per_minute: int = 60
+    ai_tokens_per_minute: int = 1000000
+    ai_output_tokens_estimate: int = 400
+    ai_background_reserve: float = 0.2  # share of each bucket background calls leave free
+    ai_background_timeout_seconds: float = 120.0
+    ai_throttle_backoff_seconds: float = 10.0
+    
+    # Model call resilience: each attempt gets its own timeout inside the call's
+    # deadline; transient failures are retried and repeated failures trip a breaker
+    ai_attempt_timeout_seconds: float = 8.0
+    ai_background_attempt_timeout_seconds: float = 45.0
+    ai_max_retries: int = 1
+    ai_retry_base_delay_seconds: float = 0.5
+    ai_breaker_failure_threshold: int = 5
+    ai_breaker_reset_seconds: float = 30.0
+    ai_hedge_after_seconds: float = 0.0  # 0 disables hedged (duplicate) interactive requests
+    
+    # Journal analysis: "background" saves first and analyzes asynchronously,
+    # "inline" analyzes before the insert
+    journal_analysis_mode: str = "background"
+    analysis_workers: int = 2
+    analysis_queue_size: int = 1000
+    
+    # Journal edits: an analysis is kept until the words changed since it was
+    # computed reach the threshold; re-analysis waits for a burst of edits to settle
+    reanalysis_change_threshold: float = 0.2
+    reanalysis_delay_seconds: float = 10.0
+    
+    # Long entries: above the single-pass size an entry is analyzed in chunks,
+    # and at most max_entry_tokens of it is sent to the model
+    analysis_single_pass_tokens: int = 3000
+    analysis_chunk_tokens: int = 1500
+    analysis_max_entry_tokens: int = 12000
+    
+    # Local sentiment tier: confident lexicon results stand in for Gemini's analysis
+    local_sentiment_enabled: bool = True
+    local_sentiment_threshold: float = 0.6
+    
+    # Mood analysis cache (in-memory LRU + mood_analysis_cache table)
+    analysis_cache_size: int = 5000
+    analysis_cache_ttl_seconds: int = 86400
+    analysis_cache_persist: bool = True
+    analysis_cache_persist_days: int = 30
+    
+    # Micro-batching of mood analyses into a single model request
+    analysis_batch_enabled: bool = True
+    analysis_batch_window_ms: int = 100
+    analysis_batch_max_entries: int = 10
+    analysis_batch_max_tokens: int = 8000
+    
     # JWT
     jwt_secret: str
     jwt_algorithm: str = "HS256"
     jwt_expiration_hours: int = 12
     
+    # Authenticated user profile cache
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: int = 60
+    
+    # Therapist dashboard snapshot cache
+    dashboard_cache_ttl_seconds: int = 30
+    
+    # Daily affirmations: per-user cache + off-peak precompute of the next day's
+    affirmation_cache_size: int = 10000
+    affirmation_precompute_enabled: bool = True
+    affirmation_precompute_hour_utc: int = 3
+    affirmation_precompute_active_days: int = 7
+    affirmation_precompute_concurrency: int = 2
+    affirmation_retention_days: int = 7
+    
+    # Shared activity suggestion pools keyed by (mood, therapy goals)
+    suggestion_pool_size: int = 5
+    suggestion_pool_max_keys: int = 1000
+    suggestion_pool_max_age_seconds: int = 86400
+    
+    # Cursor pagination for journal and feedback listings
+    default_page_size: int = 50
+    max_page_size: int = 100
+    export_batch_size: int = 500
+    
+    # Journal full-text search (search_journals in schema.sql)
+    search_max_query_length: int = 200
+    search_slow_ms: int = 500  # searches at or above this are logged and counted
+    
+    # Semantic search: entry embeddings are computed in batches after writes and
+    # searched with a brute-force in-memory index per client
+    embedding_provider: str = "gemini"  # "gemini" or "local" (deterministic hashing model, no API calls)
+    embedding_model: str = "models/embedding-001"
+    local_embedding_dimensions: int = 256
+    embedding_max_chars: int = 8000  # longer entries are embedded from their beginning
+    embedding_batch_size: int = 32
+    embedding_batch_wait_ms: int = 200
+    embedding_queue_size: int = 1000
+    embedding_timeout_seconds: float = 30.0
+    semantic_index_cache_size: int = 64  # clients whose index is held in memory
+    semantic_index_ttl_seconds: int = 600
+    semantic_min_similarity: float = 0.0  # hits below this are dropped
+    
+    # List responses: encode DB rows directly (True) or validate them once
+    # against the response model (False)
+    trust_db_rows: bool = True
+    
+    # Write-behind audit/access/error logging
+    audit_buffer_size: int = 10000
+    audit_batch_size: int = 200
+    audit_flush_interval_seconds: float = 1.0
+    audit_enqueue_timeout_seconds: float = 0.5
+    audit_drain_timeout_seconds: float = 10.0
+    audit_replay_interval_seconds: float = 30.0
+    audit_spool_path: str = "audit_spool.jsonl"
+    
     # Environment
     environment: str = "development"
     
@@ -3,23 +3,62 @@ Database connection and initialization
 """
 
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from httpx import AsyncClient, Limits, Timeout
+from typing import Dict, Optional, Union
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
+# Supabase client for auth admin operations (service key)
 supabase: Client = create_client(settings.supabase_url, settings.supabase_service_key)
 
 # Supabase client for user operations (with anon key)
 supabase_client: Client = create_client(settings.supabase_url, settings.supabase_key)
 
 
-def init_db():
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client backed by a bounded, keep-alive connection pool"""
+
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, Timeout],
+    ) -> AsyncClient:
+        return AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=Limits(
+                max_connections=settings.db_pool_size,
+                max_keepalive_connections=settings.db_pool_size,
+            ),
+        )
+
+
+# Async data-access client (service key) shared by all routers
+_db: Optional[PooledPostgrestClient] = None
+
+
+def _create_db() -> PooledPostgrestClient:
+    service_key = settings.supabase_service_key
+    return PooledPostgrestClient(
+        f"{settings.supabase_url}/rest/v1",
+        headers={
+            "apiKey": service_key,
+            "Authorization": f"Bearer {service_key}",
+        },
+        timeout=settings.db_timeout_seconds,
+    )
+
+
+async def init_db():
     """Initialize database connection and verify schema"""
     try:
         # Test connection by querying a simple table
-        result = supabase.table("users").select("id").limit(1).execute()
+        await get_supabase().table("users").select("id").limit(1).execute()
         logger.info("Database connection successful")
         return True
     except Exception as e:
@@ -27,12 +66,22 @@ def init_db():
         return False
 
 
-def get_supabase() -> Client:
-    """Get Supabase client with service key (admin operations)"""
-    return supabase
+async def close_db():
+    """Close pooled database connections"""
+    global _db
+    if _db is not None:
+        await _db.aclose()
+        _db = None
+
+
+def get_supabase() -> AsyncPostgrestClient:
+    """Get async database client with service key (admin operations)"""
+    global _db
+    if _db is None:
+        _db = _create_db()
+    return _db
 
 
 def get_supabase_client() -> Client:
     """Get Supabase client with anon key (user operations)"""
     return supabase_client
-
@@ -0,0 +1,64 @@
+"""
+Maintenance commands
+
+Usage:
+    python -m app.maintenance rebuild-client-stats
+    python -m app.maintenance rebuild-daily-rollups
+    python -m app.maintenance precompute-affirmations
+    python -m app.maintenance backfill-embeddings
+    python -m app.maintenance purge-analysis-cache
+"""
+
+import argparse
+import asyncio
+from app.database import get_supabase, close_db
+from app.services.affirmation_service import precompute_affirmations
+from app.services.analysis_cache import purge_expired_analyses
+from app.services.embedding_pipeline import backfill_embeddings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_client_stats() -> int:
+    """Recompute the client_stats rollups from the journals table"""
+    supabase = get_supabase()
+    result = await supabase.rpc("rebuild_client_stats", {}).execute()
+    return result.data or 0
+
+
+async def rebuild_daily_rollups() -> int:
+    """Recompute the dashboard daily rollups from the journals table"""
+    supabase = get_supabase()
+    result = await supabase.rpc("rebuild_daily_rollups", {}).execute()
+    return result.data or 0
+
+
+COMMANDS = {
+    "rebuild-client-stats": rebuild_client_stats,
+    "rebuild-daily-rollups": rebuild_daily_rollups,
+    "precompute-affirmations": precompute_affirmations,
+    "backfill-embeddings": backfill_embeddings,
+    "purge-analysis-cache": purge_expired_analyses,
+}
+
+
+async def _run(command: str):
+    try:
+        result = await COMMANDS[command]()
+        logger.info(f"{command} finished: {result}")
+        print(f"{command}: {result}")
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AuthenticAI maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args.command))
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,7 @@ class JournalEntryCreate(BaseModel):
     mood: Optional[MoodLevel] = None
     tags: Optional[List[str]] = None
     is_voice: bool = False
+    narrative: bool = False  # ask for a model-written summary even when local analysis is confident
 
 
 class JournalEntryResponse(BaseModel):
@@ -58,6 +59,41 @@ class JournalEntryResponse(BaseModel):
     is_voice: bool
     created_at: datetime
     ai_analysis: Optional[dict] = None
+    analysis_status: Optional[str] = None  # pending, complete, failed
+
+
+class JournalEntrySummary(BaseModel):
+    """List-view projection: preview text instead of full content and analysis"""
+    id: str
+    user_id: str
+    mood: Optional[MoodLevel]
+    tags: Optional[List[str]]
+    is_voice: bool
+    created_at: datetime
+    content_preview: Optional[str] = None  # first 200 characters of content
+    analysis_summary: Optional[str] = None
+    analysis_status: Optional[str] = None
+
+
+class JournalSearchResult(JournalEntrySummary):
+    """Search hit: summary fields plus relevance and a highlighted snippet"""
+    rank: float
+    headline: Optional[str] = None  # HTML-escaped snippet, matched terms wrapped in <mark></mark>
+
+
+class JournalSimilarResult(JournalEntrySummary):
+    """Semantic search hit: summary fields plus cosine similarity to the query or entry"""
+    similarity: float
+
+
+class JournalAnalysisStatus(BaseModel):
+    id: str
+    analysis_status: Optional[str]
+    mood: Optional[MoodLevel]
+    ai_analysis: Optional[dict] = None
+    analysis_version: Optional[str] = None
+    # False when the analysis was kept across small edits of the content
+    analysis_current: Optional[bool] = None
 
 
 # AI Analysis Models
@@ -68,6 +104,7 @@ class MoodAnalysis(BaseModel):
     keywords: List[str]
     recommendations: List[str]
     confidence: float
+    source: str = "model"  # model, or local (lexicon classifier)
 
 
 class AffirmationRequest(BaseModel):
@@ -89,6 +126,11 @@ class TherapistDashboardResponse(BaseModel):
     recent_entries: List[JournalEntryResponse]
     mood_trends: Dict[str, int]
     engagement_rate: float
+    daily_active_users: Dict[str, int] = {}
+
+
+class TherapistDashboardSummaryResponse(TherapistDashboardResponse):
+    recent_entries: List[JournalEntrySummary]
 
 
 class ClientSummary(BaseModel):
@@ -4,9 +4,11 @@ AI service routes (mood analysis, affirmations, activities)
 
 from fastapi import APIRouter, HTTPException, Depends
 from app.models import AffirmationRequest, ActivitySuggestion, MoodLevel
-from app.database import get_supabase
 from app.utils.auth import get_current_user
-from app.services.ai_service import generate_affirmation, suggest_activities, analyze_mood
+from app.utils.sse import sse_event, sse_response
+from app.services.ai_service import analyze_mood, stream_mood_analysis
+from app.services.affirmation_service import get_daily_affirmation, get_latest_mood, stream_daily_affirmation
+from app.services.suggestion_pool import get_pooled_activities
 from typing import List, Optional
 import logging
 
@@ -18,55 +20,72 @@ router = APIRouter()
 @router.post("/analyze_mood")
 async def analyze_mood_endpoint(
     content: str,
+    narrative: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
-    """Analyze mood from journal content"""
+    """
+    Analyze mood from journal content.
+    
+    Clear-cut entries are answered by the local classifier; ``narrative=true``
+    always asks the model for a written summary.
+    """
     try:
-        analysis = analyze_mood(content)
+        analysis = await analyze_mood(content, narrative=narrative)
         return {
             "mood": analysis.mood.value,
             "sentiment": analysis.sentiment,
             "summary": analysis.summary,
             "keywords": analysis.keywords,
             "recommendations": analysis.recommendations,
-            "confidence": analysis.confidence
+            "confidence": analysis.confidence,
+            "source": analysis.source
         }
     except Exception as e:
         logger.error(f"Error analyzing mood: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to analyze mood")
 
 
+@router.post("/analyze_mood/stream")
+async def analyze_mood_stream(
+    content: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream a mood analysis over SSE: ``token`` events carry the summary as it is
+    written, a closing ``analysis`` event carries the full MoodAnalysis.
+    """
+    async def events():
+        try:
+            async for kind, value in stream_mood_analysis(content):
+                if kind == "summary":
+                    yield sse_event("token", {"text": value})
+                else:
+                    yield sse_event("analysis", value.model_dump(mode="json"))
+        except Exception as e:
+            logger.error(f"Error streaming mood analysis: {str(e)}")
+            yield sse_event("error", {"detail": "Failed to analyze mood"})
+    
+    return sse_response(events())
+
+
 @router.post("/affirmation", response_model=dict)
 async def get_affirmation(
     request: AffirmationRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    """Generate personalized daily affirmation"""
+    """Get the personalized daily affirmation"""
     try:
-        # Get user's last mood from their most recent journal entry
-        supabase = get_supabase()
         user_id = request.user_id or current_user["id"]
         
         # Verify access: user can only get their own affirmation, or therapist can get for their clients
         if user_id != current_user["id"] and current_user.get("role") not in ["therapist", "admin"]:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        # Get last mood
-        result = supabase.table("journals")\
-            .select("mood")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .limit(1)\
-            .execute()
-        
-        last_mood = MoodLevel.NEUTRAL
-        if result.data and result.data[0].get("mood"):
-            try:
-                last_mood = MoodLevel(result.data[0]["mood"])
-            except:
-                last_mood = MoodLevel.NEUTRAL
+        # Last mood from the client_stats rollup; the affirmation itself is
+        # cached per day and usually precomputed the night before
+        last_mood = await get_latest_mood(user_id)
         
-        affirmation = generate_affirmation(last_mood, request.context)
+        affirmation = await get_daily_affirmation(user_id, last_mood, request.context)
         
         return {
             "affirmation": affirmation,
@@ -80,43 +99,60 @@ async def get_affirmation(
         raise HTTPException(status_code=500, detail="Failed to generate affirmation")
 
 
+@router.post("/affirmation/stream")
+async def stream_affirmation_endpoint(
+    request: AffirmationRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream the daily affirmation over SSE: ``token`` events with text, then a
+    ``done`` event with the full affirmation and mood context.
+    """
+    user_id = request.user_id or current_user["id"]
+    
+    # Verify access: user can only get their own affirmation, or therapist can get for their clients
+    if user_id != current_user["id"] and current_user.get("role") not in ["therapist", "admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    try:
+        last_mood = await get_latest_mood(user_id)
+    except Exception as e:
+        logger.error(f"Error loading mood for affirmation: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to generate affirmation")
+    
+    async def events():
+        parts = []
+        try:
+            async for text in stream_daily_affirmation(user_id, last_mood, request.context):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            yield sse_event("done", {
+                "affirmation": "".join(parts).strip(),
+                "mood_context": last_mood.value
+            })
+        except Exception as e:
+            logger.error(f"Error streaming affirmation: {str(e)}")
+            yield sse_event("error", {"detail": "Failed to generate affirmation"})
+    
+    return sse_response(events())
+
+
 @router.get("/activities", response_model=List[ActivitySuggestion])
 async def get_activity_suggestions(
     mood: Optional[MoodLevel] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get personalized activity suggestions"""
+    """Get personalized activity suggestions (served from the shared suggestion pools)"""
     try:
         # Get user's mood if not provided
         if not mood:
-            supabase = get_supabase()
-            user_id = current_user["id"]
-            
-            result = supabase.table("journals")\
-                .select("mood")\
-                .eq("user_id", user_id)\
-                .order("created_at", desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if result.data and result.data[0].get("mood"):
-                try:
-                    mood = MoodLevel(result.data[0]["mood"])
-                except:
-                    mood = MoodLevel.NEUTRAL
-            else:
-                mood = MoodLevel.NEUTRAL
+            mood = await get_latest_mood(current_user["id"])
         
-        # Get therapy goals (if stored in user profile)
-        supabase = get_supabase()
-        user_profile = supabase.table("users").select("therapy_goals").eq("id", current_user["id"]).single().execute()
-        therapy_goals = user_profile.data.get("therapy_goals", []) if user_profile.data else []
+        # Therapy goals come with the (cached) user profile
+        therapy_goals = current_user.get("therapy_goals") or []
         
-        activities = suggest_activities(mood, therapy_goals)
-        
-        return activities
+        return get_pooled_activities(mood, therapy_goals)
         
     except Exception as e:
         logger.error(f"Error suggesting activities: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to suggest activities")
-
@@ -3,10 +3,12 @@ Authentication routes
 """
 
 from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from app.models import SignUpRequest, LoginRequest, AuthResponse
 from app.database import get_supabase_client, get_supabase
-from app.utils.auth import create_access_token
+from app.utils.auth import create_access_token, cache_user_profile, invalidate_user_profile
 from app.utils.audit import log_audit_event
+from app.services.dashboard_service import invalidate_dashboard
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,8 +22,8 @@ async def signup(request: SignUpRequest, req: Request):
     try:
         supabase = get_supabase_client()
         
-        # Sign up with Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        # Sign up with Supabase Auth (sync GoTrue client, kept off the event loop)
+        auth_response = await run_in_threadpool(supabase.auth.sign_up, {
             "email": request.email,
             "password": request.password
         })
@@ -43,13 +45,18 @@ async def signup(request: SignUpRequest, req: Request):
             "role": request.role.value
         }
         
-        supabase_admin.table("users").insert(profile_data).execute()
+        profile_result = await supabase_admin.table("users").insert(profile_data).execute()
+        if profile_result.data:
+            cache_user_profile(profile_result.data[0])
+        else:
+            invalidate_user_profile(user_id)
+        invalidate_dashboard()
         
         # Generate access token
         access_token = create_access_token({"sub": user_id, "role": request.role.value})
         
         # Log audit event
-        log_audit_event(
+        await log_audit_event(
             user_id=user_id,
             action="signup",
             resource_type="user",
@@ -90,8 +97,8 @@ async def login(request: LoginRequest, req: Request):
     try:
         supabase = get_supabase_client()
         
-        # Authenticate with Supabase
-        auth_response = supabase.auth.sign_in_with_password({
+        # Authenticate with Supabase (sync GoTrue client, kept off the event loop)
+        auth_response = await run_in_threadpool(supabase.auth.sign_in_with_password, {
             "email": request.email,
             "password": request.password
         })
@@ -106,8 +113,9 @@ async def login(request: LoginRequest, req: Request):
         
         # Get user profile
         supabase_admin = get_supabase()
-        user_result = supabase_admin.table("users").select("*").eq("id", user_id).single().execute()
+        user_result = await supabase_admin.table("users").select("*").eq("id", user_id).single().execute()
         user_data = user_result.data
+        cache_user_profile(user_data)
         
         # Generate access token
         access_token = create_access_token({
@@ -116,7 +124,7 @@ async def login(request: LoginRequest, req: Request):
         })
         
         # Log audit event
-        log_audit_event(
+        await log_audit_event(
             user_id=user_id,
             action="login",
             resource_type="user",
@@ -3,12 +3,14 @@ Therapist feedback routes
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.models import FeedbackCreate, FeedbackResponse
 from app.database import get_supabase
 from app.utils.auth import get_current_therapist, get_current_user
 from app.utils.audit import log_audit_event
+from app.utils.pagination import page_size, keyset_page, split_page, reject_offset
+from app.utils.serialization import json_response, project_rows
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,7 @@ async def create_feedback(
         therapist_id = current_user["id"]
         
         # Verify client exists
-        client_result = supabase.table("users")\
+        client_result = await supabase.table("users")\
             .select("id, role")\
             .eq("id", feedback.client_id)\
             .single()\
@@ -39,7 +41,7 @@ async def create_feedback(
         
         # Verify entry exists if provided
         if feedback.entry_id:
-            entry_result = supabase.table("journals")\
+            entry_result = await supabase.table("journals")\
                 .select("id, user_id")\
                 .eq("id", feedback.entry_id)\
                 .single()\
@@ -61,7 +63,7 @@ async def create_feedback(
             "created_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase.table("therapist_feedback").insert(feedback_data).execute()
+        result = await supabase.table("therapist_feedback").insert(feedback_data).execute()
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create feedback")
@@ -69,7 +71,7 @@ async def create_feedback(
         created_feedback = result.data[0]
         
         # Log audit event
-        log_audit_event(
+        await log_audit_event(
             user_id=therapist_id,
             action="create",
             resource_type="feedback",
@@ -97,45 +99,40 @@ async def create_feedback(
 
 @router.get("/me", response_model=List[FeedbackResponse])
 async def get_my_feedback(
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None
 ):
-    """Get feedback messages for current user (client)"""
+    """Get feedback messages for current user, newest first (next page cursor in X-Next-Cursor)"""
     try:
         supabase = get_supabase()
         user_id = current_user["id"]
         user_role = current_user.get("role")
+        reject_offset(offset)
+        limit = page_size(limit)
         
         if user_role == "client":
             # Client gets their feedback
-            result = supabase.table("therapist_feedback")\
+            query = supabase.table("therapist_feedback")\
                 .select("*")\
-                .eq("client_id", user_id)\
-                .order("created_at", desc=True)\
-                .execute()
+                .eq("client_id", user_id)
         elif user_role in ["therapist", "admin"]:
             # Therapist gets their sent feedback
-            result = supabase.table("therapist_feedback")\
+            query = supabase.table("therapist_feedback")\
                 .select("*")\
-                .eq("therapist_id", user_id)\
-                .order("created_at", desc=True)\
-                .execute()
+                .eq("therapist_id", user_id)
         else:
             raise HTTPException(status_code=403, detail="Invalid role")
         
-        feedbacks = []
-        if result.data:
-            for fb in result.data:
-                feedbacks.append(FeedbackResponse(
-                    id=fb["id"],
-                    therapist_id=fb["therapist_id"],
-                    client_id=fb["client_id"],
-                    message=fb["message"],
-                    entry_id=fb.get("entry_id"),
-                    is_encouragement=fb.get("is_encouragement", True),
-                    created_at=datetime.fromisoformat(fb["created_at"])
-                ))
+        result = await keyset_page(query, cursor, limit).execute()
         
-        return feedbacks
+        feedbacks, headers = split_page(result.data, limit)
+        return json_response(
+            project_rows(feedbacks, FeedbackResponse),
+            List[FeedbackResponse],
+            headers=headers
+        )
         
     except HTTPException:
         raise
@@ -3,13 +3,27 @@ Journal entry routes
 """
 
 from fastapi import APIRouter, HTTPException, status, Depends, Request
-from typing import List
+from typing import List, Optional, Union
 from datetime import datetime
-from app.models import JournalEntryCreate, JournalEntryResponse
+from app.models import (
+    JournalEntryCreate, JournalEntryResponse, JournalEntrySummary, JournalAnalysisStatus,
+    JournalSearchResult, JournalSimilarResult
+)
 from app.database import get_supabase
 from app.utils.auth import get_current_client, get_current_user
-from app.utils.audit import log_audit_event
-from app.services.ai_service import analyze_mood
+from app.utils.audit import log_audit_event, log_access_event
+from app.utils.pagination import page_size, keyset_page, split_page, reject_offset
+from app.utils.serialization import json_response
+from app.utils.projection import journal_projection
+from app.services.ai_service import analyze_mood, local_mood_analysis, forget_mood_analysis
+from app.services.local_sentiment import needs_model
+from app.services.analysis_pipeline import enqueue_analysis
+from app.services.dashboard_service import invalidate_dashboard
+from app.services.reanalysis import analysis_fields, plan_reanalysis
+from app.services.journal_search import search_journals, parse_tags
+from app.services.embedding_pipeline import enqueue_embedding, forget_embedding
+from app.services.semantic_index import similar_entries, semantic_search
+from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,21 +44,26 @@ async def create_journal_entry(
         
         # Analyze mood if not provided
         mood = entry.mood
-        ai_analysis = None
-        
-        if not mood or entry.content:
+        analysis = None
+        analysis_status = "complete"
+        background = settings.journal_analysis_mode == "background"
+
+        if background:
+            local = local_mood_analysis(entry.content)
+            if needs_model(local, entry.narrative):
+                # Save first; the analysis pipeline fills ai_analysis (and mood) later
+                analysis_status = "pending"
+                # Tag the mood right away; the model's result replaces it
+                if not mood and local is not None:
+                    mood = local.mood
+            else:
+                analysis = local
+                mood = mood or local.mood
+        elif not mood or entry.content:
             # Run AI analysis
-            analysis = analyze_mood(entry.content)
+            analysis = await analyze_mood(entry.content, narrative=entry.narrative)
             mood = analysis.mood
-            ai_analysis = {
-                "mood": analysis.mood.value,
-                "sentiment": analysis.sentiment,
-                "summary": analysis.summary,
-                "keywords": analysis.keywords,
-                "recommendations": analysis.recommendations,
-                "confidence": analysis.confidence
-            }
-        
+
         # Create journal entry
         entry_data = {
             "user_id": user_id,
@@ -52,11 +71,14 @@ async def create_journal_entry(
             "mood": mood.value if mood else None,
             "tags": entry.tags or [],
             "is_voice": entry.is_voice,
-            "ai_analysis": ai_analysis,
+            "ai_analysis": None,
+            "analysis_status": analysis_status,
             "created_at": datetime.utcnow().isoformat()
         }
+        if analysis is not None:
+            entry_data.update(analysis_fields(analysis, entry.content))
         
-        result = supabase.table("journals").insert(entry_data).execute()
+        result = await supabase.table("journals").insert(entry_data).execute()
         
         if not result.data:
             raise HTTPException(
@@ -66,8 +88,15 @@ async def create_journal_entry(
         
         created_entry = result.data[0]
         
+        if analysis_status == "pending":
+            enqueue_analysis(created_entry["id"], entry.content, fill_mood=not entry.mood)
+        if entry.content:
+            enqueue_embedding(created_entry["id"], user_id, entry.content, created_entry["created_at"])
+        
+        invalidate_dashboard()
+        
         # Log audit event
-        log_audit_event(
+        await log_audit_event(
             user_id=user_id,
             action="create",
             resource_type="journal",
@@ -84,7 +113,8 @@ async def create_journal_entry(
             tags=created_entry.get("tags"),
             is_voice=created_entry.get("is_voice", False),
             created_at=datetime.fromisoformat(created_entry["created_at"]),
-            ai_analysis=created_entry.get("ai_analysis")
+            ai_analysis=created_entry.get("ai_analysis"),
+            analysis_status=created_entry.get("analysis_status")
         )
         
     except Exception as e:
@@ -95,40 +125,37 @@ async def create_journal_entry(
         )
 
 
-@router.get("/me", response_model=List[JournalEntryResponse])
+@router.get("/me", response_model=Union[List[JournalEntryResponse], List[JournalEntrySummary]])
 async def get_my_journals(
     current_user: dict = Depends(get_current_client),
-    limit: int = 50,
-    offset: int = 0
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
+    view: str = "full",
+    fields: Optional[str] = None
 ):
-    """Get current user's journal entries"""
+    """
+    Get current user's journal entries, newest first (next page cursor in X-Next-Cursor).
+    
+    ``view=summary`` returns previews; ``fields=a,b`` selects specific columns.
+    """
     try:
         supabase = get_supabase()
         user_id = current_user["id"]
+        reject_offset(offset)
+        limit = page_size(limit)
+        projection = journal_projection(view, fields)
         
-        result = supabase.table("journals")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .limit(limit)\
-            .offset(offset)\
-            .execute()
+        query = supabase.table("journals")\
+            .select(projection.select)\
+            .eq("user_id", user_id)
+        result = await keyset_page(query, cursor, limit).execute()
         
-        entries = []
-        for entry in result.data:
-            entries.append(JournalEntryResponse(
-                id=entry["id"],
-                user_id=entry["user_id"],
-                content=entry["content"],
-                mood=entry.get("mood"),
-                tags=entry.get("tags"),
-                is_voice=entry.get("is_voice", False),
-                created_at=datetime.fromisoformat(entry["created_at"]),
-                ai_analysis=entry.get("ai_analysis")
-            ))
-        
-        return entries
+        entries, headers = split_page(result.data, limit)
+        return json_response(projection.apply(entries), projection.response_type, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching journal entries: {str(e)}")
         raise HTTPException(
@@ -137,6 +164,71 @@ async def get_my_journals(
         )
 
 
+@router.get("/search", response_model=List[JournalSearchResult])
+async def search_my_journals(
+    q: str,
+    current_user: dict = Depends(get_current_client),
+    mood: Optional[str] = None,
+    tags: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sort: str = "rank",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Full-text search of the current user's journal entries.
+    
+    ``q`` takes web-search syntax ("exact phrase", OR, -word); ``tags=a,b``
+    requires every tag. Most relevant first, or newest first with
+    ``sort=recent`` (next page cursor in X-Next-Cursor).
+    """
+    try:
+        limit = page_size(limit)
+        entries, headers = await search_journals(
+            q,
+            limit,
+            user_id=current_user["id"],
+            mood=mood,
+            tags=parse_tags(tags),
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+            cursor=cursor,
+        )
+        return json_response(entries, List[JournalSearchResult], headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching journal entries: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search journal entries"
+        )
+
+
+@router.get("/semantic", response_model=List[JournalSimilarResult])
+async def semantic_search_my_journals(
+    q: str,
+    current_user: dict = Depends(get_current_client),
+    limit: Optional[int] = None
+):
+    """Entries closest in meaning to ``q`` (paraphrases included), most similar first"""
+    try:
+        entries = await semantic_search(current_user["id"], q, page_size(limit))
+        return json_response(entries, List[JournalSimilarResult])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in semantic journal search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search journal entries"
+        )
+
+
 @router.put("/{entry_id}", response_model=JournalEntryResponse)
 async def update_journal_entry(
     entry_id: str,
@@ -150,7 +242,7 @@ async def update_journal_entry(
         user_id = current_user["id"]
         
         # Verify entry exists and belongs to user
-        existing = supabase.table("journals")\
+        existing = await supabase.table("journals")\
             .select("*")\
             .eq("id", entry_id)\
             .eq("user_id", user_id)\
@@ -162,34 +254,44 @@ async def update_journal_entry(
                 detail="Journal entry not found"
             )
         
-        # Analyze mood if content changed
+        # Analyze mood if content changed enough since the last analysis
+        row = existing.data[0]
         mood = entry.mood
-        ai_analysis = existing.data[0].get("ai_analysis")
-        
-        if entry.content and (not entry.mood or entry.content != existing.data[0].get("content")):
-            # Run AI analysis on new content
-            analysis = analyze_mood(entry.content)
-            mood = analysis.mood
-            ai_analysis = {
-                "mood": analysis.mood.value,
-                "sentiment": analysis.sentiment,
-                "summary": analysis.summary,
-                "keywords": analysis.keywords,
-                "recommendations": analysis.recommendations,
-                "confidence": analysis.confidence
-            }
+        analysis_update = {}
+        reanalyze_in_background = False
+        
+        if entry.content and (not entry.mood or entry.content != row.get("content")):
+            keep_analysis, drift = plan_reanalysis(row, entry.content)
+            if keep_analysis:
+                # Small edit: the existing analysis still applies
+                analysis_update = {"analysis_drift": drift}
+            elif settings.journal_analysis_mode == "background":
+                local = local_mood_analysis(entry.content)
+                if needs_model(local, entry.narrative):
+                    analysis_update = {"analysis_status": "pending"}
+                    reanalyze_in_background = True
+                    if not mood and local is not None:
+                        mood = local.mood
+                else:
+                    mood = mood or local.mood
+                    analysis_update = analysis_fields(local, entry.content)
+            else:
+                # Run AI analysis on new content
+                analysis = await analyze_mood(entry.content, narrative=entry.narrative)
+                mood = analysis.mood
+                analysis_update = analysis_fields(analysis, entry.content)
         
         # Update journal entry
         update_data = {
             "content": entry.content,
-            "mood": mood.value if mood else existing.data[0].get("mood"),
-            "tags": entry.tags or existing.data[0].get("tags", []),
+            "mood": mood.value if mood else row.get("mood"),
+            "tags": entry.tags or row.get("tags", []),
             "is_voice": entry.is_voice,
-            "ai_analysis": ai_analysis,
+            **analysis_update,
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase.table("journals")\
+        result = await supabase.table("journals")\
             .update(update_data)\
             .eq("id", entry_id)\
             .eq("user_id", user_id)\
@@ -203,8 +305,17 @@ async def update_journal_entry(
         
         updated_entry = result.data[0]
         
+        if reanalyze_in_background:
+            enqueue_analysis(entry_id, entry.content, fill_mood=not entry.mood, delay=settings.reanalysis_delay_seconds)
+        if entry.content and entry.content != row.get("content"):
+            enqueue_embedding(entry_id, user_id, entry.content, updated_entry["created_at"])
+            if row.get("content"):
+                await forget_mood_analysis(row["content"])
+        
+        invalidate_dashboard()
+        
         # Log audit event
-        log_audit_event(
+        await log_audit_event(
             user_id=user_id,
             action="update",
             resource_type="journal",
@@ -221,7 +332,8 @@ async def update_journal_entry(
             tags=updated_entry.get("tags"),
             is_voice=updated_entry.get("is_voice", False),
             created_at=datetime.fromisoformat(updated_entry["created_at"]),
-            ai_analysis=updated_entry.get("ai_analysis")
+            ai_analysis=updated_entry.get("ai_analysis"),
+            analysis_status=updated_entry.get("analysis_status")
         )
         
     except HTTPException:
@@ -246,8 +358,8 @@ async def delete_journal_entry(
         user_id = current_user["id"]
         
         # Verify entry exists and belongs to user
-        existing = supabase.table("journals")\
-            .select("id, user_id")\
+        existing = await supabase.table("journals")\
+            .select("id, user_id, content")\
             .eq("id", entry_id)\
             .eq("user_id", user_id)\
             .execute()
@@ -259,14 +371,19 @@ async def delete_journal_entry(
             )
         
         # Delete entry
-        result = supabase.table("journals")\
+        result = await supabase.table("journals")\
             .delete()\
             .eq("id", entry_id)\
             .eq("user_id", user_id)\
             .execute()
         
+        forget_embedding(entry_id, user_id)
+        if existing.data[0].get("content"):
+            await forget_mood_analysis(existing.data[0]["content"])
+        invalidate_dashboard()
+        
         # Log audit event
-        log_audit_event(
+        await log_audit_event(
             user_id=user_id,
             action="delete",
             resource_type="journal",
@@ -298,7 +415,7 @@ async def get_journal_entry(
         user_id = current_user["id"]
         user_role = current_user.get("role")
         
-        result = supabase.table("journals")\
+        result = await supabase.table("journals")\
             .select("*")\
             .eq("id", entry_id)\
             .execute()
@@ -326,7 +443,8 @@ async def get_journal_entry(
             tags=entry.get("tags"),
             is_voice=entry.get("is_voice", False),
             created_at=datetime.fromisoformat(entry["created_at"]),
-            ai_analysis=entry.get("ai_analysis")
+            ai_analysis=entry.get("ai_analysis"),
+            analysis_status=entry.get("analysis_status")
         )
         
     except HTTPException:
@@ -338,3 +456,107 @@ async def get_journal_entry(
             detail="Failed to fetch journal entry"
         )
 
+
+
+@router.get("/{entry_id}/analysis", response_model=JournalAnalysisStatus)
+async def get_journal_analysis(
+    entry_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the analysis status (and result, once complete) of a journal entry"""
+    try:
+        supabase = get_supabase()
+        
+        result = await supabase.table("journals")\
+            .select("id, user_id, mood, ai_analysis, analysis_status, analysis_version, content_hash, analysis_content_hash")\
+            .eq("id", entry_id)\
+            .execute()
+        
+        if not result.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Journal entry not found"
+            )
+        
+        entry = result.data[0]
+        
+        if current_user.get("role") == "client" and entry["user_id"] != current_user["id"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+        
+        # Unknown for entries analyzed before content hashes were recorded
+        analysis_current = None
+        if entry.get("analysis_content_hash"):
+            analysis_current = entry["analysis_content_hash"] == entry.get("content_hash")
+        
+        return JournalAnalysisStatus(
+            id=entry["id"],
+            analysis_status=entry.get("analysis_status"),
+            mood=entry.get("mood"),
+            ai_analysis=entry.get("ai_analysis"),
+            analysis_version=entry.get("analysis_version"),
+            analysis_current=analysis_current
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching journal analysis: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch journal analysis"
+        )
+
+
+@router.get("/{entry_id}/similar", response_model=List[JournalSimilarResult])
+async def get_similar_entries(
+    entry_id: str,
+    req: Request,
+    current_user: dict = Depends(get_current_user),
+    limit: Optional[int] = None
+):
+    """Other entries by the same client that are thematically closest to this one"""
+    try:
+        supabase = get_supabase()
+        user_id = current_user["id"]
+        user_role = current_user.get("role")
+        
+        result = await supabase.table("journals")\
+            .select("id, user_id, content")\
+            .eq("id", entry_id)\
+            .execute()
+        
+        if not result.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Journal entry not found"
+            )
+        
+        entry = result.data[0]
+        
+        # Check access: client can only access their own, therapist can access their clients
+        if user_role == "client" and entry["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+        if user_role == "therapist":
+            await log_access_event(
+                therapist_id=user_id,
+                client_id=entry["user_id"],
+                ip_address=req.client.host if req.client else None
+            )
+        
+        entries = await similar_entries(entry, page_size(limit))
+        return json_response(entries, List[JournalSimilarResult])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding similar journal entries: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to find similar journal entries"
+        )
@@ -3,101 +3,79 @@ Therapist dashboard and analytics routes
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, timedelta
-from app.models import TherapistDashboardResponse, ClientSummary, JournalEntryResponse
+from app.models import (
+    TherapistDashboardResponse, TherapistDashboardSummaryResponse, ClientSummary,
+    JournalEntryResponse, JournalEntrySummary, JournalSearchResult, JournalSimilarResult
+)
 from app.database import get_supabase
 from app.utils.auth import get_current_therapist
 from app.utils.audit import log_access_event
-from collections import defaultdict
+from app.utils.pagination import page_size, keyset_page, split_page, reject_offset, iter_keyset
+from app.utils.serialization import json_response
+from app.utils.projection import journal_projection
+from app.services.dashboard_service import get_dashboard_snapshot
+from app.services.journal_search import search_journals, parse_tags
+from app.services.semantic_index import semantic_search
+from app.config import settings
+import orjson
+import zlib
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+DASHBOARD_RESPONSE_TYPES = {
+    JournalEntryResponse: TherapistDashboardResponse,
+    JournalEntrySummary: TherapistDashboardSummaryResponse,
+}
 
-@router.get("/dashboard", response_model=TherapistDashboardResponse)
+# Columns included in NDJSON exports (one JSON object per entry)
+EXPORT_COLUMNS = "id, user_id, content, mood, tags, is_voice, created_at, ai_analysis, analysis_status"
+
+
+@router.get("/dashboard", response_model=Union[TherapistDashboardResponse, TherapistDashboardSummaryResponse])
 async def get_therapist_dashboard(
     req: Request,
-    current_user: dict = Depends(get_current_therapist)
+    current_user: dict = Depends(get_current_therapist),
+    view: str = "full",
+    fields: Optional[str] = None
 ):
-    """Get therapist dashboard with summary metrics"""
+    """Get therapist dashboard with summary metrics (``view``/``fields`` shape recent entries)"""
     try:
-        supabase = get_supabase()
         therapist_id = current_user["id"]
+        projection = journal_projection(view, fields)
         
-        # Get all clients (for MVP, assume therapist-client relationship via a junction table)
-        # For simplicity, we'll get all client role users
-        clients_result = supabase.table("users")\
-            .select("id")\
-            .eq("role", "client")\
-            .execute()
-        
-        total_clients = len(clients_result.data) if clients_result.data else 0
-        
-        # Get active clients (clients with entries in last 30 days)
-        thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
-        
-        active_clients_result = supabase.table("journals")\
-            .select("user_id", distinct=True)\
-            .gte("created_at", thirty_days_ago)\
-            .execute()
-        
-        active_clients = len(set([e["user_id"] for e in active_clients_result.data])) if active_clients_result.data else 0
-        
-        # Get recent entries (last 10)
-        recent_entries_result = supabase.table("journals")\
-            .select("*")\
-            .order("created_at", desc=True)\
-            .limit(10)\
-            .execute()
-        
-        recent_entries = []
-        if recent_entries_result.data:
-            for entry in recent_entries_result.data:
-                recent_entries.append(JournalEntryResponse(
-                    id=entry["id"],
-                    user_id=entry["user_id"],
-                    content=entry["content"],
-                    mood=entry.get("mood"),
-                    tags=entry.get("tags"),
-                    is_voice=entry.get("is_voice", False),
-                    created_at=datetime.fromisoformat(entry["created_at"]),
-                    ai_analysis=entry.get("ai_analysis")
-                ))
-        
-        # Calculate mood trends (last 7 days)
-        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-        mood_trends_result = supabase.table("journals")\
-            .select("mood")\
-            .gte("created_at", seven_days_ago)\
-            .execute()
-        
-        mood_trends = defaultdict(int)
-        if mood_trends_result.data:
-            for entry in mood_trends_result.data:
-                mood = entry.get("mood", "neutral")
-                mood_trends[mood] += 1
+        # Counters come from daily rollups; the snapshot is cached briefly
+        # and invalidated on journal/client changes
+        snapshot = await get_dashboard_snapshot()
+        total_clients = snapshot["total_clients"]
+        active_clients = snapshot["active_clients"]
         
         # Calculate engagement rate (clients with entries in last week / total clients)
         engagement_rate = (active_clients / total_clients * 100) if total_clients > 0 else 0.0
         
         # Log access
-        log_access_event(
+        await log_access_event(
             therapist_id=therapist_id,
             client_id="dashboard",
             ip_address=req.client.host if req.client else None
         )
         
-        return TherapistDashboardResponse(
-            total_clients=total_clients,
-            active_clients=active_clients,
-            recent_entries=recent_entries,
-            mood_trends=dict(mood_trends),
-            engagement_rate=round(engagement_rate, 2)
-        )
+        return json_response({
+            "total_clients": total_clients,
+            "active_clients": active_clients,
+            "recent_entries": projection.apply(snapshot["recent_entries"]),
+            "mood_trends": snapshot["mood_trends"],
+            "engagement_rate": round(engagement_rate, 2),
+            "daily_active_users": snapshot["daily_active_users"]
+        }, DASHBOARD_RESPONSE_TYPES.get(projection.model, Dict[str, Any]))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching therapist dashboard: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch dashboard")
@@ -111,55 +89,29 @@ async def get_clients(
     try:
         supabase = get_supabase()
         
-        # Get all clients
-        clients_result = supabase.table("users")\
-            .select("*")\
-            .eq("role", "client")\
-            .execute()
-        
-        if not clients_result.data:
-            return []
+        # One aggregated query: per-client entry count, last entry, modal mood
+        # and entries in the last 7 days (see get_client_summaries in schema.sql)
+        seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        summaries_result = await supabase.rpc(
+            "get_client_summaries",
+            {"recent_since": seven_days_ago}
+        ).execute()
         
         client_summaries = []
         
-        for client in clients_result.data:
-            client_id = client["id"]
-            
-            # Get journal statistics
-            journals_result = supabase.table("journals")\
-                .select("id, mood, created_at")\
-                .eq("user_id", client_id)\
-                .order("created_at", desc=True)\
-                .execute()
-            
-            entry_count = len(journals_result.data) if journals_result.data else 0
-            last_entry_date = None
-            average_mood = None
-            
-            if journals_result.data:
-                last_entry_date = datetime.fromisoformat(journals_result.data[0]["created_at"])
-                
-                # Calculate average mood (simplified)
-                moods = [e.get("mood") for e in journals_result.data if e.get("mood")]
-                if moods:
-                    mood_counts = defaultdict(int)
-                    for m in moods:
-                        mood_counts[m] += 1
-                    average_mood = max(mood_counts.items(), key=lambda x: x[1])[0] if mood_counts else None
+        for client in summaries_result.data or []:
+            last_entry_date = client.get("last_entry_date")
             
             # Calculate engagement score (entries in last 7 days / 7)
-            seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-            recent_entries = [e for e in (journals_result.data or []) 
-                            if datetime.fromisoformat(e["created_at"]) >= datetime.fromisoformat(seven_days_ago)]
-            engagement_score = min(len(recent_entries) / 7.0, 1.0) * 100
+            engagement_score = min((client.get("recent_entry_count") or 0) / 7.0, 1.0) * 100
             
             client_summaries.append(ClientSummary(
-                id=client_id,
-                name=client.get("full_name", "Unknown"),
-                email=client.get("email", ""),
-                last_entry_date=last_entry_date,
-                entry_count=entry_count,
-                average_mood=average_mood,
+                id=client["id"],
+                name=client.get("full_name") or "Unknown",
+                email=client.get("email") or "",
+                last_entry_date=datetime.fromisoformat(last_entry_date) if last_entry_date else None,
+                entry_count=client.get("entry_count") or 0,
+                average_mood=client.get("modal_mood"),
                 engagement_score=round(engagement_score, 2)
             ))
         
@@ -170,19 +122,27 @@ async def get_clients(
         raise HTTPException(status_code=500, detail="Failed to fetch clients")
 
 
-@router.get("/clients/{client_id}/journals", response_model=List[JournalEntryResponse])
+@router.get("/clients/{client_id}/journals", response_model=Union[List[JournalEntryResponse], List[JournalEntrySummary]])
 async def get_client_journals(
     client_id: str,
     req: Request,
-    current_user: dict = Depends(get_current_therapist)
+    current_user: dict = Depends(get_current_therapist),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
+    view: str = "full",
+    fields: Optional[str] = None
 ):
-    """Get all journal entries for a specific client"""
+    """Get a page of journal entries for a specific client (next page cursor in X-Next-Cursor)"""
     try:
         supabase = get_supabase()
         therapist_id = current_user["id"]
+        reject_offset(offset)
+        limit = page_size(limit)
+        projection = journal_projection(view, fields)
         
         # Verify client exists
-        client_result = supabase.table("users")\
+        client_result = await supabase.table("users")\
             .select("id, role")\
             .eq("id", client_id)\
             .single()\
@@ -192,34 +152,20 @@ async def get_client_journals(
             raise HTTPException(status_code=404, detail="Client not found")
         
         # Log access
-        log_access_event(
+        await log_access_event(
             therapist_id=therapist_id,
             client_id=client_id,
             ip_address=req.client.host if req.client else None
         )
         
         # Get journal entries
-        result = supabase.table("journals")\
-            .select("*")\
-            .eq("user_id", client_id)\
-            .order("created_at", desc=True)\
-            .execute()
+        query = supabase.table("journals")\
+            .select(projection.select)\
+            .eq("user_id", client_id)
+        result = await keyset_page(query, cursor, limit).execute()
         
-        entries = []
-        if result.data:
-            for entry in result.data:
-                entries.append(JournalEntryResponse(
-                    id=entry["id"],
-                    user_id=entry["user_id"],
-                    content=entry["content"],
-                    mood=entry.get("mood"),
-                    tags=entry.get("tags"),
-                    is_voice=entry.get("is_voice", False),
-                    created_at=datetime.fromisoformat(entry["created_at"]),
-                    ai_analysis=entry.get("ai_analysis")
-                ))
-        
-        return entries
+        entries, headers = split_page(result.data, limit)
+        return json_response(projection.apply(entries), projection.response_type, headers=headers)
         
     except HTTPException:
         raise
@@ -227,3 +173,173 @@ async def get_client_journals(
         logger.error(f"Error fetching client journals: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch client journals")
 
+
+
+@router.get("/clients/{client_id}/journals/search", response_model=List[JournalSearchResult])
+async def search_client_journals(
+    client_id: str,
+    q: str,
+    req: Request,
+    current_user: dict = Depends(get_current_therapist),
+    mood: Optional[str] = None,
+    tags: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sort: str = "rank",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """Full-text search of a client's journal entries (same parameters as /api/journal/search)"""
+    try:
+        supabase = get_supabase()
+        therapist_id = current_user["id"]
+        limit = page_size(limit)
+        
+        # Verify client exists
+        client_result = await supabase.table("users")\
+            .select("id, role")\
+            .eq("id", client_id)\
+            .single()\
+            .execute()
+        
+        if not client_result.data or client_result.data.get("role") != "client":
+            raise HTTPException(status_code=404, detail="Client not found")
+        
+        # Log access
+        await log_access_event(
+            therapist_id=therapist_id,
+            client_id=client_id,
+            ip_address=req.client.host if req.client else None
+        )
+        
+        entries, headers = await search_journals(
+            q,
+            limit,
+            user_id=client_id,
+            mood=mood,
+            tags=parse_tags(tags),
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+            cursor=cursor,
+        )
+        return json_response(entries, List[JournalSearchResult], headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching client journals: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to search client journals")
+
+
+@router.get("/clients/{client_id}/journals/semantic", response_model=List[JournalSimilarResult])
+async def semantic_search_client_journals(
+    client_id: str,
+    q: str,
+    req: Request,
+    current_user: dict = Depends(get_current_therapist),
+    limit: Optional[int] = None
+):
+    """A client's entries closest in meaning to ``q`` (e.g. "conflict at work"), most similar first"""
+    try:
+        supabase = get_supabase()
+        therapist_id = current_user["id"]
+        
+        # Verify client exists
+        client_result = await supabase.table("users")\
+            .select("id, role")\
+            .eq("id", client_id)\
+            .single()\
+            .execute()
+        
+        if not client_result.data or client_result.data.get("role") != "client":
+            raise HTTPException(status_code=404, detail="Client not found")
+        
+        # Log access
+        await log_access_event(
+            therapist_id=therapist_id,
+            client_id=client_id,
+            ip_address=req.client.host if req.client else None
+        )
+        
+        entries = await semantic_search(client_id, q, page_size(limit))
+        return json_response(entries, List[JournalSimilarResult])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in semantic client journal search: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to search client journals")
+
+
+@router.get("/clients/{client_id}/journals/export")
+async def export_client_journals(
+    client_id: str,
+    req: Request,
+    current_user: dict = Depends(get_current_therapist),
+    gzip: bool = False
+):
+    """Stream a client's full journal history as NDJSON (optionally gzip-compressed)"""
+    try:
+        supabase = get_supabase()
+        therapist_id = current_user["id"]
+        
+        # Verify client exists
+        client_result = await supabase.table("users")\
+            .select("id, role")\
+            .eq("id", client_id)\
+            .single()\
+            .execute()
+        
+        if not client_result.data or client_result.data.get("role") != "client":
+            raise HTTPException(status_code=404, detail="Client not found")
+        
+        # One access log entry for the whole export
+        await log_access_event(
+            therapist_id=therapist_id,
+            client_id=client_id,
+            ip_address=req.client.host if req.client else None
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting journal export: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export client journals")
+    
+    def build_query():
+        return supabase.table("journals")\
+            .select(EXPORT_COLUMNS)\
+            .eq("user_id", client_id)
+    
+    async def ndjson_lines():
+        try:
+            async for entry in iter_keyset(build_query, settings.export_batch_size):
+                yield orjson.dumps(entry) + b"\n"
+        except Exception as e:
+            # Headers are already sent: re-raise so the server aborts the chunked
+            # response (and gzip_lines never writes its trailer) instead of
+            # ending it cleanly, which would pass a partial export off as complete
+            logger.error(f"Journal export for client {client_id} failed: {str(e)}")
+            raise
+    
+    async def gzip_lines():
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        async for line in ndjson_lines():
+            chunk = compressor.compress(line)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+    
+    filename = f"journals-{client_id}.ndjson"
+    if gzip:
+        return StreamingResponse(
+            gzip_lines(),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'}
+        )
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,299 @@
+"""
+Daily affirmations with a per-user cache and off-peak precomputation
+
+An affirmation is generated at most once per (user, UTC day, mood, request
+context) and kept in memory and in the ``daily_affirmations`` table. A
+scheduled job runs at ``affirmation_precompute_hour_utc`` and generates the
+next day's affirmation for recently active clients, so dashboard loads read
+a stored row instead of waiting on the model.
+"""
+
+import asyncio
+import hashlib
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Dict, Optional, Tuple
+from app.config import settings
+from app.database import get_supabase
+from app.models import MoodLevel
+from app.services.ai_scheduler import Priority, priority_scope
+from app.services.ai_service import request_affirmation, stream_affirmation, DEFAULT_AFFIRMATION
+from app.services.analysis_cache import normalize_content, purge_expired_analyses
+from app.utils.cache import TTLCache, SingleFlight
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (user_id, day, mood, context_hash)
+AffirmationKey = Tuple[str, str, str, str]
+
+_PRECOMPUTE_PAGE_SIZE = 500
+
+_memory = TTLCache(maxsize=settings.affirmation_cache_size, ttl=24 * 3600)
+_flights = SingleFlight()
+_scheduler: Optional[asyncio.Task] = None
+
+_stats: Dict[str, int] = {
+    "persistent_hits": 0,
+    "persistent_misses": 0,
+    "generated": 0,
+    "fallbacks": 0,
+    "precomputed": 0,
+    "precompute_failures": 0,
+    "precompute_runs": 0,
+}
+
+
+def context_hash(context: Optional[str]) -> str:
+    """Short hash of the optional request context (empty context hashes the same)"""
+    return hashlib.sha256(normalize_content(context or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _parse_mood(value: Optional[str]) -> MoodLevel:
+    try:
+        return MoodLevel(value) if value else MoodLevel.NEUTRAL
+    except ValueError:
+        return MoodLevel.NEUTRAL
+
+
+async def get_latest_mood(user_id: str) -> MoodLevel:
+    """Mood of the user's most recent entry (from the client_stats rollup)"""
+    supabase = get_supabase()
+    result = await supabase.table("client_stats")\
+        .select("last_mood")\
+        .eq("user_id", user_id)\
+        .limit(1)\
+        .execute()
+    return _parse_mood(result.data[0].get("last_mood") if result.data else None)
+
+
+async def _load_persistent(key: AffirmationKey) -> Optional[str]:
+    user_id, day, mood, ctx = key
+    try:
+        supabase = get_supabase()
+        result = await supabase.table("daily_affirmations")\
+            .select("affirmation")\
+            .eq("user_id", user_id)\
+            .eq("day", day)\
+            .eq("mood", mood)\
+            .eq("context_hash", ctx)\
+            .limit(1)\
+            .execute()
+        if result.data:
+            _stats["persistent_hits"] += 1
+            return result.data[0]["affirmation"]
+    except Exception as e:
+        logger.error(f"Failed to read daily affirmation: {str(e)}")
+    _stats["persistent_misses"] += 1
+    return None
+
+
+async def _store_persistent(key: AffirmationKey, affirmation: str):
+    user_id, day, mood, ctx = key
+    try:
+        supabase = get_supabase()
+        await supabase.table("daily_affirmations").upsert({
+            "user_id": user_id,
+            "day": day,
+            "mood": mood,
+            "context_hash": ctx,
+            "affirmation": affirmation,
+            "created_at": datetime.utcnow().isoformat()
+        }, on_conflict="user_id,day,mood,context_hash").execute()
+    except Exception as e:
+        logger.error(f"Failed to store daily affirmation: {str(e)}")
+
+
+def _seconds_left_in(day: date) -> float:
+    end = datetime.combine(day + timedelta(days=1), time.min)
+    return max((end - datetime.utcnow()).total_seconds(), 60.0)
+
+
+async def get_daily_affirmation(
+    user_id: str,
+    mood: MoodLevel,
+    context: Optional[str] = None,
+) -> str:
+    """Today's affirmation for a user and mood, generated only on a cache miss"""
+    day = datetime.utcnow().date()
+    key = (user_id, day.isoformat(), mood.value, context_hash(context))
+    cached = _memory.get(key)
+    if cached is not None:
+        return cached
+
+    async def load_or_generate() -> str:
+        affirmation = await _load_persistent(key)
+        if affirmation is None:
+            affirmation = await request_affirmation(mood, context)
+            _stats["generated"] += 1
+            await _store_persistent(key, affirmation)
+        _memory.set(key, affirmation, ttl=_seconds_left_in(day))
+        return affirmation
+
+    try:
+        return await _flights.do(key, load_or_generate)
+    except Exception as e:
+        # Fallbacks are not cached, so the next load tries the model again
+        _stats["fallbacks"] += 1
+        logger.error(f"Error generating affirmation: {str(e)}")
+        return DEFAULT_AFFIRMATION
+
+
+async def stream_daily_affirmation(
+    user_id: str,
+    mood: MoodLevel,
+    context: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Today's affirmation as text chunks: a cached one in a single chunk,
+    otherwise streamed from the model and cached once complete.
+    """
+    day = datetime.utcnow().date()
+    key = (user_id, day.isoformat(), mood.value, context_hash(context))
+    cached = _memory.get(key)
+    if cached is None:
+        cached = await _load_persistent(key)
+        if cached is not None:
+            _memory.set(key, cached, ttl=_seconds_left_in(day))
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    try:
+        async for text in stream_affirmation(mood, context):
+            parts.append(text)
+            yield text
+    except Exception as e:
+        if parts:
+            raise
+        _stats["fallbacks"] += 1
+        logger.error(f"Error streaming affirmation: {str(e)}")
+        yield DEFAULT_AFFIRMATION
+        return
+
+    affirmation = "".join(parts).strip()
+    if affirmation:
+        _stats["generated"] += 1
+        _memory.set(key, affirmation, ttl=_seconds_left_in(day))
+        await _store_persistent(key, affirmation)
+
+
+async def precompute_affirmations(day: Optional[date] = None) -> int:
+    """
+    Generate ``day``'s affirmation (default: tomorrow) for recently active clients.
+
+    Clients whose row already exists are skipped; returns the number generated.
+    """
+    supabase = get_supabase()
+    day = day or datetime.utcnow().date() + timedelta(days=1)
+    active_since = (datetime.utcnow() - timedelta(days=settings.affirmation_precompute_active_days)).isoformat()
+    no_context = context_hash(None)
+    slots = asyncio.Semaphore(settings.affirmation_precompute_concurrency)
+    generated = 0
+
+    async def precompute_one(user_id: str, mood: MoodLevel) -> bool:
+        async with slots:
+            try:
+                with priority_scope(Priority.BACKGROUND):
+                    affirmation = await request_affirmation(mood)
+            except Exception as e:
+                _stats["precompute_failures"] += 1
+                logger.error(f"Failed to precompute affirmation for {user_id}: {str(e)}")
+                return False
+        await _store_persistent((user_id, day.isoformat(), mood.value, no_context), affirmation)
+        return True
+
+    last_user_id = None
+    while True:
+        query = supabase.table("client_stats")\
+            .select("user_id, last_mood")\
+            .gte("last_entry_at", active_since)\
+            .order("user_id")\
+            .limit(_PRECOMPUTE_PAGE_SIZE)
+        if last_user_id:
+            query = query.gt("user_id", last_user_id)
+        rows = (await query.execute()).data or []
+        if not rows:
+            break
+        last_user_id = rows[-1]["user_id"]
+
+        done = await supabase.table("daily_affirmations")\
+            .select("user_id, mood")\
+            .eq("day", day.isoformat())\
+            .eq("context_hash", no_context)\
+            .in_("user_id", [row["user_id"] for row in rows])\
+            .execute()
+        existing = {(row["user_id"], row["mood"]) for row in done.data or []}
+
+        pending = []
+        for row in rows:
+            mood = _parse_mood(row.get("last_mood"))
+            if (row["user_id"], mood.value) not in existing:
+                pending.append(precompute_one(row["user_id"], mood))
+        results = await asyncio.gather(*pending)
+        generated += sum(1 for ok in results if ok)
+
+        if len(rows) < _PRECOMPUTE_PAGE_SIZE:
+            break
+
+    # Drop rows nobody will read again
+    cutoff = (day - timedelta(days=settings.affirmation_retention_days)).isoformat()
+    await supabase.table("daily_affirmations").delete().lt("day", cutoff).execute()
+
+    _stats["precomputed"] += generated
+    return generated
+
+
+def _seconds_until_next_run(now: datetime) -> float:
+    run_at = datetime.combine(now.date(), time(hour=settings.affirmation_precompute_hour_utc))
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+async def _scheduler_loop():
+    while True:
+        await asyncio.sleep(_seconds_until_next_run(datetime.utcnow()))
+        _stats["precompute_runs"] += 1
+        try:
+            generated = await precompute_affirmations()
+            logger.info(f"Precomputed {generated} daily affirmations")
+        except Exception as e:
+            logger.error(f"Affirmation precompute failed: {str(e)}")
+        # Off-peak housekeeping: cached analyses must not outlive their retention
+        try:
+            purged = await purge_expired_analyses()
+            logger.info(f"Purged {purged} expired mood analysis cache rows")
+        except Exception as e:
+            logger.error(f"Mood analysis cache purge failed: {str(e)}")
+
+
+async def start_affirmation_scheduler():
+    """Schedule the daily off-peak precompute (and mood analysis cache purge)"""
+    global _scheduler
+    if _scheduler is not None or not settings.affirmation_precompute_enabled:
+        return
+    _scheduler = asyncio.create_task(_scheduler_loop(), name="affirmation-precompute")
+
+
+async def stop_affirmation_scheduler():
+    """Cancel the precompute schedule (an interrupted run is redone on the next one)"""
+    global _scheduler
+    if _scheduler is None:
+        return
+    _scheduler.cancel()
+    try:
+        await _scheduler
+    except asyncio.CancelledError:
+        pass
+    _scheduler = None
+
+
+def get_affirmation_stats() -> Dict:
+    """Snapshot of affirmation cache and precompute counters"""
+    return {
+        "memory": _memory.stats(),
+        **_stats,
+        "coalesced": _flights.coalesced,
+        "scheduled": _scheduler is not None,
+    }
@@ -0,0 +1,290 @@
+"""
+Bounded asynchronous executor for Gemini model calls
+
+Calls are first admitted by the quota scheduler (requests/tokens per minute,
+interactive ahead of background), then run on one of a fixed number of
+concurrency slots. Each attempt is bounded by its own timeout and goes
+through the circuit breaker and retry policy in resilience.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from app.config import settings
+from app.services.ai_scheduler import scheduler, Priority, current_priority, is_quota_error
+from app.services.analysis_batcher import estimate_tokens
+from app.services.resilience import AICircuitOpenError, breaker, call_resilient, is_local_error
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AIQueueFullError(Exception):
+    """Raised when too many model calls are already waiting for a slot"""
+
+
+_slots = asyncio.Semaphore(settings.ai_max_concurrency)
+
+_stats: Dict[str, Any] = {
+    "in_flight": 0,
+    "queued": 0,
+    "max_queued": 0,
+    "completed": 0,
+    "failed": 0,
+    "timed_out": 0,
+    "rejected": 0,
+    "streams": 0,
+    "streams_abandoned": 0,
+    "total_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+
+class _Reservation:
+    """Queue place taken by the capacity check, used by the call's first attempt"""
+
+    def __init__(self):
+        self.held = True
+
+    def release(self):
+        """Give the place back if no attempt used it (the call ended first)"""
+        if self.held:
+            self.held = False
+            _stats["queued"] -= 1
+
+
+def _join_queue(reservation: _Reservation):
+    # The first attempt waits in the place its capacity check reserved;
+    # retries and hedges of an admitted call are counted without a check
+    if reservation.held:
+        reservation.held = False
+    else:
+        _stats["queued"] += 1
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+
+
+async def _acquire_slot() -> float:
+    queued_at = time.monotonic()
+    await _slots.acquire()
+    started_at = time.monotonic()
+    _stats["total_wait_seconds"] += started_at - queued_at
+    _stats["in_flight"] += 1
+    return started_at
+
+
+def _release_slot(started_at: float):
+    _stats["in_flight"] -= 1
+    _stats["total_run_seconds"] += time.monotonic() - started_at
+    _slots.release()
+
+
+def _response_text(response) -> str:
+    try:
+        return response.text or ""
+    except Exception:
+        # Blocked or empty candidates have no text
+        return ""
+
+
+async def _admit(prompt: str, priority: Priority, deadline: float, reservation: _Reservation) -> Tuple[int, float]:
+    estimated = estimate_tokens(prompt) + settings.ai_output_tokens_estimate
+    # Queued from the capacity check until a slot is held, through the quota wait
+    _join_queue(reservation)
+    try:
+        await scheduler.admit(estimated, priority, deadline)
+        return estimated, await _acquire_slot()
+    finally:
+        _stats["queued"] -= 1
+
+
+def _attempt_timeout(priority: Priority, deadline: float) -> float:
+    if priority == Priority.BACKGROUND:
+        limit = settings.ai_background_attempt_timeout_seconds
+    else:
+        limit = settings.ai_attempt_timeout_seconds
+    return max(min(limit, deadline - asyncio.get_running_loop().time()), 0)
+
+
+async def _run(model, prompt, kwargs: Dict[str, Any], priority: Priority, deadline: float, reservation: _Reservation):
+    estimated, started_at = await _admit(prompt, priority, deadline, reservation)
+    try:
+        # Only the provider call counts against the attempt timeout, not the quota wait
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt, **kwargs),
+            _attempt_timeout(priority, deadline)
+        )
+    except Exception as e:
+        if is_quota_error(e):
+            scheduler.report_throttled()
+        raise
+    finally:
+        _release_slot(started_at)
+    scheduler.settle(estimated, estimate_tokens(prompt) + estimate_tokens(_response_text(response)))
+    return response
+
+
+def _check_queue() -> _Reservation:
+    """
+    Reserve a queue place for a new call, or raise AIQueueFullError.
+
+    The place is taken in the same step as the check, so calls made in the
+    same event loop tick cannot all pass before any of them is counted.
+    """
+    if _stats["queued"] >= settings.ai_max_queue:
+        _stats["rejected"] += 1
+        raise AIQueueFullError("AI executor queue is full")
+    _stats["queued"] += 1
+    _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+    return _Reservation()
+
+
+def _timeout_for(priority: Priority, timeout: Optional[float]) -> float:
+    if timeout is not None:
+        return timeout
+    if priority == Priority.BACKGROUND:
+        return settings.ai_background_timeout_seconds
+    return settings.ai_call_timeout_seconds
+
+
+async def generate_content(
+    model,
+    prompt,
+    *,
+    timeout: Optional[float] = None,
+    priority: Optional[Priority] = None,
+    **kwargs
+):
+    """
+    Run a model call without blocking the event loop.
+
+    The call waits for quota (see ai_scheduler) and then for one of
+    ``ai_max_concurrency`` slots; new calls beyond ``ai_max_queue`` waiting
+    for either are rejected immediately. ``priority`` defaults to the current task's
+    priority. The timeout is the call's deadline and covers the quota wait,
+    the slot wait, retries and the model calls themselves. Raises
+    AICircuitOpenError without waiting while the breaker is open.
+    """
+    reservation = _check_queue()
+
+    priority = priority if priority is not None else current_priority()
+    timeout = _timeout_for(priority, timeout)
+    deadline = asyncio.get_running_loop().time() + timeout
+    # Duplicate requests spend quota, so only hedge user-facing calls with quota to spare
+    hedge_after = None
+    if priority == Priority.INTERACTIVE and settings.ai_hedge_after_seconds > 0 and not scheduler.waiting():
+        hedge_after = settings.ai_hedge_after_seconds
+    try:
+        response = await asyncio.wait_for(
+            call_resilient(lambda: _run(model, prompt, kwargs, priority, deadline, reservation), deadline, hedge_after),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        _stats["timed_out"] += 1
+        logger.warning(f"Model call timed out within its {timeout}s deadline")
+        raise
+    except AICircuitOpenError:
+        raise
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        reservation.release()
+
+    _stats["completed"] += 1
+    return response
+
+
+async def stream_content(
+    model,
+    prompt,
+    *,
+    timeout: Optional[float] = None,
+    priority: Optional[Priority] = None,
+    **kwargs
+) -> AsyncIterator[str]:
+    """
+    Stream a model call's text chunks as they arrive.
+
+    Uses the same quota scheduler, slots and queue limit as
+    ``generate_content``; the slot is held until the stream ends or the
+    consumer stops iterating. The timeout covers the waits and the whole stream.
+    Streams go through the circuit breaker but are not retried, since chunks
+    may already have reached the client.
+    """
+    reservation = _check_queue()
+
+    priority = priority if priority is not None else current_priority()
+    timeout = _timeout_for(priority, timeout)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        probe = breaker.acquire()
+    except AICircuitOpenError:
+        reservation.release()
+        raise
+    _stats["streams"] += 1
+    try:
+        estimated, started_at = await asyncio.wait_for(_admit(prompt, priority, deadline, reservation), timeout)
+    except BaseException as e:
+        reservation.release()
+        breaker.release(probe)
+        if isinstance(e, asyncio.TimeoutError):
+            _stats["timed_out"] += 1
+            logger.warning(f"Model stream timed out after {timeout}s waiting for quota or a slot")
+        raise
+
+    streamed_tokens = 0
+    try:
+        # The attempt timeout bounds the wait for the stream to start
+        response = await asyncio.wait_for(
+            model.generate_content_async(prompt, stream=True, **kwargs),
+            _attempt_timeout(priority, deadline)
+        )
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            text = _response_text(chunk)
+            if text:
+                streamed_tokens += estimate_tokens(text)
+                yield text
+    except asyncio.TimeoutError:
+        _stats["timed_out"] += 1
+        breaker.on_failure(probe)
+        logger.warning(f"Model stream timed out after {timeout}s")
+        raise
+    except GeneratorExit:
+        # Consumer went away (e.g. client disconnected)
+        _stats["streams_abandoned"] += 1
+        raise
+    except Exception as e:
+        _stats["failed"] += 1
+        if is_quota_error(e):
+            scheduler.report_throttled()
+        if is_local_error(e):
+            breaker.release(probe)
+        else:
+            breaker.on_failure(probe)
+        raise
+    else:
+        _stats["completed"] += 1
+        breaker.on_success(probe)
+    finally:
+        # Frees the half-open probe if the stream ended without a verdict
+        breaker.release(probe)
+        _release_slot(started_at)
+        scheduler.settle(estimated, estimate_tokens(prompt) + streamed_tokens)
+
+
+def get_executor_stats() -> Dict[str, Any]:
+    """Snapshot of executor queue depth and call counters"""
+    finished = _stats["completed"] + _stats["failed"] + _stats["timed_out"]
+    return {
+        **_stats,
+        "max_concurrency": settings.ai_max_concurrency,
+        "max_queue": settings.ai_max_queue,
+        "avg_wait_seconds": round(_stats["total_wait_seconds"] / finished, 4) if finished else 0.0,
+        "avg_run_seconds": round(_stats["total_run_seconds"] / finished, 4) if finished else 0.0,
+    }
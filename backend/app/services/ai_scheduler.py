@@ -0,0 +1,216 @@
+"""
+Quota-aware scheduling of Gemini calls
+
+Every model call is admitted through two token buckets that mirror the
+provider quota: requests per minute and tokens per minute. Calls that do not
+fit wait in a priority queue (interactive ahead of background, FIFO within a
+class) until the buckets refill or their deadline passes. Background calls
+leave a share of each bucket for interactive traffic, and a quota error from
+the provider pauses admission briefly instead of letting every queued call
+hit the same 429.
+
+The priority of a call comes from a context variable, so background workers
+run under ``priority_scope`` instead of threading it through every layer.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional
+from google.api_core import exceptions as google_exceptions
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class AIDeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call's deadline passes while it waits for quota"""
+
+
+_priority: ContextVar[Priority] = ContextVar("ai_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    """Priority of model calls made from the current task"""
+    return _priority.get()
+
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """Run the enclosed model calls (and tasks started inside) at ``priority``"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """True for provider rate-limit / quota errors (HTTP 429)"""
+    return isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests))
+
+
+class TokenBucket:
+    """Continuously refilling bucket; the level may go negative after a correction"""
+
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = float(capacity)
+        self.rate = per_minute / 60.0
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0, now: Optional[float] = None) -> float:
+        """Seconds until ``amount`` can be taken while keeping ``reserve`` of capacity free"""
+        self._refill(now if now is not None else time.monotonic())
+        # Never ask for more than a full bucket, or a large call would wait forever
+        needed = min(amount, self.capacity) + reserve * self.capacity - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def adjust(self, delta: float):
+        self._refill(time.monotonic())
+        self.level = min(self.capacity, self.level + delta)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AIScheduler:
+    """Admits model calls against request and token budgets in priority order"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, background_reserve: float):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute)
+        self.background_reserve = background_reserve
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._paused_until = 0.0
+        self._stats: Dict[str, int] = {
+            "admitted_interactive": 0,
+            "admitted_background": 0,
+            "queued_interactive": 0,
+            "queued_background": 0,
+            "deadline_expired": 0,
+            "throttled": 0,
+        }
+
+    def _wait_time(self, priority: Priority, tokens: int) -> float:
+        now = time.monotonic()
+        reserve = self.background_reserve if priority == Priority.BACKGROUND else 0.0
+        return max(
+            self._paused_until - now,
+            self.requests.wait_time(1, reserve, now),
+            self.tokens.wait_time(tokens, reserve, now),
+        )
+
+    def _take(self, priority: Priority, tokens: int):
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self._stats[f"admitted_{priority.name.lower()}"] += 1
+
+    async def admit(self, tokens: int, priority: Priority, deadline: float):
+        """
+        Wait until a call estimated at ``tokens`` fits the quota.
+
+        ``deadline`` is a ``loop.time()`` value; raises AIDeadlineExceeded if
+        the call is still queued when it passes.
+        """
+        if not self._waiters and self._wait_time(priority, tokens) == 0:
+            self._take(priority, tokens)
+            return
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(int(priority), next(self._seq), tokens, loop.create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._stats[f"queued_{priority.name.lower()}"] += 1
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            self._stats["deadline_expired"] += 1
+            raise AIDeadlineExceeded("Deadline passed while waiting for model quota")
+        finally:
+            # A cancelled head may have been blocking the queue
+            if waiter.future.cancelled():
+                self._dispatch()
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            head = self._waiters[0]
+            if head.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            priority = Priority(head.priority)
+            wait = self._wait_time(priority, head.tokens)
+            if wait > 0:
+                # Strict order: nothing jumps a head that is waiting for quota
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._take(priority, head.tokens)
+            head.future.set_result(None)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once a call's real size is known"""
+        if actual_tokens != estimated_tokens:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def report_throttled(self):
+        """The provider rejected a call for quota; hold admissions for a moment"""
+        self._stats["throttled"] += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + settings.ai_throttle_backoff_seconds)
+        logger.warning(f"Gemini quota exceeded, pausing model calls for {settings.ai_throttle_backoff_seconds}s")
+
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.future.done())
+
+    def stats(self) -> Dict:
+        waiting = [waiter for waiter in self._waiters if not waiter.future.done()]
+        return {
+            **self._stats,
+            "waiting_interactive": sum(1 for w in waiting if w.priority == Priority.INTERACTIVE),
+            "waiting_background": sum(1 for w in waiting if w.priority == Priority.BACKGROUND),
+            "requests_available": round(self.requests.level, 2),
+            "tokens_available": round(self.tokens.level),
+            "requests_per_minute": settings.ai_requests_per_minute,
+            "tokens_per_minute": settings.ai_tokens_per_minute,
+            "paused_seconds": round(max(self._paused_until - time.monotonic(), 0.0), 2),
+        }
+
+
+scheduler = AIScheduler(
+    requests_per_minute=settings.ai_requests_per_minute,
+    tokens_per_minute=settings.ai_tokens_per_minute,
+    background_reserve=settings.ai_background_reserve,
+)
+
+
+def get_scheduler_stats() -> Dict:
+    """Snapshot of quota buckets and queue state"""
+    return scheduler.stats()
@@ -2,91 +2,50 @@
 AI service for Gemini API integration
 """
 
-import google.generativeai as genai
 from app.config import settings
 from app.models import MoodAnalysis, MoodLevel, ActivitySuggestion
-from typing import List, Dict
+from app.services.ai_executor import generate_content, stream_content
+from app.services.analysis_cache import get_or_compute, get_cached_analysis, store_analysis, forget_analyses
+from app.services.model_registry import get_model, render_prompt, resolve_model_name, PROMPT_VERSION
+from app.services.analysis_batcher import MicroBatcher
+from app.services.local_sentiment import classify_mood, needs_model
+from app.services.chunking import needs_chunking, plan_chunks, reduce_analyses, record_failed_chunks
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+import asyncio
+import json
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize Gemini
-genai.configure(api_key=settings.gemini_api_key)
+# Separates the streamed summary from the structured part of a streamed analysis
+STREAM_SEPARATOR = "###ANALYSIS###"
 
 
-def analyze_mood(journal_content: str) -> MoodAnalysis:
+def local_mood_analysis(journal_content: str) -> Optional[MoodAnalysis]:
+    """Lexicon-based analysis from the local tier, or None when it is disabled"""
+    if not settings.local_sentiment_enabled:
+        return None
+    return classify_mood(journal_content)
+
+
+async def analyze_mood(journal_content: str, narrative: bool = False) -> MoodAnalysis:
     """
-    Analyze journal entry for mood, sentiment, and insights
+    Analyze journal entry for mood, sentiment, and insights.
+    
+    A confident local analysis is returned without calling Gemini unless
+    ``narrative`` asks for a model-written summary.
     """
+    local = local_mood_analysis(journal_content)
+    if not needs_model(local, narrative):
+        return local
+    
     try:
-        # Use cheapest model: gemini-1.5-flash (has free tier, $0.075 per 1M input tokens)
-        # Alternative: gemini-2.0-flash-lite ($0.019 per 1M tokens) if available
-        model_name = settings.gemini_model or "gemini-1.5-flash"
-        # Ensure we're not using deprecated gemini-pro
-        if model_name == "gemini-pro":
-            model_name = "gemini-1.5-flash"
-            logger.warning("gemini-pro is deprecated, using gemini-1.5-flash instead")
-        model = genai.GenerativeModel(model_name)
-        
-        prompt = f"""
-        Analyze the following journal entry for mood and sentiment. Provide:
-        1. Mood level (very_low, low, neutral, good, very_good)
-        2. Sentiment score (-1 to 1, where -1 is very negative and 1 is very positive)
-        3. A brief summary (2-3 sentences)
-        4. Key topics/keywords (list of 5-10 words)
-        5. Therapeutic recommendations (list of 2-3 actionable suggestions)
-        6. Confidence level (0 to 1)
-        
-        Journal entry:
-        {journal_content}
-        
-        Respond in JSON format:
-        {{
-            "mood": "neutral",
-            "sentiment": 0.0,
-            "summary": "...",
-            "keywords": ["word1", "word2"],
-            "recommendations": ["rec1", "rec2"],
-            "confidence": 0.85
-        }}
-        """
-        
-        response = model.generate_content(prompt)
-        
-        # Parse response (simplified - in production, use proper JSON parsing)
-        import json
-        import re
-        
-        # Extract JSON from response
-        json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-        if json_match:
-            data = json.loads(json_match.group())
-        else:
-            # Fallback parsing
-            data = parse_fallback_response(response.text)
-        
-        # Map mood string to MoodLevel enum
-        mood_mapping = {
-            "very_low": MoodLevel.VERY_LOW,
-            "low": MoodLevel.LOW,
-            "neutral": MoodLevel.NEUTRAL,
-            "good": MoodLevel.GOOD,
-            "very_good": MoodLevel.VERY_GOOD
-        }
-        
-        mood = mood_mapping.get(data.get("mood", "neutral").lower(), MoodLevel.NEUTRAL)
-        
-        return MoodAnalysis(
-            mood=mood,
-            sentiment=float(data.get("sentiment", 0.0)),
-            summary=data.get("summary", "Unable to generate summary"),
-            keywords=data.get("keywords", []),
-            recommendations=data.get("recommendations", []),
-            confidence=float(data.get("confidence", 0.5))
-        )
-        
+        return await request_mood_analysis(journal_content)
     except Exception as e:
         logger.error(f"Error in mood analysis: {str(e)}")
+        if local is not None:
+            return local
         # Return default analysis on error
         return MoodAnalysis(
             mood=MoodLevel.NEUTRAL,
@@ -98,6 +57,193 @@ def analyze_mood(journal_content: str) -> MoodAnalysis:
         )
 
 
+async def request_mood_analysis(journal_content: str) -> MoodAnalysis:
+    """
+    Run mood analysis against Gemini, raising on model or parsing errors.
+    Results are served from the content-addressed analysis cache when possible,
+    and cache misses are micro-batched with other pending analyses. Long
+    entries are analyzed in chunks (see chunking).
+    """
+    model_name = resolve_model_name()
+    
+    if needs_chunking(journal_content):
+        compute = lambda: _analyze_in_chunks(journal_content)
+    elif settings.analysis_batch_enabled:
+        compute = lambda: _batcher.submit(journal_content)
+    else:
+        compute = lambda: _generate_mood_analysis(journal_content)
+    
+    return await get_or_compute(journal_content, model_name, PROMPT_VERSION, compute)
+
+
+async def forget_mood_analysis(journal_content: str):
+    """Drop cached analyses of an entry's text (and of its chunks) once no entry has it"""
+    contents = [journal_content]
+    if needs_chunking(journal_content):
+        contents += plan_chunks(journal_content)
+    await forget_analyses(contents, resolve_model_name(), PROMPT_VERSION)
+
+
+async def _analyze_in_chunks(journal_content: str) -> MoodAnalysis:
+    """
+    Map each chunk through the normal (cached, batched) path, then reduce locally.
+
+    Raises if any chunk fails: the result is cached for the whole entry, so an
+    analysis of part of the text is never returned. Chunks that succeeded are
+    cached on their own, so a retry only re-runs the failed ones.
+    """
+    chunks = plan_chunks(journal_content)
+    results = await asyncio.gather(*(request_mood_analysis(chunk) for chunk in chunks), return_exceptions=True)
+    
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        record_failed_chunks(len(failures))
+        logger.warning(f"{len(failures)} of {len(chunks)} chunks of a long entry failed")
+        raise failures[0]
+    return reduce_analyses(results, [len(chunk) for chunk in chunks])
+
+
+async def stream_mood_analysis(journal_content: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream a mood analysis: ``("summary", text)`` chunks while the model writes
+    the summary, then one ``("analysis", MoodAnalysis)`` with the parsed result.
+    Cached analyses are replayed immediately; raises on model errors.
+    """
+    model_name = resolve_model_name()
+    cached = await get_cached_analysis(journal_content, model_name, PROMPT_VERSION)
+    if cached is None and needs_chunking(journal_content):
+        # Too long for one prompt: chunked analysis, delivered in one piece
+        cached = await request_mood_analysis(journal_content)
+    if cached is not None:
+        yield "summary", cached.summary
+        yield "analysis", cached
+        return
+    
+    model = get_model()
+    prompt = render_prompt("mood_analysis_stream", journal_content=journal_content, separator=STREAM_SEPARATOR)
+    
+    text = ""
+    emitted = 0
+    split_at = -1
+    async for chunk in stream_content(model, prompt):
+        text += chunk
+        if split_at >= 0:
+            continue
+        split_at = text.find(STREAM_SEPARATOR)
+        # Hold back a possible partial separator at the end of the buffer
+        end = split_at if split_at >= 0 else max(emitted, len(text) - len(STREAM_SEPARATOR) + 1)
+        if end > emitted:
+            yield "summary", text[emitted:end]
+            emitted = end
+    
+    if split_at < 0:
+        if emitted < len(text):
+            yield "summary", text[emitted:]
+        summary, rest = text, ""
+    else:
+        summary, rest = text[:split_at], text[split_at + len(STREAM_SEPARATOR):]
+    
+    json_match = re.search(r'\{.*\}', rest, re.DOTALL)
+    if json_match:
+        data = json.loads(json_match.group())
+    else:
+        data = parse_fallback_response(summary)
+    data["summary"] = summary.strip() or data.get("summary", "Unable to generate summary")
+    
+    analysis = _mood_analysis_from_data(data)
+    if json_match:
+        # Placeholder results from the fallback parser are never cached
+        await store_analysis(journal_content, model_name, PROMPT_VERSION, analysis)
+    else:
+        logger.warning("Streamed mood analysis had no JSON block; returning an uncached fallback")
+    yield "analysis", analysis
+
+
+async def _generate_mood_analysis(journal_content: str) -> MoodAnalysis:
+    """Single uncached mood analysis call"""
+    model = get_model()
+    prompt = render_prompt("mood_analysis", journal_content=journal_content)
+    
+    response = await generate_content(model, prompt)
+    
+    # Extract JSON from response; results are cached by content hash, so an
+    # unparseable reply raises instead of returning a placeholder analysis
+    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
+    if not json_match:
+        raise ValueError("Mood analysis reply contained no JSON object")
+    data = json.loads(json_match.group())
+    
+    return _mood_analysis_from_data(data)
+
+
+async def _generate_mood_analysis_batch(contents: List[str]) -> List[Optional[MoodAnalysis]]:
+    """
+    Analyze several journal entries with one model call.
+    Entries missing or malformed in the response come back as None.
+    """
+    model = get_model()
+    
+    entries_text = "\n\n".join(
+        f"Entry {i}:\n<<<\n{content}\n>>>" for i, content in enumerate(contents, start=1)
+    )
+    prompt = render_prompt("mood_analysis_batch", entry_count=len(contents), entries_text=entries_text)
+    
+    response = await generate_content(model, prompt)
+    
+    results: List[Optional[MoodAnalysis]] = [None] * len(contents)
+    json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+    if not json_match:
+        logger.warning("Batched mood analysis returned no JSON array")
+        return results
+    
+    items = json.loads(json_match.group())
+    for item in items if isinstance(items, list) else []:
+        try:
+            index = int(item["entry"]) - 1
+            if 0 <= index < len(contents) and results[index] is None:
+                results[index] = _mood_analysis_from_data(item)
+        except Exception as e:
+            logger.warning(f"Skipping malformed batched analysis item: {str(e)}")
+    return results
+
+
+def _mood_analysis_from_data(data: Dict) -> MoodAnalysis:
+    """Build a MoodAnalysis from the model's parsed JSON"""
+    # Map mood string to MoodLevel enum
+    mood_mapping = {
+        "very_low": MoodLevel.VERY_LOW,
+        "low": MoodLevel.LOW,
+        "neutral": MoodLevel.NEUTRAL,
+        "good": MoodLevel.GOOD,
+        "very_good": MoodLevel.VERY_GOOD
+    }
+    
+    mood = mood_mapping.get(str(data.get("mood", "neutral")).lower(), MoodLevel.NEUTRAL)
+    
+    return MoodAnalysis(
+        mood=mood,
+        sentiment=float(data.get("sentiment", 0.0)),
+        summary=data.get("summary", "Unable to generate summary"),
+        keywords=data.get("keywords", []),
+        recommendations=data.get("recommendations", []),
+        confidence=float(data.get("confidence", 0.5))
+    )
+
+
+_batcher = MicroBatcher(
+    batch_fn=_generate_mood_analysis_batch,
+    single_fn=_generate_mood_analysis,
+    max_entries=settings.analysis_batch_max_entries,
+    max_tokens=settings.analysis_batch_max_tokens,
+    window_seconds=settings.analysis_batch_window_ms / 1000,
+)
+
+
+def get_batcher_stats() -> Dict:
+    """Snapshot of mood analysis batching counters"""
+    return _batcher.stats()
+
+
 def parse_fallback_response(text: str) -> Dict:
     """Fallback parser if JSON extraction fails"""
     return {
@@ -110,118 +256,94 @@ def parse_fallback_response(text: str) -> Dict:
     }
 
 
-def generate_affirmation(user_mood: MoodLevel, context: str = None) -> str:
+DEFAULT_AFFIRMATION = "You are doing your best, and that is enough. Take it one step at a time."
+
+
+async def generate_affirmation(user_mood: MoodLevel, context: str = None) -> str:
     """
     Generate personalized daily affirmation based on mood
     """
     try:
-        # Use cheapest model: gemini-1.5-flash (has free tier, $0.075 per 1M input tokens)
-        # Alternative: gemini-2.0-flash-lite ($0.019 per 1M tokens) if available
-        model_name = settings.gemini_model or "gemini-1.5-flash"
-        # Ensure we're not using deprecated gemini-pro
-        if model_name == "gemini-pro":
-            model_name = "gemini-1.5-flash"
-            logger.warning("gemini-pro is deprecated, using gemini-1.5-flash instead")
-        model = genai.GenerativeModel(model_name)
-        
-        mood_context = {
-            MoodLevel.VERY_LOW: "The user is experiencing very low mood",
-            MoodLevel.LOW: "The user is experiencing low mood",
-            MoodLevel.NEUTRAL: "The user is in a neutral state",
-            MoodLevel.GOOD: "The user is in a good mood",
-            MoodLevel.VERY_GOOD: "The user is in a very good mood"
-        }
-        
-        prompt = f"""
-        Generate a personalized, supportive, and therapeutic daily affirmation.
-        
-        Context: {mood_context.get(user_mood, "No specific context")}
-        Additional context: {context or "None"}
-        
-        The affirmation should be:
-        - Positive and encouraging
-        - Realistic and authentic (not overly optimistic if mood is low)
-        - Therapeutic and supportive
-        - 1-2 sentences maximum
-        
-        Return only the affirmation text, no additional formatting.
-        """
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
-        
+        return await request_affirmation(user_mood, context)
     except Exception as e:
         logger.error(f"Error generating affirmation: {str(e)}")
-        return "You are doing your best, and that is enough. Take it one step at a time."
+        return DEFAULT_AFFIRMATION
+
+
+async def request_affirmation(user_mood: MoodLevel, context: str = None) -> str:
+    """
+    Generate an affirmation, raising on failure (so callers can avoid caching fallbacks)
+    """
+    model = get_model()
+    response = await generate_content(model, _affirmation_prompt(user_mood, context))
+    return response.text.strip()
+
+
+async def stream_affirmation(user_mood: MoodLevel, context: str = None) -> AsyncIterator[str]:
+    """
+    Stream an affirmation's text as the model produces it (raises on failure)
+    """
+    model = get_model()
+    async for text in stream_content(model, _affirmation_prompt(user_mood, context)):
+        yield text
+
+
+def _affirmation_prompt(user_mood: MoodLevel, context: Optional[str]) -> str:
+    mood_context = {
+        MoodLevel.VERY_LOW: "The user is experiencing very low mood",
+        MoodLevel.LOW: "The user is experiencing low mood",
+        MoodLevel.NEUTRAL: "The user is in a neutral state",
+        MoodLevel.GOOD: "The user is in a good mood",
+        MoodLevel.VERY_GOOD: "The user is in a very good mood"
+    }
+    
+    return render_prompt(
+        "affirmation",
+        mood_context=mood_context.get(user_mood, "No specific context"),
+        context=context or "None"
+    )
 
 
-def suggest_activities(user_mood: MoodLevel, therapy_goals: List[str] = None) -> List[ActivitySuggestion]:
+async def suggest_activities(user_mood: MoodLevel, therapy_goals: List[str] = None) -> List[ActivitySuggestion]:
     """
     Suggest personalized daily activities based on mood and therapy goals
     """
     try:
-        # Use cheapest model: gemini-1.5-flash (has free tier, $0.075 per 1M input tokens)
-        # Alternative: gemini-2.0-flash-lite ($0.019 per 1M tokens) if available
-        model_name = settings.gemini_model or "gemini-1.5-flash"
-        # Ensure we're not using deprecated gemini-pro
-        if model_name == "gemini-pro":
-            model_name = "gemini-1.5-flash"
-            logger.warning("gemini-pro is deprecated, using gemini-1.5-flash instead")
-        model = genai.GenerativeModel(model_name)
-        
-        goals_text = ", ".join(therapy_goals) if therapy_goals else "general wellness"
-        
-        prompt = f"""
-        Suggest 3 personalized micro-activities for a therapy client.
-        
-        Mood: {user_mood.value}
-        Therapy goals: {goals_text}
-        
-        Each activity should be:
-        - Small and achievable (5-30 minutes)
-        - Therapeutic and supportive
-        - Appropriate for the current mood level
-        - Specific and actionable
-        
-        Return in JSON format:
-        {{
-            "activities": [
-                {{
-                    "title": "Activity name",
-                    "description": "Brief description",
-                    "duration_minutes": 10,
-                    "category": "mindfulness/exercise/reflection/connection"
-                }}
-            ]
-        }}
-        """
-        
-        response = model.generate_content(prompt)
-        
-        import json
-        import re
-        
-        json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
-        if json_match:
-            data = json.loads(json_match.group())
-            activities = []
-            for act in data.get("activities", []):
-                activities.append(ActivitySuggestion(
-                    title=act.get("title", "Activity"),
-                    description=act.get("description", ""),
-                    duration_minutes=act.get("duration_minutes", 10),
-                    category=act.get("category", "general")
-                ))
-            return activities
-        else:
-            # Return default activities
-            return get_default_activities(user_mood)
-            
+        return await request_activities(user_mood, therapy_goals)
     except Exception as e:
         logger.error(f"Error suggesting activities: {str(e)}")
         return get_default_activities(user_mood)
 
 
+async def request_activities(user_mood: MoodLevel, therapy_goals: List[str] = None) -> List[ActivitySuggestion]:
+    """
+    Generate activity suggestions, raising when the model gives no usable answer
+    """
+    model = get_model()
+    
+    goals_text = ", ".join(therapy_goals) if therapy_goals else "general wellness"
+    
+    prompt = render_prompt("activities", mood=user_mood.value, goals_text=goals_text)
+    
+    response = await generate_content(model, prompt)
+    
+    json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON found in activity suggestions")
+    data = json.loads(json_match.group())
+    activities = []
+    for act in data.get("activities", []):
+        activities.append(ActivitySuggestion(
+            title=act.get("title", "Activity"),
+            description=act.get("description", ""),
+            duration_minutes=act.get("duration_minutes", 10),
+            category=act.get("category", "general")
+        ))
+    if not activities:
+        raise ValueError("Empty activity suggestions")
+    return activities
+
+
 def get_default_activities(user_mood: MoodLevel) -> List[ActivitySuggestion]:
     """Default activities if AI generation fails"""
     defaults = {
@@ -0,0 +1,143 @@
+"""
+Micro-batching of mood analysis requests
+
+Analyses submitted within a short window are grouped (up to a maximum entry
+count and token budget) and sent to the model as a single structured prompt.
+Items the batch response does not cover are retried individually, so one bad
+item never fails the whole batch.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.models import MoodAnalysis
+from app.services.ai_scheduler import Priority, current_priority, priority_scope
+import logging
+
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[List[str]], Awaitable[List[Optional[MoodAnalysis]]]]
+SingleFn = Callable[[str], Awaitable[MoodAnalysis]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+class MicroBatcher:
+    """Collects analysis requests and flushes them by window, size or token budget"""
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        single_fn: SingleFn,
+        max_entries: int,
+        max_tokens: int,
+        window_seconds: float,
+    ):
+        self.batch_fn = batch_fn
+        self.single_fn = single_fn
+        self.max_entries = max_entries
+        self.max_tokens = max_tokens
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        # Highest priority (lowest value) among pending submitters
+        self._pending_priority = Priority.BACKGROUND
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "item_fallbacks": 0,
+            "batch_failures": 0,
+            "oversized": 0,
+        }
+
+    async def submit(self, content: str) -> MoodAnalysis:
+        """Queue ``content`` for the next batch and wait for its analysis"""
+        self._stats["submitted"] += 1
+        tokens = estimate_tokens(content)
+        if tokens >= self.max_tokens or self.max_entries <= 1:
+            # Too large to share a prompt; analyze on its own
+            self._stats["oversized"] += 1
+            return await self.single_fn(content)
+
+        if self._pending_tokens + tokens > self.max_tokens:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content, future))
+        self._pending_tokens += tokens
+        self._pending_priority = min(self._pending_priority, current_priority())
+
+        if len(self._pending) >= self.max_entries:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        priority, self._pending_priority = self._pending_priority, Priority.BACKGROUND
+        self._pending_tokens = 0
+        # A batch runs at the priority of its most urgent submitter
+        with priority_scope(priority):
+            task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        self._stats["batches"] += 1
+        self._stats["batched_items"] += len(batch)
+        contents = [content for content, _ in batch]
+        try:
+            if len(batch) == 1:
+                results: List[Optional[MoodAnalysis]] = [await self.single_fn(contents[0])]
+            else:
+                results = await self.batch_fn(contents)
+        except Exception as e:
+            self._stats["batch_failures"] += 1
+            logger.error(f"Batched mood analysis failed ({len(batch)} entries): {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        results = list(results) + [None] * (len(batch) - len(results))
+        retries = []
+        for (content, future), result in zip(batch, results):
+            if result is not None:
+                if not future.done():
+                    future.set_result(result)
+            else:
+                retries.append(self._retry_single(content, future))
+        if retries:
+            self._stats["item_fallbacks"] += len(retries)
+            await asyncio.gather(*retries)
+
+    async def _retry_single(self, content: str, future: asyncio.Future):
+        try:
+            result = await self.single_fn(content)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "avg_batch_size": round(self._stats["batched_items"] / batches, 2) if batches else 0.0,
+        }
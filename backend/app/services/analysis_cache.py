@@ -0,0 +1,177 @@
+"""
+Content-addressed cache for mood analysis results
+
+Results are keyed by a hash of the normalized journal text, the model name
+and the prompt version, so changing either invalidates old entries. Lookups
+go to a bounded in-memory LRU first, then to the ``mood_analysis_cache``
+table; concurrent misses for the same key share one model call.
+
+Cached analyses are derived from journal text, so they do not outlive it:
+rows are purged after ``analysis_cache_persist_days`` and an entry's rows
+are dropped when it is deleted or rewritten.
+"""
+
+import hashlib
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+from app.database import get_supabase
+from app.models import MoodAnalysis
+from app.utils.cache import TTLCache, SingleFlight
+import logging
+
+logger = logging.getLogger(__name__)
+
+_memory = TTLCache(
+    maxsize=settings.analysis_cache_size,
+    ttl=settings.analysis_cache_ttl_seconds,
+)
+_flights = SingleFlight()
+
+_stats: Dict[str, int] = {
+    "persistent_hits": 0,
+    "persistent_misses": 0,
+    "computed": 0,
+    "forgotten": 0,
+    "purged": 0,
+}
+
+
+def normalize_content(content: str) -> str:
+    """Normalize text so trivially different copies share a cache key"""
+    return " ".join(unicodedata.normalize("NFC", content).split())
+
+
+def content_hash(content: str, model_name: str, prompt_version: str) -> str:
+    """Cache key for an analysis of ``content`` by a given model and prompt"""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_version, normalize_content(content)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def _load_persistent(key: str) -> Optional[MoodAnalysis]:
+    if not settings.analysis_cache_persist:
+        return None
+    try:
+        supabase = get_supabase()
+        cutoff = (datetime.utcnow() - timedelta(days=settings.analysis_cache_persist_days)).isoformat()
+        result = await supabase.table("mood_analysis_cache")\
+            .select("analysis")\
+            .eq("content_hash", key)\
+            .gte("created_at", cutoff)\
+            .limit(1)\
+            .execute()
+        if result.data:
+            _stats["persistent_hits"] += 1
+            return MoodAnalysis(**result.data[0]["analysis"])
+    except Exception as e:
+        logger.error(f"Failed to read mood analysis cache: {str(e)}")
+    _stats["persistent_misses"] += 1
+    return None
+
+
+async def _store_persistent(key: str, model_name: str, prompt_version: str, analysis: MoodAnalysis):
+    if not settings.analysis_cache_persist:
+        return
+    try:
+        supabase = get_supabase()
+        await supabase.table("mood_analysis_cache").upsert({
+            "content_hash": key,
+            "model": model_name,
+            "prompt_version": prompt_version,
+            "analysis": analysis.model_dump(mode="json"),
+            "created_at": datetime.utcnow().isoformat()
+        }, on_conflict="content_hash").execute()
+    except Exception as e:
+        logger.error(f"Failed to write mood analysis cache: {str(e)}")
+
+
+async def get_cached_analysis(content: str, model_name: str, prompt_version: str) -> Optional[MoodAnalysis]:
+    """Cached analysis for ``content`` (memory, then the persistent table), if any"""
+    key = content_hash(content, model_name, prompt_version)
+    analysis = _memory.get(key)
+    if analysis is None:
+        analysis = await _load_persistent(key)
+        if analysis is not None:
+            _memory.set(key, analysis)
+    return analysis
+
+
+async def store_analysis(content: str, model_name: str, prompt_version: str, analysis: MoodAnalysis):
+    """Cache an analysis computed outside ``get_or_compute`` (e.g. a streamed one)"""
+    key = content_hash(content, model_name, prompt_version)
+    _stats["computed"] += 1
+    _memory.set(key, analysis)
+    await _store_persistent(key, model_name, prompt_version, analysis)
+
+
+async def get_or_compute(
+    content: str,
+    model_name: str,
+    prompt_version: str,
+    compute: Callable[[], Awaitable[MoodAnalysis]],
+) -> MoodAnalysis:
+    """
+    Return a cached analysis for ``content`` or compute and store it.
+
+    Exceptions from ``compute`` propagate and are not cached.
+    """
+    key = content_hash(content, model_name, prompt_version)
+    cached = _memory.get(key)
+    if cached is not None:
+        return cached
+
+    async def load_or_compute() -> MoodAnalysis:
+        analysis = await _load_persistent(key)
+        if analysis is None:
+            analysis = await compute()
+            _stats["computed"] += 1
+            await _store_persistent(key, model_name, prompt_version, analysis)
+        _memory.set(key, analysis)
+        return analysis
+
+    return await _flights.do(key, load_or_compute)
+
+
+async def forget_analyses(contents: List[str], model_name: str, prompt_version: str):
+    """Drop cached analyses of ``contents`` from memory and the persistent table"""
+    keys = [content_hash(content, model_name, prompt_version) for content in contents]
+    for key in keys:
+        _memory.invalidate(key)
+    if not settings.analysis_cache_persist or not keys:
+        return
+    try:
+        supabase = get_supabase()
+        await supabase.table("mood_analysis_cache")\
+            .delete()\
+            .in_("content_hash", keys)\
+            .execute()
+        _stats["forgotten"] += len(keys)
+    except Exception as e:
+        logger.error(f"Failed to delete cached mood analyses: {str(e)}")
+
+
+async def purge_expired_analyses() -> int:
+    """Delete persistent cache rows older than ``analysis_cache_persist_days``; returns the count"""
+    supabase = get_supabase()
+    cutoff = (datetime.utcnow() - timedelta(days=settings.analysis_cache_persist_days)).isoformat()
+    result = await supabase.table("mood_analysis_cache")\
+        .delete()\
+        .lt("created_at", cutoff)\
+        .execute()
+    purged = len(result.data or [])
+    _stats["purged"] += purged
+    return purged
+
+
+def get_cache_stats() -> Dict:
+    """Snapshot of analysis cache counters"""
+    return {
+        "memory": _memory.stats(),
+        **_stats,
+        "coalesced": _flights.coalesced,
+        "in_flight": len(_flights),
+    }
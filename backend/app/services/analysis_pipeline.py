@@ -0,0 +1,215 @@
+"""
+Background pipeline for journal mood analysis
+
+Entries are saved with ``analysis_status = 'pending'`` and queued here; worker
+tasks run the model call and fill in ``ai_analysis`` (and ``mood`` when the
+client did not pick one) once it completes. Rows left pending by a restart are
+re-queued on startup.
+
+Results are only written if the row still holds the content that was
+analyzed, so a slow analysis never overwrites the result for a newer edit.
+
+Workers run at background priority, so interactive model calls are admitted
+ahead of them; a job that runs out of quota, or meets an open circuit
+breaker, is retried later rather than marked failed.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import get_supabase
+from app.services.ai_scheduler import Priority, priority_scope, is_quota_error
+from app.services.ai_service import request_mood_analysis
+from app.services.resilience import AICircuitOpenError
+from app.services.dashboard_service import invalidate_dashboard
+from app.services.reanalysis import analysis_fields, entry_content_hash
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AnalysisJob:
+    entry_id: str
+    content: str
+    fill_mood: bool
+    deferrals: int = 0
+
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+# Delayed jobs by entry id; a newer edit replaces the pending one
+_delayed: Dict[str, asyncio.TimerHandle] = {}
+
+_stats: Dict[str, int] = {
+    "enqueued": 0,
+    "completed": 0,
+    "failed": 0,
+    "deferred": 0,
+    "dropped": 0,
+    "coalesced": 0,
+    "superseded": 0,
+}
+
+_MAX_DEFERRALS = 3
+
+
+def enqueue_analysis(entry_id: str, content: str, fill_mood: bool = True, delay: float = 0.0) -> bool:
+    """
+    Queue an entry for background analysis.
+
+    With ``delay`` the job is queued after that many seconds, and any job
+    still waiting for the same entry is dropped in its favour, so a burst of
+    edits is analyzed once. Returns False when the pipeline is not running or
+    is full; the row then stays pending and is picked up again on the next
+    startup.
+    """
+    if _queue is None:
+        _stats["dropped"] += 1
+        return False
+    earlier = _delayed.pop(entry_id, None)
+    if earlier is not None:
+        earlier.cancel()
+        _stats["coalesced"] += 1
+
+    job = AnalysisJob(entry_id=entry_id, content=content, fill_mood=fill_mood)
+    if delay > 0:
+        _delayed[entry_id] = asyncio.get_running_loop().call_later(delay, _enqueue_delayed, job)
+        return True
+    return _put(job)
+
+
+def _enqueue_delayed(job: AnalysisJob):
+    _delayed.pop(job.entry_id, None)
+    _put(job)
+
+
+def _put(job: AnalysisJob) -> bool:
+    if _queue is None:
+        return False
+    try:
+        _queue.put_nowait(job)
+    except asyncio.QueueFull:
+        _stats["dropped"] += 1
+        logger.warning(f"Analysis queue full, leaving entry {job.entry_id} pending")
+        return False
+    _stats["enqueued"] += 1
+    return True
+
+
+def _should_defer(error: Exception) -> bool:
+    return is_quota_error(error) or isinstance(error, (asyncio.TimeoutError, AICircuitOpenError))
+
+
+def _defer(job: AnalysisJob):
+    """Re-queue a job once quota or the provider has had time to recover"""
+    _stats["deferred"] += 1
+    job.deferrals += 1
+    delay = settings.ai_throttle_backoff_seconds * job.deferrals
+    logger.info(f"Deferring analysis of entry {job.entry_id} for {delay}s")
+    asyncio.get_running_loop().call_later(delay, _put, job)
+
+
+async def _process(job: AnalysisJob):
+    supabase = get_supabase()
+    content_hash = entry_content_hash(job.content)
+    try:
+        analysis = await request_mood_analysis(job.content)
+    except Exception as e:
+        if _should_defer(e) and job.deferrals < _MAX_DEFERRALS:
+            _defer(job)
+            return
+        _stats["failed"] += 1
+        logger.error(f"Background analysis failed for entry {job.entry_id}: {str(e)}")
+        await supabase.table("journals")\
+            .update({"analysis_status": "failed"})\
+            .eq("id", job.entry_id)\
+            .eq("content_hash", content_hash)\
+            .execute()
+        return
+
+    update_data = analysis_fields(analysis, job.content)
+    if job.fill_mood:
+        update_data["mood"] = analysis.mood.value
+
+    result = await supabase.table("journals")\
+        .update(update_data)\
+        .eq("id", job.entry_id)\
+        .eq("content_hash", content_hash)\
+        .execute()
+    if not result.data:
+        # Edited (or deleted) while this job ran; a newer job covers it
+        _stats["superseded"] += 1
+        return
+    _stats["completed"] += 1
+    invalidate_dashboard()
+
+
+async def _worker():
+    with priority_scope(Priority.BACKGROUND):
+        await _work()
+
+
+async def _work():
+    while True:
+        job = await _queue.get()
+        try:
+            await _process(job)
+        except Exception as e:
+            logger.error(f"Error storing analysis for entry {job.entry_id}: {str(e)}")
+        finally:
+            _queue.task_done()
+
+
+async def recover_pending_analyses():
+    """Re-queue entries left pending by a previous process"""
+    try:
+        supabase = get_supabase()
+        result = await supabase.table("journals")\
+            .select("id, content, mood")\
+            .eq("analysis_status", "pending")\
+            .order("created_at")\
+            .limit(settings.analysis_queue_size)\
+            .execute()
+        for row in result.data or []:
+            enqueue_analysis(row["id"], row["content"], fill_mood=not row.get("mood"))
+        if result.data:
+            logger.info(f"Re-queued {len(result.data)} pending journal analyses")
+    except Exception as e:
+        logger.error(f"Failed to recover pending analyses: {str(e)}")
+
+
+async def start_analysis_pipeline():
+    """Start background analysis workers"""
+    global _queue
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue(maxsize=settings.analysis_queue_size)
+    for i in range(settings.analysis_workers):
+        _workers.append(asyncio.create_task(_worker(), name=f"analysis-worker-{i}"))
+    await recover_pending_analyses()
+
+
+async def stop_analysis_pipeline():
+    """Stop workers; unfinished entries stay pending for the next startup"""
+    global _queue
+    # Delayed jobs' rows stay pending and are recovered on the next startup
+    for handle in _delayed.values():
+        handle.cancel()
+    _delayed.clear()
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+
+
+def get_pipeline_stats() -> Dict[str, int]:
+    """Snapshot of background analysis counters"""
+    return {
+        **_stats,
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "delayed": len(_delayed),
+        "workers": len(_workers),
+    }
@@ -0,0 +1,141 @@
+"""
+Map-reduce analysis of long journal entries
+
+Entries above ``analysis_single_pass_tokens`` (long voice transcripts, mostly)
+are split on sentence and paragraph boundaries into chunks of about
+``analysis_chunk_tokens``; the chunks are analyzed like ordinary entries
+(concurrently, cached and micro-batched) and their analyses are combined
+locally into one MoodAnalysis. At most ``analysis_max_entry_tokens`` worth of
+chunks, spread evenly across the entry, are sent to the model, which bounds
+the cost and latency of any single entry.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+from app.config import settings
+from app.models import MoodAnalysis, MoodLevel
+from app.services.analysis_batcher import estimate_tokens
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+_MOOD_ORDER = [MoodLevel.VERY_LOW, MoodLevel.LOW, MoodLevel.NEUTRAL, MoodLevel.GOOD, MoodLevel.VERY_GOOD]
+
+_stats: Dict[str, int] = {
+    "chunked_entries": 0,
+    "chunks_analyzed": 0,
+    "truncated_entries": 0,
+    "failed_chunks": 0,
+}
+
+
+def chunk_token_budget() -> int:
+    """Target chunk size; never above the single-pass limit, or chunks would be split again"""
+    return max(1, min(settings.analysis_chunk_tokens, settings.analysis_single_pass_tokens))
+
+
+def needs_chunking(text: str) -> bool:
+    return estimate_tokens(text) > settings.analysis_single_pass_tokens
+
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    chunks, current = [], []
+    size = 0
+    for piece in pieces:
+        if current and size + len(piece) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def split_chunks(text: str, max_tokens: int) -> List[str]:
+    """Greedily pack sentences into chunks of at most ``max_tokens`` (estimated)"""
+    # Same ~4 characters per token as estimate_tokens
+    max_chars = max_tokens * 4
+    pieces: List[str] = []
+    for sentence in _SENTENCE_BREAK.split(text.strip()):
+        sentence = sentence.strip()
+        if len(sentence) > max_chars:
+            # Transcripts without punctuation: fall back to word windows
+            pieces.extend(_pack(sentence.split(), max_chars))
+        elif sentence:
+            pieces.append(sentence)
+    return _pack(pieces, max_chars)
+
+
+def select_chunks(chunks: List[str], max_chunks: int) -> List[str]:
+    """Keep at most ``max_chunks``, evenly spaced and always including the first and last"""
+    if len(chunks) <= max_chunks:
+        return chunks
+    _stats["truncated_entries"] += 1
+    if max_chunks == 1:
+        return chunks[:1]
+    step = (len(chunks) - 1) / (max_chunks - 1)
+    return [chunks[round(i * step)] for i in range(max_chunks)]
+
+
+def plan_chunks(text: str) -> List[str]:
+    """Chunks of ``text`` to analyze, within the per-entry token ceiling"""
+    budget = chunk_token_budget()
+    max_chunks = max(1, settings.analysis_max_entry_tokens // budget)
+    chunks = select_chunks(split_chunks(text, budget), max_chunks)
+    _stats["chunked_entries"] += 1
+    _stats["chunks_analyzed"] += len(chunks)
+    return chunks
+
+
+def record_failed_chunks(count: int):
+    _stats["failed_chunks"] += count
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE_BREAK.split(text.strip(), maxsplit=1)[0].strip()
+
+
+def reduce_analyses(analyses: Sequence[MoodAnalysis], sizes: Sequence[int]) -> MoodAnalysis:
+    """
+    Combine per-chunk analyses into one, weighting each chunk by its length
+    and the model's confidence in it.
+    """
+    weights = [size * max(analysis.confidence, 0.1) for analysis, size in zip(analyses, sizes)]
+    total = sum(weights)
+
+    sentiment = sum(w * a.sentiment for w, a in zip(weights, analyses)) / total
+    mood_rank = sum(w * _MOOD_ORDER.index(a.mood) for w, a in zip(weights, analyses)) / total
+    confidence = sum(w * a.confidence for w, a in zip(weights, analyses)) / total
+
+    keyword_counts = Counter()
+    for analysis in analyses:
+        keyword_counts.update({k.lower() for k in analysis.keywords if k})
+    keywords = [keyword for keyword, _ in keyword_counts.most_common(10)]
+
+    # Round-robin so every part of the entry contributes a suggestion
+    recommendations: List[str] = []
+    for i in range(max((len(a.recommendations) for a in analyses), default=0)):
+        for analysis in analyses:
+            if i < len(analysis.recommendations) and analysis.recommendations[i] not in recommendations:
+                recommendations.append(analysis.recommendations[i])
+    # Lead sentence of each chunk's summary, in entry order
+    summary = " ".join(dict.fromkeys(s for s in (_first_sentence(a.summary) for a in analyses) if s))
+
+    return MoodAnalysis(
+        mood=_MOOD_ORDER[round(mood_rank)],
+        sentiment=round(sentiment, 3),
+        summary=summary[:1000],
+        keywords=keywords,
+        recommendations=recommendations[:3],
+        confidence=round(confidence, 3),
+    )
+
+
+def get_chunking_stats() -> Dict:
+    """Snapshot of long-entry analysis counters"""
+    return {
+        **_stats,
+        "single_pass_tokens": settings.analysis_single_pass_tokens,
+        "max_entry_tokens": settings.analysis_max_entry_tokens,
+    }
@@ -0,0 +1,76 @@
+"""
+Therapist dashboard snapshot with a short-lived cache
+
+Counters come from the daily rollup tables (see get_dashboard_stats in
+schema.sql). The assembled snapshot is cached for a few seconds and dropped
+whenever a journal entry or client account changes.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict
+from app.config import settings
+from app.database import get_supabase
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.projection import JOURNAL_COLUMNS
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_KEY = "dashboard"
+
+_snapshots = TTLCache(maxsize=1, ttl=settings.dashboard_cache_ttl_seconds)
+_flights = SingleFlight()
+_invalidations = 0
+
+
+def invalidate_dashboard():
+    """Drop the cached snapshot after journal or client changes"""
+    global _invalidations
+    _invalidations += 1
+    _snapshots.invalidate(_SNAPSHOT_KEY)
+
+
+async def _load_snapshot() -> Dict:
+    supabase = get_supabase()
+    now = datetime.utcnow()
+
+    stats_result = await supabase.rpc("get_dashboard_stats", {
+        "active_since": (now - timedelta(days=30)).isoformat(),
+        "trend_since": (now - timedelta(days=7)).isoformat()
+    }).execute()
+    stats = stats_result.data or {}
+
+    # Get recent entries (last 10)
+    # Every projectable column, so any view can be served from the cached rows
+    recent_entries_result = await supabase.table("journals")\
+        .select(", ".join(JOURNAL_COLUMNS.values()))\
+        .order("created_at", desc=True)\
+        .limit(10)\
+        .execute()
+
+    return {
+        "total_clients": stats.get("total_clients", 0),
+        "active_clients": stats.get("active_clients", 0),
+        "mood_trends": stats.get("mood_trends") or {},
+        "daily_active_users": stats.get("daily_active_users") or {},
+        "recent_entries": recent_entries_result.data or [],
+    }
+
+
+async def get_dashboard_snapshot() -> Dict:
+    """Dashboard counters and recent entries, served from cache when fresh"""
+    snapshot = _snapshots.get(_SNAPSHOT_KEY)
+    if snapshot is not None:
+        return snapshot
+
+    generation = _invalidations
+    snapshot = await _flights.do(_SNAPSHOT_KEY, _load_snapshot)
+    # Don't cache a snapshot that an invalidation raced with
+    if generation == _invalidations:
+        _snapshots.set(_SNAPSHOT_KEY, snapshot)
+    return snapshot
+
+
+def get_dashboard_cache_stats() -> Dict:
+    """Snapshot of dashboard cache counters"""
+    return {**_snapshots.stats(), "invalidations": _invalidations}
@@ -0,0 +1,258 @@
+"""
+Background pipeline computing journal entry embeddings
+
+Created and edited entries are queued here after the response is sent. A
+single worker waits ``embedding_batch_wait_ms`` for more entries, embeds up
+to ``embedding_batch_size`` of them in one model request, upserts the
+vectors into journal_embeddings and updates any loaded client index. An
+entry queued again before its batch starts is embedded once, with its latest
+content. Entries that miss the pipeline (restart, full queue, provider
+outage) are embedded by ``python -m app.maintenance backfill-embeddings``.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import get_supabase
+from app.services.ai_scheduler import Priority, priority_scope
+from app.services.embeddings import get_embedder, embed_texts, encode_vector
+from app.services.reanalysis import entry_content_hash
+from app.services.semantic_index import index_entry, forget_entry
+from app.utils.pagination import iter_keyset
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingJob:
+    entry_id: str
+    user_id: str
+    content: str
+    created_at: str
+    deferrals: int = 0
+
+
+# Waiting jobs by entry id, oldest first; a newer edit replaces the waiting job
+_pending: Dict[str, EmbeddingJob] = {}
+# Most recent job per entry until it is stored, so a retried job never
+# overwrites the vector of a later edit
+_latest: Dict[str, EmbeddingJob] = {}
+_wakeup: Optional[asyncio.Event] = None
+_worker: Optional[asyncio.Task] = None
+
+_stats: Dict[str, int] = {
+    "enqueued": 0,
+    "coalesced": 0,
+    "dropped": 0,
+    "batches": 0,
+    "embedded": 0,
+    "deferred": 0,
+    "failed": 0,
+}
+
+_MAX_DEFERRALS = 3
+
+
+def enqueue_embedding(entry_id: str, user_id: str, content: str, created_at: str) -> bool:
+    """
+    Queue an entry for embedding.
+
+    Returns False when the pipeline is not running or is full; the entry is
+    then picked up by the next backfill.
+    """
+    if _wakeup is None:
+        _stats["dropped"] += 1
+        return False
+    if entry_id in _pending:
+        _stats["coalesced"] += 1
+    elif len(_pending) >= settings.embedding_queue_size:
+        _stats["dropped"] += 1
+        logger.warning(f"Embedding queue full, skipping entry {entry_id}")
+        return False
+    job = EmbeddingJob(entry_id, user_id, content, created_at)
+    _pending[entry_id] = _latest[entry_id] = job
+    _stats["enqueued"] += 1
+    _wakeup.set()
+    return True
+
+
+def forget_embedding(entry_id: str, user_id: str):
+    """A deleted entry: drop its waiting job and its vector from the loaded index"""
+    _pending.pop(entry_id, None)
+    _latest.pop(entry_id, None)
+    forget_entry(user_id, entry_id)
+
+
+async def _upsert(rows: List[Dict]):
+    supabase = get_supabase()
+    try:
+        await supabase.table("journal_embeddings").upsert(rows).execute()
+    except Exception:
+        if len(rows) == 1:
+            raise
+        # Usually an entry deleted while its batch ran; store the rest one by one
+        for row in rows:
+            try:
+                await supabase.table("journal_embeddings").upsert(row).execute()
+            except Exception as e:
+                _stats["failed"] += 1
+                logger.warning(f"Could not store embedding for entry {row['id']}: {str(e)}")
+
+
+async def store_embeddings(jobs: List[EmbeddingJob]) -> int:
+    """Embed ``jobs`` in one model request and store the vectors; returns the count"""
+    vectors = await embed_texts([job.content for job in jobs])
+    model = get_embedder().name
+    now = datetime.utcnow().isoformat()
+    await _upsert([
+        {
+            "id": job.entry_id,
+            "user_id": job.user_id,
+            "created_at": job.created_at,
+            "model": model,
+            "content_hash": entry_content_hash(job.content),
+            "embedding": encode_vector(vector),
+            "updated_at": now,
+        }
+        for job, vector in zip(jobs, vectors)
+    ])
+    for job, vector in zip(jobs, vectors):
+        index_entry(job.user_id, job.entry_id, vector)
+        if _latest.get(job.entry_id) is job:
+            del _latest[job.entry_id]
+    return len(jobs)
+
+
+def _take_batch() -> List[EmbeddingJob]:
+    batch = []
+    for entry_id in list(_pending)[:settings.embedding_batch_size]:
+        batch.append(_pending.pop(entry_id))
+    return batch
+
+
+def _defer(jobs: List[EmbeddingJob]):
+    """Put a failed batch back after a backoff, unless newer edits replaced it"""
+    def requeue():
+        for job in jobs:
+            if _latest.get(job.entry_id) is job:
+                _pending.setdefault(job.entry_id, job)
+        if _wakeup is not None:
+            _wakeup.set()
+
+    _stats["deferred"] += len(jobs)
+    delay = settings.ai_throttle_backoff_seconds * max(job.deferrals for job in jobs)
+    asyncio.get_running_loop().call_later(delay, requeue)
+
+
+async def _process(batch: List[EmbeddingJob]):
+    try:
+        _stats["embedded"] += await store_embeddings(batch)
+        _stats["batches"] += 1
+    except Exception as e:
+        logger.error(f"Embedding batch of {len(batch)} entries failed: {str(e)}")
+        retry = []
+        for job in batch:
+            if job.deferrals < _MAX_DEFERRALS:
+                job.deferrals += 1
+                retry.append(job)
+            else:
+                _stats["failed"] += 1
+                if _latest.get(job.entry_id) is job:
+                    del _latest[job.entry_id]
+        if retry:
+            _defer(retry)
+
+
+async def _background_work():
+    with priority_scope(Priority.BACKGROUND):
+        await _work()
+
+
+async def _work():
+    while True:
+        await _wakeup.wait()
+        # Let a burst of writes gather into one request
+        await asyncio.sleep(settings.embedding_batch_wait_ms / 1000)
+        while _pending:
+            await _process(_take_batch())
+        _wakeup.clear()
+
+
+async def backfill_embeddings() -> int:
+    """Embed every entry without a current embedding (maintenance command)"""
+    with priority_scope(Priority.BACKGROUND):
+        return await _backfill()
+
+
+async def _backfill() -> int:
+    supabase = get_supabase()
+    model = get_embedder().name
+    total = 0
+    page: List[Dict] = []
+    rows = iter_keyset(
+        lambda: supabase.table("journals").select("id, user_id, content, content_hash, created_at"),
+        settings.export_batch_size
+    )
+    async for row in rows:
+        page.append(row)
+        if len(page) == settings.export_batch_size:
+            total += await _backfill_page(page, model)
+            page = []
+    if page:
+        total += await _backfill_page(page, model)
+    return total
+
+
+async def _backfill_page(rows: List[Dict], model: str) -> int:
+    hashes = {row["id"]: row["content_hash"] for row in rows}
+    result = await get_supabase().table("journal_embeddings")\
+        .select("id, model, content_hash")\
+        .in_("id", list(hashes))\
+        .execute()
+    current = {
+        stored["id"]
+        for stored in result.data or []
+        if stored["model"] == model and stored["content_hash"] == hashes.get(stored["id"])
+    }
+    jobs = [
+        EmbeddingJob(row["id"], row["user_id"], row["content"], row["created_at"])
+        for row in rows
+        if row["id"] not in current and row.get("content")
+    ]
+    stored = 0
+    for start in range(0, len(jobs), settings.embedding_batch_size):
+        stored += await store_embeddings(jobs[start:start + settings.embedding_batch_size])
+    return stored
+
+
+async def start_embedding_pipeline():
+    """Start the background embedding worker"""
+    global _wakeup, _worker
+    if _worker is not None:
+        return
+    _wakeup = asyncio.Event()
+    _worker = asyncio.create_task(_background_work(), name="embedding-worker")
+
+
+async def stop_embedding_pipeline():
+    """Stop the worker; waiting entries are left for the next backfill"""
+    global _wakeup, _worker
+    if _worker is not None:
+        _worker.cancel()
+        await asyncio.gather(_worker, return_exceptions=True)
+    _worker = None
+    _wakeup = None
+    _pending.clear()
+    _latest.clear()
+
+
+def get_embedding_pipeline_stats() -> Dict[str, int]:
+    """Snapshot of background embedding counters"""
+    return {
+        **_stats,
+        "pending": len(_pending),
+        "running": _worker is not None,
+    }
@@ -0,0 +1,190 @@
+"""
+Text embedding models for semantic search
+
+Two interchangeable models produce L2-normalized float32 vectors:
+``GeminiEmbedder`` calls the Gemini embedding API (a batch of texts per
+request, admitted by the quota scheduler and sent through the circuit
+breaker and retry policy in resilience), and
+``HashingEmbedder`` is a deterministic local stand-in (feature-hashed word
+unigrams and bigrams) that needs no API key, for tests and offline
+development. ``embedding_provider`` picks one; the model's ``name`` is
+stored with every vector so vectors from different models are never mixed.
+
+Vectors are stored as base64-encoded float16 (half the size of float32, and
+well within the precision cosine similarity needs).
+"""
+
+import asyncio
+import base64
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import google.generativeai as genai
+from app.config import settings
+from app.services.ai_scheduler import scheduler, current_priority, is_quota_error
+from app.services.analysis_batcher import estimate_tokens
+from app.services.resilience import call_resilient
+from app.utils.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Gemini task types: entries are embedded as documents, search text as queries
+DOCUMENT = "retrieval_document"
+QUERY = "retrieval_query"
+
+_stats: Dict[str, int] = {
+    "requests": 0,
+    "texts_embedded": 0,
+    "failed_requests": 0,
+}
+
+_query_vectors = TTLCache(maxsize=256, ttl=600)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def encode_vector(vector: np.ndarray) -> str:
+    """Compact text form of a vector for the journal_embeddings table"""
+    return base64.b64encode(vector.astype("<f2").tobytes()).decode("ascii")
+
+
+def decode_vector(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<f2").astype(np.float32)
+
+
+def prepare_text(content: str) -> str:
+    """Text sent to the model for an entry (long entries are cut to ``embedding_max_chars``)"""
+    return content.strip()[:settings.embedding_max_chars]
+
+
+class GeminiEmbedder:
+    """Gemini embedding API; one request per batch of texts"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.name = f"gemini:{model}"
+
+    async def _attempt(self, texts: List[str], task_type: str, deadline: float):
+        loop = asyncio.get_running_loop()
+        # Embedding requests count against the same Gemini quota as model calls;
+        # only the input is billed, so the estimate never needs settling
+        await scheduler.admit(sum(estimate_tokens(text) for text in texts), current_priority(), deadline)
+        try:
+            # The SDK call is blocking; run it on a worker thread
+            return await asyncio.wait_for(
+                asyncio.to_thread(genai.embed_content, model=self.model, content=texts, task_type=task_type),
+                max(deadline - loop.time(), 0)
+            )
+        except Exception as e:
+            if is_quota_error(e):
+                scheduler.report_throttled()
+            raise
+
+    async def embed(self, texts: Sequence[str], task_type: str) -> np.ndarray:
+        texts = list(texts)
+        deadline = asyncio.get_running_loop().time() + settings.embedding_timeout_seconds
+        result = await call_resilient(lambda: self._attempt(texts, task_type, deadline), deadline)
+        return normalize(np.asarray(result["embedding"], dtype=np.float32))
+
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_SUFFIXES = ("ingly", "edly", "ing", "ed", "ly", "es", "s")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "been", "but", "by", "for", "from", "had",
+    "has", "have", "he", "her", "him", "his", "i", "i'm", "in", "is", "it", "it's", "me",
+    "my", "of", "on", "or", "our", "she", "so", "that", "the", "their", "them", "then",
+    "there", "they", "this", "to", "too", "us", "was", "we", "were", "with", "you", "your",
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dimensions: int) -> int:
+    """Signed bucket of a feature: index + 1, negated for half the features"""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    index = digest % dimensions + 1
+    return index if digest >> 63 else -index
+
+
+class HashingEmbedder:
+    """Deterministic local model: hashed word unigrams and bigrams"""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.name = f"local-hash:{dimensions}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        words = [_stem(w) for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        weights = [1.0] * len(words) + [0.5] * (len(features) - len(words))
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if features:
+            buckets = np.fromiter((_bucket(f, self.dimensions) for f in features), dtype=np.int64, count=len(features))
+            np.add.at(vector, np.abs(buckets) - 1, np.sign(buckets) * np.asarray(weights, dtype=np.float32))
+            # Damp repeated words
+            vector = np.sign(vector) * np.log1p(np.abs(vector))
+        return vector
+
+    async def embed(self, texts: Sequence[str], task_type: str) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return normalize(np.stack([self._vector(text) for text in texts]))
+
+
+_embedder = None
+
+
+def get_embedder():
+    """The configured embedding model (built once)"""
+    global _embedder
+    if _embedder is None:
+        if settings.embedding_provider == "local":
+            _embedder = HashingEmbedder(settings.local_embedding_dimensions)
+        else:
+            _embedder = GeminiEmbedder(settings.embedding_model)
+    return _embedder
+
+
+async def embed_texts(texts: Sequence[str], task_type: str = DOCUMENT) -> np.ndarray:
+    """Embed ``texts`` in one request; returns one unit-length row per text"""
+    embedder = get_embedder()
+    _stats["requests"] += 1
+    try:
+        vectors = await embedder.embed([prepare_text(text) for text in texts], task_type)
+    except Exception:
+        _stats["failed_requests"] += 1
+        raise
+    _stats["texts_embedded"] += len(texts)
+    return vectors
+
+
+async def embed_query(text: str) -> np.ndarray:
+    """Embedding of a search query (recent queries are cached)"""
+    key = (get_embedder().name, text)
+    vector: Optional[np.ndarray] = _query_vectors.get(key)
+    if vector is None:
+        vector = (await embed_texts([text], QUERY))[0]
+        _query_vectors.set(key, vector)
+    return vector
+
+
+def get_embedding_stats() -> Dict:
+    """Snapshot of embedding model counters"""
+    return {
+        **_stats,
+        "model": get_embedder().name,
+        "query_cache": _query_vectors.stats(),
+    }
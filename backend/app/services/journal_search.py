@@ -0,0 +1,124 @@
+"""
+Full-text search over journal entries
+
+Matching, ranking, filtering and snippet highlighting all happen in Postgres
+(the ``search_journals`` function in schema.sql) against the generated
+``search_vector`` column and its GIN indexes, so a search costs one index
+scan however many entries a client has. Queries use web-search syntax
+("quoted phrases", OR, -excluded). Results are ordered by relevance (or
+newest first with ``sort=recent``) and paged with keyset cursors on
+(rank, created_at, id); only the rows of the returned page get a headline.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from app.config import settings
+from app.database import get_supabase
+from app.models import MoodLevel
+from app.utils.pagination import decode_cursor_values, split_page
+import logging
+
+logger = logging.getLogger(__name__)
+
+SORT_ORDERS = ("rank", "recent")
+
+# Sort key of search results, most relevant first
+_SEARCH_KEYSET = ("rank", "created_at", "id")
+
+_stats: Dict[str, float] = {
+    "searches": 0,
+    "slow_searches": 0,
+    "total_ms": 0.0,
+}
+
+
+def parse_tags(tags: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated tag filter; entries must carry every listed tag"""
+    if not tags:
+        return None
+    parsed = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    return parsed or None
+
+
+def _validate(query: str, mood: Optional[str], sort: str) -> str:
+    query = (query or "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query is required")
+    if len(query) > settings.search_max_query_length:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search query must be at most {settings.search_max_query_length} characters"
+        )
+    if sort not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_ORDERS)}")
+    if mood is not None and mood not in {level.value for level in MoodLevel}:
+        raise HTTPException(status_code=400, detail="Invalid mood filter")
+    return query
+
+
+def _cursor_params(cursor: Optional[str]) -> Dict:
+    if not cursor:
+        return {}
+    rank, created_at, row_id = decode_cursor_values(cursor, len(_SEARCH_KEYSET))
+    if not isinstance(rank, (int, float)) or not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "p_after_rank": rank,
+        "p_after_created_at": created_at,
+        "p_after_id": row_id,
+    }
+
+
+async def search_journals(
+    query: str,
+    limit: int,
+    *,
+    user_id: Optional[str] = None,
+    mood: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sort: str = "rank",
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    One page of entries matching ``query``, with ``rank`` and a highlighted
+    ``headline`` per row; returns the page and its next-cursor headers.
+    """
+    query = _validate(query, mood, sort)
+    params = {
+        "p_query": query,
+        "p_user_id": user_id,
+        "p_mood": mood,
+        "p_tags": tags,
+        "p_from": date_from.isoformat() if date_from else None,
+        "p_to": date_to.isoformat() if date_to else None,
+        "p_sort": sort,
+        "p_limit": limit + 1,
+        **_cursor_params(cursor),
+    }
+
+    started = time.perf_counter()
+    result = await get_supabase().rpc("search_journals", params).execute()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    _stats["searches"] += 1
+    _stats["total_ms"] += elapsed_ms
+    if elapsed_ms >= settings.search_slow_ms:
+        _stats["slow_searches"] += 1
+        logger.warning(f"Slow journal search ({elapsed_ms:.0f}ms, sort={sort})")
+
+    return split_page(result.data, limit, _SEARCH_KEYSET)
+
+
+def get_search_stats() -> Dict:
+    """Snapshot of journal search counters"""
+    searches = int(_stats["searches"])
+    return {
+        "searches": searches,
+        "slow_searches": int(_stats["slow_searches"]),
+        "avg_ms": round(_stats["total_ms"] / searches, 2) if searches else 0.0,
+        "slow_ms": settings.search_slow_ms,
+    }
@@ -0,0 +1,194 @@
+"""
+Local lexicon-based mood classifier
+
+A fast first tier in front of Gemini: entries are scored against a small
+valence lexicon (with negation, intensifier and "but" handling) using NumPy,
+and the result comes with a confidence that reflects how much clear,
+one-directional evidence the text contains. Confident results stand in for
+the model's analysis; unclear, mixed or mostly narrative entries still go to
+Gemini.
+"""
+
+import re
+from typing import Dict, List, Optional
+import numpy as np
+from app.config import settings
+from app.models import MoodAnalysis, MoodLevel
+
+# Bump whenever the lexicon or scoring changes (recorded with stored analyses)
+LEXICON_VERSION = "1"
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Valence on a -3..3 scale
+_LEXICON: Dict[str, float] = {
+    # positive
+    "happy": 2.5, "happier": 2.5, "happiness": 2.5, "joy": 3.0, "joyful": 3.0,
+    "glad": 2.0, "grateful": 2.5, "thankful": 2.5, "gratitude": 2.5, "blessed": 2.5,
+    "great": 2.5, "good": 1.5, "better": 1.5, "best": 2.5, "wonderful": 3.0,
+    "amazing": 3.0, "awesome": 3.0, "fantastic": 3.0, "excellent": 3.0, "lovely": 2.5,
+    "love": 2.5, "loved": 2.5, "loving": 2.5, "enjoy": 2.0, "enjoyed": 2.0,
+    "fun": 2.0, "excited": 2.5, "exciting": 2.5, "hopeful": 2.0, "hope": 1.5,
+    "calm": 1.5, "peaceful": 2.0, "relaxed": 2.0, "rested": 1.5, "content": 1.5,
+    "proud": 2.5, "confident": 2.0, "motivated": 2.0, "energized": 2.0, "energetic": 2.0,
+    "optimistic": 2.0, "relieved": 2.0, "relief": 1.5, "safe": 1.5, "supported": 2.0,
+    "accomplished": 2.5, "productive": 2.0, "progress": 1.5, "improving": 1.5, "improved": 1.5,
+    "smile": 2.0, "smiled": 2.0, "laugh": 2.0, "laughed": 2.0, "beautiful": 2.5,
+    "nice": 1.5, "pleasant": 1.5, "fine": 0.5, "okay": 0.3, "ok": 0.3,
+    "strong": 1.5, "stronger": 1.5, "healthy": 1.5, "inspired": 2.0, "cheerful": 2.5,
+    "thrilled": 3.0, "delighted": 3.0, "satisfied": 2.0, "celebrate": 2.5, "celebrated": 2.5,
+    # negative
+    "sad": -2.0, "sadness": -2.0, "unhappy": -2.0, "down": -1.0, "low": -1.0,
+    "depressed": -3.0, "depression": -2.5, "hopeless": -3.0, "worthless": -3.0, "empty": -2.0,
+    "miserable": -3.0, "awful": -2.5, "terrible": -2.5, "horrible": -2.5, "bad": -1.5,
+    "worse": -2.0, "worst": -2.5, "anxious": -2.0, "anxiety": -2.0, "worried": -2.0,
+    "worry": -1.5, "nervous": -1.5, "panic": -2.5, "scared": -2.0, "afraid": -2.0,
+    "fear": -2.0, "stressed": -2.0, "stressful": -2.0, "stress": -1.5, "overwhelmed": -2.5, "exhausted": -2.0,
+    "tired": -1.5, "drained": -2.0, "lonely": -2.0, "alone": -1.5, "isolated": -2.0,
+    "angry": -2.0, "anger": -2.0, "mad": -1.5, "furious": -2.5, "frustrated": -2.0,
+    "frustrating": -2.0, "annoyed": -1.5, "irritated": -1.5, "upset": -2.0, "hurt": -2.0,
+    "pain": -2.0, "painful": -2.0, "cry": -2.0, "cried": -2.0, "crying": -2.0,
+    "tears": -1.5, "guilty": -2.0, "guilt": -2.0, "ashamed": -2.5, "shame": -2.5,
+    "hate": -2.5, "hated": -2.5, "failure": -2.5, "failed": -2.0, "useless": -2.5,
+    "numb": -2.0, "lost": -1.5, "broken": -2.5, "struggle": -1.5, "struggling": -2.0,
+    "difficult": -1.5, "hard": -1.0, "sick": -1.5, "insomnia": -1.5, "sleepless": -1.5,
+    "restless": -1.5, "disappointed": -2.0, "disappointing": -2.0, "regret": -2.0, "grief": -2.5,
+    "suicidal": -3.0, "die": -2.5, "dead": -2.0, "worthlessness": -3.0, "helpless": -2.5,
+    "crisis": -2.5, "breakdown": -2.5, "argument": -1.5, "fight": -1.5, "rejected": -2.0,
+}
+
+_NEGATIONS = {
+    "not", "no", "never", "nothing", "nobody", "neither", "nor", "without", "hardly",
+    "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't", "weren't", "can't",
+    "couldn't", "won't", "wouldn't", "shouldn't", "haven't", "hasn't", "hadn't",
+    "dont", "didnt", "cant", "wont", "isnt", "wasnt",
+}
+_BOOSTERS = {
+    "very": 1.5, "really": 1.4, "so": 1.4, "extremely": 1.8, "incredibly": 1.8,
+    "totally": 1.5, "completely": 1.6, "absolutely": 1.6, "truly": 1.4, "super": 1.5,
+    "slightly": 0.5, "somewhat": 0.6, "little": 0.6, "bit": 0.6, "kinda": 0.6,
+}
+# Negators reach this many tokens ahead ("not feeling very good")
+_NEGATION_SCOPE = 3
+# Scaling of the raw score into -1..1 (as in VADER)
+_NORMALIZATION_ALPHA = 15.0
+# Share of tokens that must carry sentiment before a long entry is trusted
+_MIN_COVERAGE = 0.08
+
+_WORDS = sorted(set(_LEXICON) | _NEGATIONS | set(_BOOSTERS) | {"but"})
+_INDEX = {word: i for i, word in enumerate(_WORDS)}
+_VALENCE = np.array([_LEXICON.get(word, 0.0) for word in _WORDS], dtype=np.float32)
+_IS_NEGATION = np.array([word in _NEGATIONS for word in _WORDS])
+_BOOST = np.array([_BOOSTERS.get(word, 1.0) for word in _WORDS], dtype=np.float32)
+_BUT = _INDEX["but"]
+
+_TONES = {
+    MoodLevel.VERY_LOW: "Strongly negative",
+    MoodLevel.LOW: "Mostly negative",
+    MoodLevel.NEUTRAL: "Mixed or neutral",
+    MoodLevel.GOOD: "Mostly positive",
+    MoodLevel.VERY_GOOD: "Strongly positive",
+}
+
+_stats: Dict[str, int] = {
+    "classified": 0,
+    "served_locally": 0,
+    "escalated": 0,
+    "narrative_requests": 0,
+}
+
+
+def _mood_for(sentiment: float) -> MoodLevel:
+    if sentiment <= -0.6:
+        return MoodLevel.VERY_LOW
+    if sentiment <= -0.2:
+        return MoodLevel.LOW
+    if sentiment < 0.2:
+        return MoodLevel.NEUTRAL
+    if sentiment < 0.6:
+        return MoodLevel.GOOD
+    return MoodLevel.VERY_GOOD
+
+
+def classify_mood(text: str) -> MoodAnalysis:
+    """Score ``text`` against the lexicon; ``confidence`` says how far to trust it"""
+    _stats["classified"] += 1
+    tokens = _TOKEN.findall(text.lower())
+    ids = np.fromiter((_INDEX.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
+    known = ids >= 0
+    safe_ids = np.where(known, ids, 0)
+
+    valence = np.where(known, _VALENCE[safe_ids], 0.0)
+    negation = known & _IS_NEGATION[safe_ids]
+    boost = np.where(known, _BOOST[safe_ids], 1.0)
+
+    # Flip words with a negator among the previous few tokens
+    negators_seen = np.concatenate(([0], np.cumsum(negation)))
+    positions = np.arange(len(tokens))
+    window = negators_seen[positions] - negators_seen[np.maximum(positions - _NEGATION_SCOPE, 0)]
+    scores = valence * np.where(window > 0, -0.75, 1.0)
+    # Intensifiers and diminishers scale the next word
+    scores *= np.concatenate(([1.0], boost[:-1])) if len(tokens) else boost
+    # What follows "but" outweighs what precedes it
+    buts = np.flatnonzero(ids == _BUT)
+    if buts.size:
+        scores *= np.where(positions > buts[-1], 1.5, 0.5)
+
+    bearing = scores != 0
+    hits = int(bearing.sum())
+    positive = float(scores[scores > 0].sum())
+    negative = float(-scores[scores < 0].sum())
+    raw = positive - negative
+    sentiment = raw / float(np.sqrt(raw * raw + _NORMALIZATION_ALPHA))
+    mood = _mood_for(sentiment)
+
+    if hits:
+        agreement = abs(raw) / (positive + negative)
+        evidence = 1.0 - float(np.exp(-hits / 2.5))
+        coverage = min(1.0, hits / (_MIN_COVERAGE * len(tokens)))
+        confidence = agreement * evidence * coverage
+    else:
+        confidence = 0.0
+
+    keywords: List[str] = []
+    for i in np.argsort(-np.abs(scores))[:hits]:
+        if tokens[i] not in keywords:
+            keywords.append(tokens[i])
+        if len(keywords) == 5:
+            break
+
+    summary = f"{_TONES[mood]} tone"
+    summary += f" (words like {', '.join(keywords[:3])})." if keywords else "."
+    return MoodAnalysis(
+        mood=mood,
+        sentiment=round(sentiment, 3),
+        summary=summary,
+        keywords=keywords,
+        recommendations=[],
+        confidence=round(confidence, 3),
+        source="local",
+    )
+
+
+def needs_model(analysis: Optional[MoodAnalysis], narrative: bool = False) -> bool:
+    """
+    Whether Gemini must be called: the local tier is off (``analysis`` is None),
+    not confident enough, or a narrative summary was asked for.
+    """
+    if narrative:
+        _stats["narrative_requests"] += 1
+    if analysis is None or narrative or analysis.confidence < settings.local_sentiment_threshold:
+        _stats["escalated"] += 1
+        return True
+    _stats["served_locally"] += 1
+    return False
+
+
+def get_local_sentiment_stats() -> Dict:
+    """Snapshot of local classifier counters"""
+    decided = _stats["served_locally"] + _stats["escalated"]
+    return {
+        **_stats,
+        "threshold": settings.local_sentiment_threshold,
+        "local_share": round(_stats["served_locally"] / decided, 4) if decided else 0.0,
+    }
@@ -0,0 +1,182 @@
+"""
+Gemini model registry and shared prompt templates
+
+Model handles are built once per (model name, generation config) and reused
+across calls. All prompts share one system instruction; the installed SDK
+predates ``system_instruction`` on GenerativeModel, so it is prepended to the
+rendered prompt instead.
+"""
+
+import google.generativeai as genai
+from app.config import settings
+from typing import Dict, Optional, Tuple
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Initialize Gemini
+genai.configure(api_key=settings.gemini_api_key)
+
+# Cheapest default: gemini-1.5-flash (has free tier, $0.075 per 1M input tokens)
+# Alternative: gemini-2.0-flash-lite ($0.019 per 1M tokens) if available
+DEFAULT_MODEL = "gemini-1.5-flash"
+DEPRECATED_MODELS = {"gemini-pro": DEFAULT_MODEL}
+
+# Bump whenever a prompt template or its parsing changes (part of cache keys)
+PROMPT_VERSION = "2"
+
+SYSTEM_INSTRUCTION = """You are a supportive assistant inside a therapist-guided wellness journal.
+Be warm, realistic and non-judgmental. Never diagnose or give medical advice.
+Follow the requested output format exactly."""
+
+PROMPT_TEMPLATES: Dict[str, str] = {
+    "mood_analysis": """
+Analyze the following journal entry for mood and sentiment. Provide:
+1. Mood level (very_low, low, neutral, good, very_good)
+2. Sentiment score (-1 to 1, where -1 is very negative and 1 is very positive)
+3. A brief summary (2-3 sentences)
+4. Key topics/keywords (list of 5-10 words)
+5. Therapeutic recommendations (list of 2-3 actionable suggestions)
+6. Confidence level (0 to 1)
+
+Journal entry:
+{journal_content}
+
+Respond in JSON format:
+{{
+    "mood": "neutral",
+    "sentiment": 0.0,
+    "summary": "...",
+    "keywords": ["word1", "word2"],
+    "recommendations": ["rec1", "rec2"],
+    "confidence": 0.85
+}}
+""",
+    "mood_analysis_batch": """
+Analyze each of the following {entry_count} journal entries independently for mood and sentiment.
+For every entry provide:
+1. Mood level (very_low, low, neutral, good, very_good)
+2. Sentiment score (-1 to 1, where -1 is very negative and 1 is very positive)
+3. A brief summary (2-3 sentences)
+4. Key topics/keywords (list of 5-10 words)
+5. Therapeutic recommendations (list of 2-3 actionable suggestions)
+6. Confidence level (0 to 1)
+
+{entries_text}
+
+Respond with a JSON array containing one object per entry, using the entry number as "entry":
+[
+    {{
+        "entry": 1,
+        "mood": "neutral",
+        "sentiment": 0.0,
+        "summary": "...",
+        "keywords": ["word1", "word2"],
+        "recommendations": ["rec1", "rec2"],
+        "confidence": 0.85
+    }}
+]
+""",
+    "mood_analysis_stream": """
+Analyze the following journal entry for mood and sentiment.
+
+First write a brief summary of the entry (2-3 sentences) as plain text.
+Then write a line containing only {separator}
+After that line, respond in JSON format with:
+1. Mood level (very_low, low, neutral, good, very_good)
+2. Sentiment score (-1 to 1, where -1 is very negative and 1 is very positive)
+3. Key topics/keywords (list of 5-10 words)
+4. Therapeutic recommendations (list of 2-3 actionable suggestions)
+5. Confidence level (0 to 1)
+
+Journal entry:
+{journal_content}
+
+Example:
+The writer describes ...
+{separator}
+{{
+    "mood": "neutral",
+    "sentiment": 0.0,
+    "keywords": ["word1", "word2"],
+    "recommendations": ["rec1", "rec2"],
+    "confidence": 0.85
+}}
+""",
+    "affirmation": """
+Generate a personalized, supportive, and therapeutic daily affirmation.
+
+Context: {mood_context}
+Additional context: {context}
+
+The affirmation should be:
+- Positive and encouraging
+- Realistic and authentic (not overly optimistic if mood is low)
+- Therapeutic and supportive
+- 1-2 sentences maximum
+
+Return only the affirmation text, no additional formatting.
+""",
+    "activities": """
+Suggest 3 personalized micro-activities for a therapy client.
+
+Mood: {mood}
+Therapy goals: {goals_text}
+
+Each activity should be:
+- Small and achievable (5-30 minutes)
+- Therapeutic and supportive
+- Appropriate for the current mood level
+- Specific and actionable
+
+Return in JSON format:
+{{
+    "activities": [
+        {{
+            "title": "Activity name",
+            "description": "Brief description",
+            "duration_minutes": 10,
+            "category": "mindfulness/exercise/reflection/connection"
+        }}
+    ]
+}}
+""",
+}
+
+_models: Dict[Tuple[str, str], genai.GenerativeModel] = {}
+
+
+def resolve_model_name(model_name: Optional[str] = None) -> str:
+    """Resolve the configured model name, replacing deprecated models"""
+    name = model_name or settings.gemini_model or DEFAULT_MODEL
+    if name in DEPRECATED_MODELS:
+        replacement = DEPRECATED_MODELS[name]
+        logger.warning(f"{name} is deprecated, using {replacement} instead")
+        name = replacement
+    return name
+
+
+def get_model(model_name: Optional[str] = None, generation_config: Optional[Dict] = None) -> genai.GenerativeModel:
+    """Get a cached model handle for a model name and generation config"""
+    name = resolve_model_name(model_name)
+    key = (name, json.dumps(generation_config or {}, sort_keys=True))
+    model = _models.get(key)
+    if model is None:
+        model = genai.GenerativeModel(name, generation_config=generation_config)
+        _models[key] = model
+    return model
+
+
+def render_prompt(template_name: str, **kwargs) -> str:
+    """Render a prompt template prefixed with the shared system instruction"""
+    return f"{SYSTEM_INSTRUCTION}\n{PROMPT_TEMPLATES[template_name].format(**kwargs)}"
+
+
+def preload_models():
+    """Build the default model handle at startup"""
+    try:
+        get_model()
+        logger.info(f"Preloaded Gemini model {resolve_model_name()}")
+    except Exception as e:
+        logger.error(f"Failed to preload Gemini model: {str(e)}")
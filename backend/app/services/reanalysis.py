@@ -0,0 +1,90 @@
+"""
+Deciding whether an edited journal entry needs a new analysis
+
+Each row records which content its analysis was computed for
+(``analysis_content_hash`` against the generated ``content_hash`` column) and
+with which model and prompt (``analysis_version``). An edit is measured as the
+share of words that changed; small edits keep the existing analysis and add to
+``analysis_drift``, and only once the drift since the last analysis reaches
+``reanalysis_change_threshold`` is the entry analyzed again.
+"""
+
+import hashlib
+from difflib import SequenceMatcher
+from typing import Dict, Tuple
+from app.config import settings
+from app.models import MoodAnalysis
+from app.services.local_sentiment import LEXICON_VERSION
+from app.services.model_registry import resolve_model_name, PROMPT_VERSION
+
+_stats: Dict[str, int] = {
+    "reused": 0,
+    "reanalyzed": 0,
+}
+
+
+def entry_content_hash(content: str) -> str:
+    """Same value as the journals.content_hash column (md5 of the text)"""
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+def analysis_version(analysis: MoodAnalysis) -> str:
+    """Which classifier or model/prompt produced ``analysis``"""
+    if analysis.source == "local":
+        return f"local:{LEXICON_VERSION}"
+    return f"{resolve_model_name()}:{PROMPT_VERSION}"
+
+
+def analysis_fields(analysis: MoodAnalysis, content: str) -> Dict:
+    """Row columns recording a complete analysis of ``content``"""
+    return {
+        "ai_analysis": analysis.model_dump(mode="json"),
+        "analysis_status": "complete",
+        "analysis_content_hash": entry_content_hash(content),
+        "analysis_version": analysis_version(analysis),
+        "analysis_drift": 0,
+    }
+
+
+def change_ratio(old: str, new: str, limit: float = 1.0) -> float:
+    """
+    Share of words changed between ``old`` and ``new`` (0 = same words, 1 = all new).
+
+    Once the change is known to be at least ``limit`` a cheap upper-bound
+    estimate is returned instead of the exact value.
+    """
+    old_words, new_words = old.split(), new.split()
+    if old_words == new_words:
+        return 0.0
+    if not old_words or not new_words:
+        return 1.0
+    matcher = SequenceMatcher(None, old_words, new_words)
+    for bound in (matcher.real_quick_ratio, matcher.quick_ratio):
+        change = 1.0 - bound()
+        if change >= limit:
+            return change
+    return 1.0 - matcher.ratio()
+
+
+def plan_reanalysis(row: Dict, new_content: str) -> Tuple[bool, float]:
+    """
+    Whether the row's current analysis still applies to ``new_content``,
+    and the drift to record if it does.
+    """
+    if row.get("analysis_status") != "complete" or not row.get("ai_analysis"):
+        _stats["reanalyzed"] += 1
+        return False, 0.0
+
+    drift = float(row.get("analysis_drift") or 0.0)
+    remaining = settings.reanalysis_change_threshold - drift
+    change = change_ratio(row.get("content") or "", new_content, limit=max(remaining, 0.0))
+    if change < remaining:
+        _stats["reused"] += 1
+        return True, round(drift + change, 4)
+    _stats["reanalyzed"] += 1
+    return False, 0.0
+
+
+def get_reanalysis_stats() -> Dict:
+    """Snapshot of edit re-analysis counters"""
+    return {**_stats, "change_threshold": settings.reanalysis_change_threshold}
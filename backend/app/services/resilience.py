@@ -0,0 +1,202 @@
+"""
+Failure handling for Gemini calls: circuit breaker, retries and hedging
+
+The breaker counts consecutive provider failures; once it trips, calls fail
+immediately with AICircuitOpenError (callers serve their canned fallbacks)
+until ``ai_breaker_reset_seconds`` have passed and a single probe call
+succeeds. Transient errors are retried with jittered backoff inside the
+call's deadline, and interactive calls can optionally send a duplicate
+request when the first one is slow, keeping whichever answers first.
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from google.api_core import exceptions as google_exceptions
+from app.config import settings
+from app.services.ai_scheduler import AIDeadlineExceeded, is_quota_error
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+)
+
+
+class AICircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit breaker is open"""
+
+
+def is_local_error(error: BaseException) -> bool:
+    """Errors raised by our own quota handling, which say nothing about provider health"""
+    return isinstance(error, AIDeadlineExceeded) or is_quota_error(error)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Provider errors worth retrying (timeouts, 5xx, dropped connections)"""
+    return isinstance(error, _TRANSIENT_ERRORS) and not is_local_error(error)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._stats: Dict[str, int] = {"trips": 0, "rejected": 0}
+
+    def acquire(self) -> bool:
+        """
+        Permission to call the model; returns True if this call is the probe.
+
+        Raises AICircuitOpenError while open (or while another probe is out).
+        """
+        if self.state == "closed":
+            return False
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self._stats["rejected"] += 1
+        raise AICircuitOpenError("Model calls are suspended after repeated failures")
+
+    def on_success(self, probe: bool = False):
+        self._failures = 0
+        if probe:
+            self._probing = False
+        if self.state != "closed":
+            logger.info("Model calls recovered, closing circuit breaker")
+            self.state = "closed"
+
+    def on_failure(self, probe: bool = False):
+        self._failures += 1
+        if probe:
+            self._probing = False
+        if self.state == "half_open" or (self.state == "closed" and self._failures >= self.failure_threshold):
+            self._stats["trips"] += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            logger.warning(
+                f"Opening circuit breaker after {self._failures} consecutive model failures "
+                f"for {self.reset_seconds}s"
+            )
+
+    def release(self, probe: bool):
+        """The call ended without telling us anything about the provider"""
+        if probe:
+            self._probing = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            **self._stats,
+        }
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.ai_breaker_failure_threshold,
+    reset_seconds=settings.ai_breaker_reset_seconds,
+)
+
+_stats: Dict[str, int] = {
+    "retries": 0,
+    "hedged": 0,
+    "hedge_wins": 0,
+}
+
+
+def retry_delay(retry: int) -> float:
+    """Full-jitter exponential backoff for the ``retry``-th retry (1-based)"""
+    return random.uniform(0, settings.ai_retry_base_delay_seconds * 2 ** (retry - 1))
+
+
+async def _hedged(attempt: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+    first = asyncio.ensure_future(attempt())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        _stats["hedged"] += 1
+        tasks.add(asyncio.ensure_future(attempt()))
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [task for task in done if task.exception() is None]
+            if succeeded:
+                if first not in succeeded:
+                    _stats["hedge_wins"] += 1
+                return succeeded[0].result()
+            if not pending:
+                # Both failed: surface one of the errors
+                raise done.pop().exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def call_resilient(
+    attempt: Callable[[], Awaitable[T]],
+    deadline: float,
+    hedge_after: Optional[float] = None,
+) -> T:
+    """
+    Run ``attempt`` through the circuit breaker, retrying transient failures.
+
+    ``deadline`` is a ``loop.time()`` value; no retry starts once its backoff
+    would run past it. With ``hedge_after`` set, a duplicate attempt is sent
+    if the first has not finished after that many seconds.
+    """
+    loop = asyncio.get_running_loop()
+    retries = 0
+    while True:
+        probe = breaker.acquire()
+        try:
+            if hedge_after and not probe:
+                result = await _hedged(attempt, hedge_after)
+            else:
+                result = await attempt()
+        except asyncio.CancelledError:
+            breaker.release(probe)
+            raise
+        except Exception as e:
+            if is_local_error(e):
+                breaker.release(probe)
+                raise
+            breaker.on_failure(probe)
+            if not is_transient_error(e) or retries >= settings.ai_max_retries:
+                raise
+            retries += 1
+            delay = retry_delay(retries)
+            if loop.time() + delay >= deadline:
+                raise
+            _stats["retries"] += 1
+            logger.info(f"Retrying model call in {delay:.2f}s after {type(e).__name__}")
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.on_success(probe)
+        return result
+
+
+def get_resilience_stats() -> Dict:
+    """Snapshot of breaker state and retry/hedge counters"""
+    return {
+        "breaker": breaker.stats(),
+        **_stats,
+    }
@@ -0,0 +1,197 @@
+"""
+Per-client in-memory vector index for semantic journal search
+
+A client's entry embeddings (journal_embeddings rows for the current model)
+are loaded into one float32 matrix on first use and kept in an LRU cache;
+the embedding pipeline updates cached indexes in place as entries are
+written. Searches are exact: one matrix-vector product over the client's
+entries (a few thousand rows at most), so no approximate index is needed.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+from app.config import settings
+from app.database import get_supabase
+from app.models import JournalSimilarResult
+from app.services.embeddings import get_embedder, embed_texts, embed_query, decode_vector, normalize
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.pagination import iter_keyset
+from app.utils.projection import journal_projection
+from app.utils.serialization import project_rows
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ClientIndex:
+    """Unit-length entry vectors of one client, searched by cosine similarity"""
+
+    def __init__(self, ids: List[str], matrix: np.ndarray):
+        self.ids = ids
+        self.matrix = matrix
+        self._positions = {entry_id: i for i, entry_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vector(self, entry_id: str) -> Optional[np.ndarray]:
+        position = self._positions.get(entry_id)
+        return None if position is None else self.matrix[position]
+
+    def upsert(self, entry_id: str, vector: np.ndarray):
+        position = self._positions.get(entry_id)
+        if position is not None:
+            self.matrix[position] = vector
+            return
+        self._positions[entry_id] = len(self.ids)
+        self.ids.append(entry_id)
+        self.matrix = np.vstack([self.matrix, vector[np.newaxis, :]]) if len(self.matrix) else vector[np.newaxis, :].copy()
+
+    def remove(self, entry_id: str):
+        position = self._positions.pop(entry_id, None)
+        if position is None:
+            return
+        del self.ids[position]
+        self.matrix = np.delete(self.matrix, position, axis=0)
+        self._positions = {entry_id: i for i, entry_id in enumerate(self.ids)}
+
+    def search(self, vector: np.ndarray, limit: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Most similar entries first, as (entry id, cosine similarity)"""
+        if not self.ids or len(vector) != self.matrix.shape[1]:
+            return []
+        scores = self.matrix @ vector
+        if exclude in self._positions:
+            scores[self._positions[exclude]] = -np.inf
+        count = min(limit, len(scores))
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self.ids[i], float(scores[i]))
+            for i in top
+            if np.isfinite(scores[i]) and scores[i] >= settings.semantic_min_similarity
+        ]
+
+
+_indexes = TTLCache(maxsize=settings.semantic_index_cache_size, ttl=settings.semantic_index_ttl_seconds)
+_flights = SingleFlight()
+
+_stats: Dict[str, float] = {
+    "index_loads": 0,
+    "load_ms": 0.0,
+    "similar_queries": 0,
+    "semantic_queries": 0,
+    "embedded_on_demand": 0,
+}
+
+
+async def _load_index(user_id: str, model: str) -> ClientIndex:
+    started = time.perf_counter()
+    supabase = get_supabase()
+    ids: List[str] = []
+    vectors: List[np.ndarray] = []
+    rows = iter_keyset(
+        lambda: supabase.table("journal_embeddings")
+            .select("id, created_at, embedding")
+            .eq("user_id", user_id)
+            .eq("model", model),
+        settings.export_batch_size
+    )
+    async for row in rows:
+        ids.append(row["id"])
+        vectors.append(decode_vector(row["embedding"]))
+    matrix = normalize(np.stack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    _stats["index_loads"] += 1
+    _stats["load_ms"] += (time.perf_counter() - started) * 1000
+    return ClientIndex(ids, matrix)
+
+
+async def get_index(user_id: str) -> ClientIndex:
+    """The client's index, loaded from journal_embeddings on a cache miss"""
+    model = get_embedder().name
+    key = (user_id, model)
+    index = _indexes.get(key)
+    if index is None:
+        index = await _flights.do(key, lambda: _load_index(user_id, model))
+        _indexes.set(key, index)
+    return index
+
+
+def index_entry(user_id: str, entry_id: str, vector: np.ndarray):
+    """Add or replace an entry's vector in the client's index, if it is loaded"""
+    index = _indexes.get((user_id, get_embedder().name))
+    if index is not None:
+        index.upsert(entry_id, vector)
+
+
+def forget_entry(user_id: str, entry_id: str):
+    """Drop a deleted entry from the client's index, if it is loaded"""
+    index = _indexes.get((user_id, get_embedder().name))
+    if index is not None:
+        index.remove(entry_id)
+
+
+async def _hydrate(hits: List[Tuple[str, float]]) -> List[Dict]:
+    """Summary rows for the hits, in hit order, with their similarity"""
+    if not hits:
+        return []
+    result = await get_supabase().table("journals")\
+        .select(journal_projection("summary").select)\
+        .in_("id", [entry_id for entry_id, _ in hits])\
+        .execute()
+    rows = {row["id"]: row for row in result.data or []}
+    # Entries deleted since they were indexed are skipped
+    ranked = [{**rows[entry_id], "similarity": round(score, 4)} for entry_id, score in hits if entry_id in rows]
+    return project_rows(ranked, JournalSimilarResult)
+
+
+async def _embed_or_unavailable(embed):
+    try:
+        return await embed
+    except Exception as e:
+        logger.error(f"Embedding for semantic search failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Semantic search is temporarily unavailable")
+
+
+async def similar_entries(entry: Dict, limit: int) -> List[Dict]:
+    """Entries of the same client most similar to ``entry`` (id, user_id, content)"""
+    _stats["similar_queries"] += 1
+    index = await get_index(entry["user_id"])
+    vector = index.vector(entry["id"])
+    if vector is None:
+        # Not embedded yet (the pipeline has not reached it, or it predates the backfill)
+        _stats["embedded_on_demand"] += 1
+        vector = (await _embed_or_unavailable(embed_texts([entry["content"]])))[0]
+        index.upsert(entry["id"], vector)
+    return await _hydrate(index.search(vector, limit, exclude=entry["id"]))
+
+
+async def semantic_search(user_id: str, query: str, limit: int) -> List[Dict]:
+    """Entries of a client closest in meaning to ``query``"""
+    query = (query or "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Search query is required")
+    if len(query) > settings.search_max_query_length:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search query must be at most {settings.search_max_query_length} characters"
+        )
+    _stats["semantic_queries"] += 1
+    vector = await _embed_or_unavailable(embed_query(query))
+    index = await get_index(user_id)
+    return await _hydrate(index.search(vector, limit))
+
+
+def get_semantic_index_stats() -> Dict:
+    """Snapshot of in-memory index counters"""
+    loads = int(_stats["index_loads"])
+    return {
+        "index_loads": loads,
+        "avg_load_ms": round(_stats["load_ms"] / loads, 2) if loads else 0.0,
+        "similar_queries": int(_stats["similar_queries"]),
+        "semantic_queries": int(_stats["semantic_queries"]),
+        "embedded_on_demand": int(_stats["embedded_on_demand"]),
+        "cache": _indexes.stats(),
+    }
@@ -0,0 +1,118 @@
+"""
+Shared pools of activity suggestions
+
+Suggestions depend only on the mood and the therapy goals, which few users
+differ on, so they are shared across users: each (mood, normalized goals)
+key holds a small pool of generated suggestion sets that requests rotate
+through. Pools are filled and topped up by background tasks; serving never
+waits on the model, and an empty pool falls back to the default activities.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.models import ActivitySuggestion, MoodLevel
+from app.services.ai_scheduler import Priority, priority_scope
+from app.services.ai_service import request_activities, get_default_activities
+from app.utils.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (mood, normalized goals)
+PoolKey = Tuple[str, Tuple[str, ...]]
+
+
+@dataclass
+class _Pool:
+    sets: List[Tuple[float, List[ActivitySuggestion]]] = field(default_factory=list)
+    served: int = 0
+
+
+# A key expires once everything in it is stale (it is re-set on every refill)
+_pools = TTLCache(maxsize=settings.suggestion_pool_max_keys, ttl=settings.suggestion_pool_max_age_seconds)
+_refills: Dict[PoolKey, asyncio.Task] = {}
+
+_stats: Dict[str, int] = {
+    "served_from_pool": 0,
+    "cold_starts": 0,
+    "generated": 0,
+    "expired": 0,
+    "refill_failures": 0,
+}
+
+
+def normalize_goals(therapy_goals: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Case-, whitespace- and order-insensitive form of a goals list"""
+    return tuple(sorted({" ".join(goal.lower().split()) for goal in therapy_goals or () if goal and goal.strip()}))
+
+
+def get_pooled_activities(mood: MoodLevel, therapy_goals: Optional[List[str]] = None) -> List[ActivitySuggestion]:
+    """Next suggestion set from the shared pool (default activities while it is empty)"""
+    goals = normalize_goals(therapy_goals)
+    key = (mood.value, goals)
+    pool = _pools.get(key)
+
+    if pool is not None:
+        cutoff = time.monotonic() - settings.suggestion_pool_max_age_seconds
+        fresh = [item for item in pool.sets if item[0] >= cutoff]
+        _stats["expired"] += len(pool.sets) - len(fresh)
+        pool.sets = fresh
+
+    if pool is None or len(pool.sets) < settings.suggestion_pool_size:
+        _schedule_refill(key, mood, goals)
+
+    if pool is None or not pool.sets:
+        _stats["cold_starts"] += 1
+        return get_default_activities(mood)
+
+    _, activities = pool.sets[pool.served % len(pool.sets)]
+    pool.served += 1
+    _stats["served_from_pool"] += 1
+    return list(activities)
+
+
+def _schedule_refill(key: PoolKey, mood: MoodLevel, goals: Tuple[str, ...]):
+    if key in _refills:
+        return
+    # Refills never hold up a user request, so they yield quota to interactive calls
+    with priority_scope(Priority.BACKGROUND):
+        _refills[key] = asyncio.create_task(_refill(key, mood, goals), name=f"suggestion-refill-{mood.value}")
+
+
+async def _refill(key: PoolKey, mood: MoodLevel, goals: Tuple[str, ...]):
+    try:
+        pool = _pools.get(key) or _Pool()
+        while len(pool.sets) < settings.suggestion_pool_size:
+            try:
+                activities = await request_activities(mood, list(goals))
+            except Exception as e:
+                # Try again on a later request
+                _stats["refill_failures"] += 1
+                logger.warning(f"Failed to refill activity suggestions for {mood.value}: {str(e)}")
+                break
+            pool.sets.append((time.monotonic(), activities))
+            _stats["generated"] += 1
+            # Publish after every set so requests can use it right away
+            _pools.set(key, pool)
+    finally:
+        _refills.pop(key, None)
+
+
+async def stop_suggestion_refills():
+    """Cancel in-flight pool refills (on shutdown)"""
+    tasks = list(_refills.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def get_suggestion_pool_stats() -> Dict:
+    """Snapshot of suggestion pool counters"""
+    return {
+        "pools": len(_pools),
+        **_stats,
+        "refilling": len(_refills),
+    }
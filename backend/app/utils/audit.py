@@ -1,16 +1,45 @@
 """
 Audit logging utilities for compliance
+
+Events are written behind the request: they go into a bounded in-process
+buffer and a background writer flushes them with bulk inserts, by batch size
+or flush interval. When the buffer is full, callers wait briefly
+(backpressure) before the event is spooled to disk. Batches the database
+rejects are appended to a local JSONL spool and replayed once it is
+reachable again, so compliance records are not lost.
 """
 
+import asyncio
+import json
+import os
+from collections import defaultdict
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from app.config import settings
 from app.database import get_supabase
 import logging
 
 logger = logging.getLogger(__name__)
 
+_buffer: Optional[asyncio.Queue] = None
+_writer: Optional[asyncio.Task] = None
+
+# Queued by stop_audit_writer; the writer flushes what it holds and exits
+_STOP = ("", {})
+
+_stats: Dict[str, int] = {
+    "enqueued": 0,
+    "flushed": 0,
+    "batches": 0,
+    "direct_writes": 0,
+    "spooled": 0,
+    "replayed": 0,
+    "backpressure_waits": 0,
+}
 
-def log_audit_event(
+
+async def log_audit_event(
     user_id: str,
     action: str,
     resource_type: str,
@@ -19,55 +48,245 @@ def log_audit_event(
     user_agent: Optional[str] = None
 ):
     """Log an audit event to the database"""
-    try:
-        supabase = get_supabase()
-        supabase.table("audit_log").insert({
-            "user_id": user_id,
-            "action": action,
-            "resource_type": resource_type,
-            "resource_id": resource_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "ip_address": ip_address,
-            "user_agent": user_agent
-        }).execute()
-    except Exception as e:
-        logger.error(f"Failed to log audit event: {str(e)}")
+    await _record("audit_log", {
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "ip_address": ip_address,
+        "user_agent": user_agent
+    })
 
 
-def log_access_event(
+async def log_access_event(
     therapist_id: str,
     client_id: str,
     ip_address: Optional[str] = None
 ):
     """Log therapist access to client data"""
-    try:
-        supabase = get_supabase()
-        supabase.table("access_log").insert({
-            "therapist_id": therapist_id,
-            "client_id": client_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "ip_address": ip_address
-        }).execute()
-    except Exception as e:
-        logger.error(f"Failed to log access event: {str(e)}")
+    await _record("access_log", {
+        "therapist_id": therapist_id,
+        "client_id": client_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "ip_address": ip_address
+    })
 
 
-def log_error_event(
+async def log_error_event(
     user_id: Optional[str],
     error_type: str,
     error_message: str,
     sanitized: bool = True
 ):
     """Log error events (sanitized to remove sensitive data)"""
+    await _record("error_log", {
+        "user_id": user_id,
+        "error_type": error_type,
+        "error_message": error_message,
+        "sanitized": sanitized,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+
+async def _record(table: str, record: Dict):
+    """Hand an event to the write-behind buffer (or write it directly if not running)"""
+    try:
+        if _buffer is None:
+            _stats["direct_writes"] += 1
+            await _write_batch(table, [record])
+            return
+
+        if _buffer.full():
+            _stats["backpressure_waits"] += 1
+        try:
+            await asyncio.wait_for(
+                _buffer.put((table, record)),
+                settings.audit_enqueue_timeout_seconds
+            )
+            _stats["enqueued"] += 1
+        except asyncio.TimeoutError:
+            logger.warning(f"Audit buffer full, spooling {table} event to disk")
+            await _spool([(table, record)])
+    except Exception as e:
+        logger.error(f"Failed to log {table} event: {str(e)}")
+
+
+async def _write_batch(table: str, records: List[Dict]) -> bool:
+    """Bulk insert records, spooling them to disk if the database rejects them"""
     try:
         supabase = get_supabase()
-        supabase.table("error_log").insert({
-            "user_id": user_id,
-            "error_type": error_type,
-            "error_message": error_message,
-            "sanitized": sanitized,
-            "timestamp": datetime.utcnow().isoformat()
-        }).execute()
+        await supabase.table(table).insert(records).execute()
+        _stats["flushed"] += len(records)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to write {len(records)} {table} events, spooling: {str(e)}")
+        await _spool([(table, record) for record in records])
+        return False
+
+
+async def _flush(events: List[Tuple[str, Dict]]) -> bool:
+    by_table: Dict[str, List[Dict]] = defaultdict(list)
+    for table, record in events:
+        by_table[table].append(record)
+    _stats["batches"] += 1
+    ok = True
+    unwritten = dict(by_table)
+    try:
+        for table, records in by_table.items():
+            ok = await _write_batch(table, records) and ok
+            del unwritten[table]
+    except asyncio.CancelledError:
+        # Shutdown stopped waiting for the database; keep what was not written
+        await _spool([(table, record) for table, records in unwritten.items() for record in records])
+        raise
+    return ok
+
+
+def _append_spool(lines: List[str]):
+    with open(settings.audit_spool_path, "a", encoding="utf-8") as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def _spool(events: List[Tuple[str, Dict]]):
+    if not events:
+        return
+    lines = [json.dumps({"table": table, "record": record}) + "\n" for table, record in events]
+    await run_in_threadpool(_append_spool, lines)
+    _stats["spooled"] += len(events)
+
+
+def _take_spool() -> Tuple[str, List[Tuple[str, Dict]]]:
+    """Move the spool aside for replay; returns the replay file and its events"""
+    path = settings.audit_spool_path
+    replay_path = f"{path}.replay"
+    # A leftover .replay file means a previous replay was interrupted; finish it first
+    if not os.path.exists(replay_path):
+        if not os.path.exists(path):
+            return replay_path, []
+        os.replace(path, replay_path)
+    events = []
+    with open(replay_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                events.append((item["table"], item["record"]))
+    return replay_path, events
+
+
+async def replay_spool():
+    """
+    Re-send spooled events; anything that fails again goes back to the spool.
+
+    The .replay file is only removed once every event in it has been
+    inserted or re-spooled, so a crash mid-replay loses nothing (the next
+    replay may insert some events twice rather than drop them).
+    """
+    try:
+        replay_path, events = await run_in_threadpool(_take_spool)
     except Exception as e:
-        logger.error(f"Failed to log error event: {str(e)}")
+        logger.error(f"Failed to read audit spool: {str(e)}")
+        return
+    if events:
+        logger.info(f"Replaying {len(events)} spooled audit events")
+    for start in range(0, len(events), settings.audit_batch_size):
+        chunk = events[start:start + settings.audit_batch_size]
+        before = _stats["spooled"]
+        await _flush(chunk)
+        _stats["replayed"] += len(chunk) - (_stats["spooled"] - before)
+    if os.path.exists(replay_path):
+        await run_in_threadpool(os.remove, replay_path)
+
+
+async def _writer_loop():
+    loop = asyncio.get_running_loop()
+    last_replay = loop.time()
+    stopping = False
+    while not stopping:
+        try:
+            first = await asyncio.wait_for(_buffer.get(), settings.audit_flush_interval_seconds)
+        except asyncio.TimeoutError:
+            first = None
+
+        events = []
+        if first is _STOP:
+            stopping = True
+        elif first is not None:
+            events.append(first)
+
+        # Collect up to a batch, but never hold events past one flush interval
+        deadline = loop.time() + settings.audit_flush_interval_seconds
+        try:
+            while events and len(events) < settings.audit_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(_buffer.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if event is _STOP:
+                    stopping = True
+                    break
+                events.append(event)
+        except asyncio.CancelledError:
+            # Events already taken from the buffer are no longer drained by shutdown
+            await _spool(events)
+            raise
+
+        try:
+            healthy = await _flush(events) if events else True
+            if healthy and loop.time() - last_replay >= settings.audit_replay_interval_seconds:
+                last_replay = loop.time()
+                await replay_spool()
+        except Exception as e:
+            logger.error(f"Audit writer flush failed: {str(e)}")
+
+
+async def start_audit_writer():
+    """Start the write-behind writer and replay anything left in the spool"""
+    global _buffer, _writer
+    if _writer is not None:
+        return
+    _buffer = asyncio.Queue(maxsize=settings.audit_buffer_size)
+    await replay_spool()
+    _writer = asyncio.create_task(_writer_loop(), name="audit-writer")
+
+
+async def stop_audit_writer():
+    """
+    Stop the writer after draining buffered events to the database (or spool).
+
+    If the drain times out the writer is cancelled and spools the batch it
+    holds; events still buffered are spooled without trying the database, so
+    shutdown is bounded by ``audit_drain_timeout_seconds`` plus local writes.
+    """
+    global _buffer, _writer
+    if _writer is None:
+        return
+    await _buffer.put(_STOP)
+    try:
+        await asyncio.wait_for(_writer, settings.audit_drain_timeout_seconds)
+    except asyncio.TimeoutError:
+        logger.error("Timed out draining audit buffer")
+
+    # Anything still buffered (e.g. queued behind the stop marker) is replayed at next start
+    events = []
+    while not _buffer.empty():
+        event = _buffer.get_nowait()
+        if event is not _STOP:
+            events.append(event)
+    _buffer = None
+    _writer = None
+    await _spool(events)
+
 
+def get_audit_stats() -> Dict[str, int]:
+    """Snapshot of write-behind logging counters"""
+    return {
+        **_stats,
+        "buffered": _buffer.qsize() if _buffer is not None else 0,
+        "running": _writer is not None,
+    }
@@ -10,9 +10,39 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.database import get_supabase
 from app.models import UserRole
+from app.utils.cache import TTLCache, SingleFlight
 
 security = HTTPBearer()
 
+# Profiles change rarely; serve them from memory for a short staleness window
+_profile_cache = TTLCache(
+    maxsize=settings.user_cache_size,
+    ttl=settings.user_cache_ttl_seconds,
+)
+_profile_flights = SingleFlight()
+
+
+def cache_user_profile(profile: Dict):
+    """Store a freshly loaded or written user profile"""
+    _profile_cache.set(profile["id"], profile)
+
+
+def invalidate_user_profile(user_id: str):
+    """Drop a cached profile after it changes (role, therapy goals, ...)"""
+    _profile_cache.invalidate(user_id)
+
+
+def get_user_cache_stats() -> Dict:
+    """Snapshot of user profile cache counters"""
+    return {**_profile_cache.stats(), "coalesced": _profile_flights.coalesced}
+
+
+async def _load_user_profile(user_id: str) -> Dict:
+    supabase = get_supabase()
+    result = await supabase.table("users").select("*").eq("id", user_id).single().execute()
+    cache_user_profile(result.data)
+    return result.data
+
 
 def create_access_token(data: Dict[str, str]) -> str:
     """Create JWT access token"""
@@ -53,11 +83,14 @@ async def get_current_user(
             detail="Invalid token payload",
         )
     
+    cached = _profile_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    
     # Fetch user from Supabase
-    supabase = get_supabase()
     try:
-        result = supabase.table("users").select("*").eq("id", user_id).single().execute()
-        return result.data
+        profile = await _profile_flights.do(user_id, lambda: _load_user_profile(user_id))
+        return dict(profile)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -97,3 +130,12 @@ async def get_current_therapist(current_user: Dict = Depends(get_current_user))
         )
     return current_user
 
+
+async def get_current_admin(current_user: Dict = Depends(get_current_user)) -> Dict:
+    """Ensure current user is an admin"""
+    if current_user.get("role") != UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access only"
+        )
+    return current_user
@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination on (created_at, id)
+
+Listings are ordered newest first with ``id`` as a tie-breaker. A cursor
+encodes the sort key of the last row of a page, and the next page filters on
+``(created_at, id) < cursor`` so every page costs one index range scan no
+matter how deep it is. Cursors are opaque to clients; the next one is sent
+in the ``X-Next-Cursor`` response header.
+
+Other orderings (e.g. search results by rank) pass their own sort ``keys``
+to ``encode_cursor`` / ``split_page`` and read them back with
+``decode_cursor_values``.
+"""
+
+import base64
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from app.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sort key of listings: newest first, id as tie-breaker
+_KEYSET = ("created_at", "id")
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Requested page size, defaulted and capped at the server maximum"""
+    if limit is None:
+        return settings.default_page_size
+    return max(1, min(limit, settings.max_page_size))
+
+
+def reject_offset(offset: Optional[int]):
+    """Listings page by cursor only; fail loudly instead of ignoring a legacy ``offset``"""
+    if offset is not None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset is no longer supported; page with the cursor from the {NEXT_CURSOR_HEADER} header"
+        )
+
+
+def encode_cursor(row: Dict, keys: Sequence[str] = _KEYSET) -> str:
+    """Opaque cursor pointing just past ``row`` in the ordering on ``keys``"""
+    raw = json.dumps([row[key] for key in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor_values(cursor: str, count: int) -> List[Any]:
+    """The ``count`` sort key values stored in a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError("unexpected cursor contents")
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Sort key (created_at, id) stored in a cursor"""
+    created_at, row_id = decode_cursor_values(cursor, len(_KEYSET))
+    if not isinstance(created_at, str) or not isinstance(row_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, row_id
+
+
+def keyset_page(query, cursor: Optional[str], limit: int):
+    """
+    Order ``query`` newest first and restrict it to the page after ``cursor``.
+
+    One extra row is requested so the caller can tell whether another page
+    follows (see ``split_page``).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query.params = query.params.add(
+            "or",
+            f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}"))'
+        )
+    query.params = query.params.set("order", "created_at.desc,id.desc")
+    return query.limit(limit + 1)
+
+
+def split_page(
+    rows: Optional[List[Dict]],
+    limit: int,
+    keys: Sequence[str] = _KEYSET,
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """Trim the look-ahead row; returns the page and its next-cursor headers"""
+    rows = rows or []
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, {NEXT_CURSOR_HEADER: encode_cursor(rows[-1], keys)}
+    return rows, {}
+
+
+async def iter_keyset(build_query: Callable[[], Any], batch_size: int) -> AsyncIterator[Dict]:
+    """
+    Yield every row of a listing, newest first, one keyset page at a time.
+
+    ``build_query`` returns a fresh filtered query for each page, so only one
+    page of rows is held in memory at once.
+    """
+    cursor = None
+    while True:
+        result = await keyset_page(build_query(), cursor, batch_size).execute()
+        rows = result.data or []
+        for row in rows[:batch_size]:
+            yield row
+        if len(rows) <= batch_size:
+            return
+        cursor = encode_cursor(rows[batch_size - 1])
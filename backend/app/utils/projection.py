@@ -0,0 +1,78 @@
+"""
+Column projection for journal listings
+
+List endpoints accept ``view=full|summary`` or an explicit ``fields=`` list.
+The choice is pushed down into the PostgREST ``select`` so only the needed
+columns leave the database: the summary view reads the generated
+``content_preview`` column and only the ``summary`` key of ``ai_analysis``
+instead of the full text and analysis JSON.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+from fastapi import HTTPException
+from pydantic import BaseModel
+from app.models import JournalEntryResponse, JournalEntrySummary
+from app.utils.serialization import project_rows
+
+# Response field -> PostgREST select expression
+JOURNAL_COLUMNS: Dict[str, str] = {
+    "id": "id",
+    "user_id": "user_id",
+    "content": "content",
+    "content_preview": "content_preview",
+    "mood": "mood",
+    "tags": "tags",
+    "is_voice": "is_voice",
+    "created_at": "created_at",
+    "ai_analysis": "ai_analysis",
+    "analysis_summary": "analysis_summary:ai_analysis->>summary",
+    "analysis_status": "analysis_status",
+}
+
+# Always selected: the keyset pagination cursor is built from them
+KEY_FIELDS = ("id", "created_at")
+
+VIEWS: Dict[str, Type[BaseModel]] = {
+    "full": JournalEntryResponse,
+    "summary": JournalEntrySummary,
+}
+
+
+class Projection(NamedTuple):
+    fields: List[str]
+    model: Optional[Type[BaseModel]]  # None for an ad-hoc ``fields=`` list
+
+    @property
+    def select(self) -> str:
+        return ", ".join(JOURNAL_COLUMNS[name] for name in self.fields)
+
+    @property
+    def response_type(self) -> Any:
+        return List[self.model] if self.model is not None else List[Dict[str, Any]]
+
+    def apply(self, rows: Optional[List[Dict]]) -> List[Dict]:
+        """Shape DB rows for the response"""
+        if self.model is not None:
+            return project_rows(rows, self.model)
+        return project_fields(rows, self.fields)
+
+
+def journal_projection(view: str = "full", fields: Optional[str] = None) -> Projection:
+    """Resolve ``view``/``fields`` query parameters (``fields`` wins)"""
+    if fields:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in JOURNAL_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        selected = list(KEY_FIELDS) + [name for name in requested if name not in KEY_FIELDS]
+        return Projection(list(dict.fromkeys(selected)), None)
+
+    model = VIEWS.get(view)
+    if model is None:
+        raise HTTPException(status_code=400, detail=f"Unknown view: {view}")
+    return Projection(list(model.model_fields), model)
+
+
+def project_fields(rows: Optional[List[Dict]], fields: List[str]) -> List[Dict]:
+    """Keep only ``fields`` from each row"""
+    return [{name: row.get(name) for name in fields} for row in rows or ()]
@@ -0,0 +1,76 @@
+"""
+Bulk JSON serialization for list responses
+
+Building response models one field at a time and then letting FastAPI
+validate ``response_model`` again costs two validations per row. Routes that
+return many rows instead hand plain DB rows to ``json_response``:
+
+- trusted mode (default): rows are projected onto the response model's
+  fields and encoded directly with orjson; the database schema already
+  guarantees the types, so no per-row validation happens at all.
+- validated mode: the whole payload goes through one cached TypeAdapter
+  (validation and JSON encoding both in pydantic-core).
+
+Returning a ``Response`` from a route makes FastAPI skip its own
+``response_model`` validation, so the decorator's ``response_model`` only
+documents the shape.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Type
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from app.config import settings
+
+_adapters: Dict[Any, TypeAdapter] = {}
+_field_defaults: Dict[Type[BaseModel], Dict[str, Any]] = {}
+
+
+def _adapter(response_type: Any) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = TypeAdapter(response_type)
+        _adapters[response_type] = adapter
+    return adapter
+
+
+def _defaults(model: Type[BaseModel]) -> Dict[str, Any]:
+    defaults = _field_defaults.get(model)
+    if defaults is None:
+        defaults = {
+            name: None if field.is_required() else field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items()
+        }
+        _field_defaults[model] = defaults
+    return defaults
+
+
+def project_rows(rows: Optional[Iterable[Dict]], model: Type[BaseModel]) -> List[Dict]:
+    """Keep only ``model``'s fields from each DB row, filling in field defaults"""
+    defaults = _defaults(model)
+    projected = []
+    for row in rows or ():
+        item = {}
+        for name, default in defaults.items():
+            value = row.get(name)
+            item[name] = default if value is None else value
+        projected.append(item)
+    return projected
+
+
+def json_response(
+    content: Any,
+    response_type: Any,
+    headers: Optional[Dict[str, str]] = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    Encode ``content`` (plain dicts/lists shaped like ``response_type``).
+
+    Validates once against ``response_type`` unless rows are trusted.
+    """
+    if settings.trust_db_rows:
+        return ORJSONResponse(content, status_code=status_code, headers=headers)
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(content))
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,21 @@
+"""
+Server-sent events helpers
+"""
+
+from typing import Any, AsyncIterator
+from fastapi.responses import StreamingResponse
+import orjson
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Encode one SSE message with a JSON payload"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def sse_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    """Stream encoded events without proxy buffering or caching"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
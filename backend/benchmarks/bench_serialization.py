@@ -0,0 +1,122 @@
+"""
+Per-row cost of serializing a journal list response
+
+Compares the old per-field construction + FastAPI response_model pass with
+the bulk paths in app.utils.serialization (one TypeAdapter validation, or
+trusted projection + orjson).
+
+    cd backend
+    python -m benchmarks.bench_serialization [--rows 1000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+# Settings are read at import time; the benchmark never talks to Supabase or Gemini
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models import JournalEntryResponse  # noqa: E402
+from app.utils.serialization import json_response, project_rows  # noqa: E402
+
+LEGACY_FIELD = create_response_field(name="response", type_=List[JournalEntryResponse])
+
+
+def make_rows(count: int) -> List[Dict]:
+    """DB-shaped journal rows (as PostgREST returns them)"""
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "content": "Today I went for a walk and felt a bit calmer than yesterday. " * 8,
+            "mood": "good",
+            "tags": ["walk", "calm"],
+            "is_voice": False,
+            "created_at": (start + timedelta(minutes=i)).isoformat() + "+00:00",
+            "updated_at": (start + timedelta(minutes=i)).isoformat() + "+00:00",
+            "ai_analysis": {
+                "mood": "good",
+                "sentiment": 0.4,
+                "summary": "The writer describes a calming walk.",
+                "keywords": ["walk", "calm", "outside"],
+                "recommendations": ["Keep walking daily", "Note what helps"],
+                "confidence": 0.8,
+            },
+            "analysis_status": "complete",
+        })
+    return rows
+
+
+def legacy(rows: List[Dict]) -> bytes:
+    """Per-field model construction, then FastAPI's response_model validation"""
+    entries = []
+    for entry in rows:
+        entries.append(JournalEntryResponse(
+            id=entry["id"],
+            user_id=entry["user_id"],
+            content=entry["content"],
+            mood=entry.get("mood"),
+            tags=entry.get("tags"),
+            is_voice=entry.get("is_voice", False),
+            created_at=datetime.fromisoformat(entry["created_at"]),
+            ai_analysis=entry.get("ai_analysis"),
+            analysis_status=entry.get("analysis_status")
+        ))
+    content = asyncio.run(serialize_response(field=LEGACY_FIELD, response_content=entries))
+    return JSONResponse(content).body
+
+
+def bulk(trusted: bool) -> Callable[[List[Dict]], bytes]:
+    def run(rows: List[Dict]) -> bytes:
+        settings.trust_db_rows = trusted
+        return json_response(project_rows(rows, JournalEntryResponse), List[JournalEntryResponse]).body
+    return run
+
+
+def measure(fn: Callable[[List[Dict]], bytes], rows: List[Dict], repeat: int) -> float:
+    fn(rows)  # warm-up (adapter build, imports)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    cases = [
+        ("legacy (per-field + response_model)", legacy),
+        ("TypeAdapter (validate once)", bulk(trusted=False)),
+        ("trusted rows + orjson", bulk(trusted=True)),
+    ]
+    print(f"{args.rows} rows, best of {args.repeat}")
+    baseline = None
+    for name, fn in cases:
+        seconds = measure(fn, rows, args.repeat)
+        baseline = baseline or seconds
+        per_row_us = seconds / args.rows * 1e6
+        print(f"  {name:<38} {seconds * 1000:8.2f} ms  {per_row_us:7.2f} us/row  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
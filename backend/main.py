@@ -3,7 +3,8 @@ AuthenticAI Wellness Journal - FastAPI Backend
 Main application entry point
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
@@ -11,8 +12,27 @@ import os
 from dotenv import load_dotenv
 
 from app.routers import auth, journal, ai, therapist, feedback
-from app.database import init_db
+from app.database import init_db, close_db
 from app.config import settings
+from app.services.ai_executor import get_executor_stats
+from app.services.analysis_pipeline import start_analysis_pipeline, stop_analysis_pipeline, get_pipeline_stats
+from app.services.analysis_cache import get_cache_stats
+from app.services.ai_service import get_batcher_stats
+from app.services.model_registry import preload_models
+from app.services.dashboard_service import get_dashboard_cache_stats
+from app.services.affirmation_service import start_affirmation_scheduler, stop_affirmation_scheduler, get_affirmation_stats
+from app.services.suggestion_pool import stop_suggestion_refills, get_suggestion_pool_stats
+from app.services.ai_scheduler import get_scheduler_stats
+from app.services.resilience import get_resilience_stats
+from app.services.local_sentiment import get_local_sentiment_stats
+from app.services.chunking import get_chunking_stats
+from app.services.reanalysis import get_reanalysis_stats
+from app.services.journal_search import get_search_stats
+from app.services.embeddings import get_embedding_stats
+from app.services.embedding_pipeline import start_embedding_pipeline, stop_embedding_pipeline, get_embedding_pipeline_stats
+from app.services.semantic_index import get_semantic_index_stats
+from app.utils.auth import get_user_cache_stats, get_current_admin
+from app.utils.audit import start_audit_writer, stop_audit_writer, get_audit_stats
 
 load_dotenv()
 
@@ -21,16 +41,28 @@ security = HTTPBearer()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
-    init_db()
+    """Initialize database and background workers on startup, release them on shutdown"""
+    await init_db()
+    preload_models()
+    await start_audit_writer()
+    await start_analysis_pipeline()
+    await start_embedding_pipeline()
+    await start_affirmation_scheduler()
     yield
+    await stop_affirmation_scheduler()
+    await stop_suggestion_refills()
+    await stop_embedding_pipeline()
+    await stop_analysis_pipeline()
+    await stop_audit_writer()
+    await close_db()
 
 
 app = FastAPI(
     title="AuthenticAI Wellness Journal API",
     description="HIPAA-compliant wellness journal backend",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration - use settings from config
@@ -65,6 +97,31 @@ async def health_check():
     return {"status": "healthy", "service": "backend"}
 
 
+@app.get("/metrics")
+async def metrics(current_user: dict = Depends(get_current_admin)):
+    """Runtime counters for background subsystems (no user data; admins only)"""
+    return {
+        "ai_executor": get_executor_stats(),
+        "analysis_pipeline": get_pipeline_stats(),
+        "analysis_cache": get_cache_stats(),
+        "analysis_batcher": get_batcher_stats(),
+        "user_cache": get_user_cache_stats(),
+        "dashboard_cache": get_dashboard_cache_stats(),
+        "affirmations": get_affirmation_stats(),
+        "suggestion_pool": get_suggestion_pool_stats(),
+        "ai_scheduler": get_scheduler_stats(),
+        "ai_resilience": get_resilience_stats(),
+        "local_sentiment": get_local_sentiment_stats(),
+        "analysis_chunking": get_chunking_stats(),
+        "reanalysis": get_reanalysis_stats(),
+        "journal_search": get_search_stats(),
+        "embeddings": get_embedding_stats(),
+        "embedding_pipeline": get_embedding_pipeline_stats(),
+        "semantic_index": get_semantic_index_stats(),
+        "audit_writer": get_audit_stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -45,3 +45,7 @@ if (API_URL === 'MISSING_API_URL') {
   console.error('🚨 API calls will fail! Set VITE_API_URL in Netlify environment variables.')
 }
 
+
+// Listings are paged by cursor: pass the value of this response header back
+// as ?cursor= to get the next page (absent on the last page)
+export const NEXT_CURSOR_HEADER = 'x-next-cursor'
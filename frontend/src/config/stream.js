@@ -0,0 +1,43 @@
+/**
+ * Server-sent events over POST
+ * EventSource only supports GET, so streamed AI endpoints are read with fetch
+ */
+
+import axios from 'axios'
+import { API_URL } from './api'
+
+// Calls onEvent(event, data) for every SSE message until the stream ends
+export const postEventStream = async (path, body, onEvent) => {
+  const response = await fetch(`${API_URL}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Authorization: axios.defaults.headers.common['Authorization'],
+    },
+    body: JSON.stringify(body),
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Stream request failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  for (;;) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+      const message = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      onEvent(event, data ? JSON.parse(data) : null)
+    }
+  }
+}
@@ -4,6 +4,7 @@ import { useAuth } from '../contexts/AuthContext'
 import axios from 'axios'
 import { Calendar, BookOpen, Heart, LogOut, Settings, Activity } from 'lucide-react'
 import { API_URL } from '../config/api'
+import { postEventStream } from '../config/stream'
 
 const ClientDashboard = () => {
   const { user, logout } = useAuth()
@@ -14,23 +15,45 @@ const ClientDashboard = () => {
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
+    fetchAffirmation()
     fetchDashboardData()
   }, [])
 
-  const fetchDashboardData = async () => {
+  // Streamed so the text shows up as it is generated
+  const fetchAffirmation = async () => {
     try {
-      // Fetch daily affirmation
-      const affResponse = await axios.post(`${API_URL}/api/ai/affirmation`, {
-        user_id: user.id,
+      let text = ''
+      await postEventStream('/api/ai/affirmation/stream', { user_id: user.id }, (event, data) => {
+        if (event === 'token') {
+          text += data.text
+          setAffirmation(text)
+        } else if (event === 'done') {
+          setAffirmation(data.affirmation)
+        } else if (event === 'error') {
+          throw new Error(data.detail)
+        }
       })
-      setAffirmation(affResponse.data.affirmation)
+    } catch (error) {
+      console.error('Error streaming affirmation:', error)
+      try {
+        const affResponse = await axios.post(`${API_URL}/api/ai/affirmation`, {
+          user_id: user.id,
+        })
+        setAffirmation(affResponse.data.affirmation)
+      } catch (fallbackError) {
+        console.error('Error fetching affirmation:', fallbackError)
+      }
+    }
+  }
 
+  const fetchDashboardData = async () => {
+    try {
       // Fetch activity suggestions
       const actResponse = await axios.get(`${API_URL}/api/ai/activities`)
       setActivities(actResponse.data)
 
       // Fetch recent journal entries
-      const entriesResponse = await axios.get(`${API_URL}/api/journal/me?limit=3`)
+      const entriesResponse = await axios.get(`${API_URL}/api/journal/me?limit=3&view=summary`)
       setRecentEntries(entriesResponse.data)
     } catch (error) {
       console.error('Error fetching dashboard data:', error)
@@ -180,7 +203,7 @@ const ClientDashboard = () => {
                     )}
                   </div>
                   <p className="text-gray-700 line-clamp-2">
-                    {entry.content.substring(0, 150)}...
+                    {(entry.content_preview || '').substring(0, 150)}...
                   </p>
                 </Link>
               ))}
@@ -5,7 +5,7 @@ import axios from 'axios'
 import { ArrowLeft, Calendar, TrendingUp, Trash2, Edit2 } from 'lucide-react'
 import { format } from 'date-fns'
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts'
-import { API_URL } from '../config/api'
+import { API_URL, NEXT_CURSOR_HEADER } from '../config/api'
 
 const JournalHistory = () => {
   const { user } = useAuth()
@@ -14,15 +14,23 @@ const JournalHistory = () => {
   const [loading, setLoading] = useState(true)
   const [moodData, setMoodData] = useState([])
   const [deleteConfirm, setDeleteConfirm] = useState(null)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     fetchEntries()
   }, [])
 
-  const fetchEntries = async () => {
+  const fetchEntries = async (cursor = null) => {
+    if (cursor) setLoadingMore(true)
     try {
-      const response = await axios.get(`${API_URL}/api/journal/me`)
-      setEntries(response.data)
+      const response = await axios.get(`${API_URL}/api/journal/me`, {
+        params: { cursor: cursor || undefined },
+      })
+      // Older pages are appended, so the chart covers every loaded entry
+      const loaded = cursor ? [...entries, ...response.data] : response.data
+      setEntries(loaded)
+      setNextCursor(response.headers[NEXT_CURSOR_HEADER] || null)
 
       // Prepare mood data for chart
       const moodMap = {
@@ -33,7 +41,7 @@ const JournalHistory = () => {
         very_good: 5,
       }
 
-      const chartData = response.data
+      const chartData = loaded
         .filter(e => e.mood)
         .map(e => ({
           date: format(new Date(e.created_at), 'MMM dd'),
@@ -47,6 +55,7 @@ const JournalHistory = () => {
       console.error('Error fetching entries:', error)
     } finally {
       setLoading(false)
+      setLoadingMore(false)
     }
   }
 
@@ -227,6 +236,15 @@ const JournalHistory = () => {
                   )}
                 </div>
               ))}
+              {nextCursor && (
+                <button
+                  onClick={() => fetchEntries(nextCursor)}
+                  disabled={loadingMore}
+                  className="w-full py-2 text-primary-600 border border-primary-200 rounded-lg hover:bg-primary-50 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load older entries'}
+                </button>
+              )}
             </div>
           ) : (
             <div className="text-center py-12">
@@ -5,7 +5,7 @@ import axios from 'axios'
 import { LogOut, Users, TrendingUp, MessageSquare, BarChart3 } from 'lucide-react'
 import { format } from 'date-fns'
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts'
-import { API_URL } from '../config/api'
+import { API_URL, NEXT_CURSOR_HEADER } from '../config/api'
 
 const TherapistDashboard = () => {
   const { user, logout } = useAuth()
@@ -15,6 +15,8 @@ const TherapistDashboard = () => {
   const [loading, setLoading] = useState(true)
   const [selectedClient, setSelectedClient] = useState(null)
   const [clientJournals, setClientJournals] = useState([])
+  const [journalsCursor, setJournalsCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     fetchDashboardData()
@@ -23,7 +25,7 @@ const TherapistDashboard = () => {
 
   const fetchDashboardData = async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/therapist/dashboard`)
+      const response = await axios.get(`${API_URL}/api/therapist/dashboard?view=summary`)
       setDashboardData(response.data)
     } catch (error) {
       console.error('Error fetching dashboard:', error)
@@ -41,13 +43,20 @@ const TherapistDashboard = () => {
     }
   }
 
-  const fetchClientJournals = async (clientId) => {
+  const fetchClientJournals = async (clientId, cursor = null) => {
+    if (cursor) setLoadingMore(true)
     try {
-      const response = await axios.get(`${API_URL}/api/therapist/clients/${clientId}/journals`)
-      setClientJournals(response.data)
+      const response = await axios.get(`${API_URL}/api/therapist/clients/${clientId}/journals`, {
+        params: { view: 'summary', cursor: cursor || undefined },
+      })
+      // Append the next page, or start over for a newly selected client
+      setClientJournals(cursor ? (prev) => [...prev, ...response.data] : response.data)
+      setJournalsCursor(response.headers[NEXT_CURSOR_HEADER] || null)
       setSelectedClient(clientId)
     } catch (error) {
       console.error('Error fetching client journals:', error)
+    } finally {
+      setLoadingMore(false)
     }
   }
 
@@ -233,11 +242,11 @@ const TherapistDashboard = () => {
                         </span>
                       )}
                     </div>
-                    <p className="text-gray-700 mb-2 line-clamp-3">{entry.content}</p>
-                    {entry.ai_analysis && (
+                    <p className="text-gray-700 mb-2 line-clamp-3">{entry.content_preview}</p>
+                    {entry.analysis_summary && (
                       <div className="mt-2 p-2 bg-gray-50 rounded text-sm">
                         <p className="text-gray-600 font-semibold">AI Summary:</p>
-                        <p className="text-gray-700">{entry.ai_analysis.summary}</p>
+                        <p className="text-gray-700">{entry.analysis_summary}</p>
                       </div>
                     )}
                   </div>
@@ -258,11 +267,11 @@ const TherapistDashboard = () => {
                         </span>
                       )}
                     </div>
-                    <p className="text-gray-700 mb-2 line-clamp-3">{entry.content}</p>
-                    {entry.ai_analysis && (
+                    <p className="text-gray-700 mb-2 line-clamp-3">{entry.content_preview}</p>
+                    {entry.analysis_summary && (
                       <div className="mt-2 p-2 bg-gray-50 rounded text-sm">
                         <p className="text-gray-600 font-semibold">AI Summary:</p>
-                        <p className="text-gray-700">{entry.ai_analysis.summary}</p>
+                        <p className="text-gray-700">{entry.analysis_summary}</p>
                       </div>
                     )}
                   </div>
@@ -274,6 +283,15 @@ const TherapistDashboard = () => {
                     : 'Select a client to view their journals'}
                 </p>
               )}
+              {selectedClient && clientJournals.length > 0 && journalsCursor && (
+                <button
+                  onClick={() => fetchClientJournals(selectedClient, journalsCursor)}
+                  disabled={loadingMore}
+                  className="w-full py-2 text-sm text-primary-600 border border-primary-200 rounded-lg hover:bg-primary-50 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
             </div>
           </div>
         </div>
@@ -3,6 +3,8 @@
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- GIN indexes that combine a plain column with a tsvector (journal search)
+CREATE EXTENSION IF NOT EXISTS btree_gin;
 
 -- Users table (extends Supabase auth.users)
 CREATE TABLE IF NOT EXISTS users (
@@ -24,10 +26,103 @@ CREATE TABLE IF NOT EXISTS journals (
     tags TEXT[] DEFAULT '{}',
     is_voice BOOLEAN DEFAULT FALSE,
     ai_analysis JSONB,
+    analysis_status TEXT DEFAULT 'complete' CHECK (analysis_status IN ('pending', 'complete', 'failed')),
+    -- List views select this instead of the full content
+    content_preview TEXT GENERATED ALWAYS AS (left(content, 200)) STORED,
+    -- Which content the stored analysis was computed for, and by what
+    -- (analysis_drift: share of words changed by edits since then)
+    content_hash TEXT GENERATED ALWAYS AS (md5(content)) STORED,
+    analysis_content_hash TEXT,
+    analysis_version TEXT,
+    analysis_drift REAL NOT NULL DEFAULT 0,
+    -- Full-text search document (see search_journals)
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Columns added after the initial release (no-ops on fresh installs)
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS analysis_status TEXT DEFAULT 'complete'
+    CHECK (analysis_status IN ('pending', 'complete', 'failed'));
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS content_preview TEXT
+    GENERATED ALWAYS AS (left(content, 200)) STORED;
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS content_hash TEXT
+    GENERATED ALWAYS AS (md5(content)) STORED;
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS analysis_content_hash TEXT;
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS analysis_version TEXT;
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS analysis_drift REAL NOT NULL DEFAULT 0;
+ALTER TABLE journals ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+-- Mood analysis cache (content-addressed, shared across users; holds no user ids).
+-- Analyses are derived from journal text: the backend deletes an entry's rows when
+-- it is deleted or rewritten and purges rows older than ANALYSIS_CACHE_PERSIST_DAYS
+-- daily (by created_at, using idx_mood_analysis_cache_created_at)
+CREATE TABLE IF NOT EXISTS mood_analysis_cache (
+    content_hash TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    analysis JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Per-client journal statistics, maintained by triggers on journals
+CREATE TABLE IF NOT EXISTS client_stats (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    very_low_count INTEGER NOT NULL DEFAULT 0,
+    low_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    good_count INTEGER NOT NULL DEFAULT 0,
+    very_good_count INTEGER NOT NULL DEFAULT 0,
+    last_entry_at TIMESTAMP WITH TIME ZONE,
+    last_mood TEXT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Entries per client per (UTC) day, for rolling 7/30-day activity
+CREATE TABLE IF NOT EXISTS client_daily_activity (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+-- Daily rollups for the therapist dashboard, maintained by the same triggers
+CREATE TABLE IF NOT EXISTS daily_mood_counts (
+    day DATE NOT NULL,
+    mood TEXT NOT NULL CHECK (mood IN ('very_low', 'low', 'neutral', 'good', 'very_good')),
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, mood)
+);
+
+CREATE TABLE IF NOT EXISTS daily_active_users (
+    day DATE PRIMARY KEY,
+    active_users INTEGER NOT NULL DEFAULT 0
+);
+
+-- Daily affirmation per client, mood and request context (precomputed off-peak)
+CREATE TABLE IF NOT EXISTS daily_affirmations (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    mood TEXT NOT NULL CHECK (mood IN ('very_low', 'low', 'neutral', 'good', 'very_good')),
+    context_hash TEXT NOT NULL,
+    affirmation TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, day, mood, context_hash)
+);
+
+-- Journal entry embeddings for semantic search (written by the embedding pipeline)
+CREATE TABLE IF NOT EXISTS journal_embeddings (
+    id UUID PRIMARY KEY REFERENCES journals(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,  -- the entry's, for keyset loading
+    model TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    embedding TEXT NOT NULL,  -- base64 of little-endian float16, L2-normalized
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Therapist feedback table
 CREATE TABLE IF NOT EXISTS therapist_feedback (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -95,12 +190,354 @@ CREATE TABLE IF NOT EXISTS therapist_clients (
 CREATE INDEX IF NOT EXISTS idx_journals_user_id ON journals(user_id);
 CREATE INDEX IF NOT EXISTS idx_journals_created_at ON journals(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_journals_mood ON journals(mood);
+-- Keyset pagination: (created_at, id) newest first per owner
+DROP INDEX IF EXISTS idx_journals_user_created_at;
+CREATE INDEX IF NOT EXISTS idx_journals_user_created_id ON journals(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_journals_analysis_pending ON journals(created_at) WHERE analysis_status = 'pending';
+-- Search within one client's history, and across all of them
+CREATE INDEX IF NOT EXISTS idx_journals_user_search ON journals USING GIN (user_id, search_vector);
+CREATE INDEX IF NOT EXISTS idx_journals_search ON journals USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_journals_tags ON journals USING GIN (tags);
+CREATE INDEX IF NOT EXISTS idx_journal_embeddings_user ON journal_embeddings(user_id, model, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_feedback_client_id ON therapist_feedback(client_id);
 CREATE INDEX IF NOT EXISTS idx_feedback_therapist_id ON therapist_feedback(therapist_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_client_created_id ON therapist_feedback(client_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_feedback_therapist_created_id ON therapist_feedback(therapist_id, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_audit_log_user_id ON audit_log(user_id);
 CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_access_log_therapist_id ON access_log(therapist_id);
 CREATE INDEX IF NOT EXISTS idx_access_log_client_id ON access_log(client_id);
+CREATE INDEX IF NOT EXISTS idx_mood_analysis_cache_created_at ON mood_analysis_cache(created_at);
+CREATE INDEX IF NOT EXISTS idx_daily_affirmations_day ON daily_affirmations(day);
+CREATE INDEX IF NOT EXISTS idx_client_stats_last_entry_at ON client_stats(last_entry_at);
+
+-- Per-client summary for the therapist client list, read from the client_stats
+-- rollup (entry count, last entry, most frequent mood, entries since recent_since)
+CREATE OR REPLACE FUNCTION get_client_summaries(recent_since TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (
+    id UUID,
+    full_name TEXT,
+    email TEXT,
+    entry_count BIGINT,
+    last_entry_date TIMESTAMP WITH TIME ZONE,
+    modal_mood TEXT,
+    recent_entry_count BIGINT
+) AS $$
+    SELECT
+        u.id,
+        u.full_name,
+        u.email,
+        COALESCE(s.entry_count, 0)::BIGINT AS entry_count,
+        s.last_entry_at AS last_entry_date,
+        (
+            SELECT m.mood
+            FROM (VALUES
+                ('very_low', s.very_low_count),
+                ('low', s.low_count),
+                ('neutral', s.neutral_count),
+                ('good', s.good_count),
+                ('very_good', s.very_good_count)
+            ) AS m(mood, n)
+            WHERE m.n > 0
+            ORDER BY m.n DESC
+            LIMIT 1
+        ) AS modal_mood,
+        COALESCE((
+            SELECT SUM(a.entry_count)
+            FROM client_daily_activity a
+            WHERE a.user_id = u.id
+              AND a.day >= (recent_since AT TIME ZONE 'UTC')::DATE
+        ), 0)::BIGINT AS recent_entry_count
+    FROM users u
+    LEFT JOIN client_stats s ON s.user_id = u.id
+    WHERE u.role = 'client'
+    ORDER BY u.full_name;
+$$ LANGUAGE sql STABLE;
+
+-- Ranked full-text search over journals with mood/tag/date filters.
+-- Pages are keyset-paginated on (rank, created_at, id) (or (created_at, id)
+-- for p_sort = 'recent'); highlighted snippets are built for the page only.
+CREATE OR REPLACE FUNCTION search_journals(
+    p_query TEXT,
+    p_user_id UUID DEFAULT NULL,
+    p_mood TEXT DEFAULT NULL,
+    p_tags TEXT[] DEFAULT NULL,
+    p_from TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_to TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_sort TEXT DEFAULT 'rank',
+    p_after_rank REAL DEFAULT NULL,
+    p_after_created_at TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_after_id UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    mood TEXT,
+    tags TEXT[],
+    is_voice BOOLEAN,
+    created_at TIMESTAMP WITH TIME ZONE,
+    content_preview TEXT,
+    analysis_summary TEXT,
+    analysis_status TEXT,
+    rank REAL,
+    headline TEXT
+) AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', p_query) AS query
+    ),
+    matches AS (
+        SELECT
+            j.id, j.user_id, j.mood, j.tags, j.is_voice, j.created_at,
+            j.content, j.content_preview,
+            j.ai_analysis->>'summary' AS analysis_summary,
+            j.analysis_status,
+            CASE WHEN p_sort = 'recent' THEN 0::REAL
+                 ELSE ts_rank_cd(j.search_vector, q.query, 32) END AS rank
+        FROM journals j, q
+        WHERE j.search_vector @@ q.query
+          AND (p_user_id IS NULL OR j.user_id = p_user_id)
+          AND (p_mood IS NULL OR j.mood = p_mood)
+          AND (p_tags IS NULL OR j.tags @> p_tags)
+          AND (p_from IS NULL OR j.created_at >= p_from)
+          AND (p_to IS NULL OR j.created_at < p_to)
+    ),
+    page AS (
+        SELECT m.*
+        FROM matches m
+        WHERE p_after_id IS NULL
+           OR (m.rank, m.created_at, m.id) < (COALESCE(p_after_rank, 0), p_after_created_at, p_after_id)
+        ORDER BY m.rank DESC, m.created_at DESC, m.id DESC
+        LIMIT p_limit
+    )
+    SELECT
+        p.id, p.user_id, p.mood, p.tags, p.is_voice, p.created_at,
+        p.content_preview, p.analysis_summary, p.analysis_status, p.rank,
+        -- Content is HTML-escaped first, so <mark> is the only markup in a headline
+        ts_headline('english',
+                    replace(replace(replace(p.content, '&', '&amp;'), '<', '&lt;'), '>', '&gt;'),
+                    q.query,
+                    'MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<mark>, StopSel=</mark>') AS headline
+    FROM page p, q
+    ORDER BY p.rank DESC, p.created_at DESC, p.id DESC;
+$$ LANGUAGE sql STABLE;
+
+-- Incremental maintenance of client_stats / client_daily_activity
+-- (also keeps daily_mood_counts / daily_active_users in step).
+-- These run as SECURITY DEFINER, so search_path is pinned and only the
+-- service role (the backend) may call them through the API.
+CREATE OR REPLACE FUNCTION adjust_client_stats(
+    p_user_id UUID,
+    p_mood TEXT,
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_delta INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    v_day DATE := (p_created_at AT TIME ZONE 'UTC')::DATE;
+    v_day_count INTEGER;
+BEGIN
+    INSERT INTO client_stats (
+        user_id, entry_count,
+        very_low_count, low_count, neutral_count, good_count, very_good_count
+    )
+    VALUES (
+        p_user_id, p_delta,
+        CASE WHEN p_mood = 'very_low' THEN p_delta ELSE 0 END,
+        CASE WHEN p_mood = 'low' THEN p_delta ELSE 0 END,
+        CASE WHEN p_mood = 'neutral' THEN p_delta ELSE 0 END,
+        CASE WHEN p_mood = 'good' THEN p_delta ELSE 0 END,
+        CASE WHEN p_mood = 'very_good' THEN p_delta ELSE 0 END
+    )
+    ON CONFLICT (user_id) DO UPDATE SET
+        entry_count = client_stats.entry_count + EXCLUDED.entry_count,
+        very_low_count = client_stats.very_low_count + EXCLUDED.very_low_count,
+        low_count = client_stats.low_count + EXCLUDED.low_count,
+        neutral_count = client_stats.neutral_count + EXCLUDED.neutral_count,
+        good_count = client_stats.good_count + EXCLUDED.good_count,
+        very_good_count = client_stats.very_good_count + EXCLUDED.very_good_count,
+        updated_at = NOW();
+
+    INSERT INTO client_daily_activity (user_id, day, entry_count)
+    VALUES (p_user_id, v_day, p_delta)
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        entry_count = client_daily_activity.entry_count + EXCLUDED.entry_count
+    RETURNING entry_count INTO v_day_count;
+
+    IF p_delta > 0 AND v_day_count = p_delta THEN
+        -- First entry of the day for this client
+        INSERT INTO daily_active_users (day, active_users)
+        VALUES (v_day, 1)
+        ON CONFLICT (day) DO UPDATE SET
+            active_users = daily_active_users.active_users + 1;
+    ELSIF v_day_count <= 0 THEN
+        DELETE FROM client_daily_activity
+        WHERE user_id = p_user_id AND day = v_day;
+        UPDATE daily_active_users
+        SET active_users = active_users - 1
+        WHERE day = v_day;
+    END IF;
+
+    IF p_mood IS NOT NULL THEN
+        INSERT INTO daily_mood_counts (day, mood, entry_count)
+        VALUES (v_day, p_mood, p_delta)
+        ON CONFLICT (day, mood) DO UPDATE SET
+            entry_count = daily_mood_counts.entry_count + EXCLUDED.entry_count;
+    END IF;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION adjust_client_stats(UUID, TEXT, TIMESTAMP WITH TIME ZONE, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION adjust_client_stats(UUID, TEXT, TIMESTAMP WITH TIME ZONE, INTEGER) TO service_role;
+
+CREATE OR REPLACE FUNCTION refresh_client_last_entry(p_user_id UUID)
+RETURNS VOID AS $$
+    UPDATE client_stats s
+    SET (last_entry_at, last_mood) = (
+        SELECT j.created_at, j.mood
+        FROM journals j
+        WHERE j.user_id = p_user_id
+        ORDER BY j.created_at DESC
+        LIMIT 1
+    )
+    WHERE s.user_id = p_user_id;
+$$ LANGUAGE sql SECURITY DEFINER
+SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION refresh_client_last_entry(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_client_last_entry(UUID) TO service_role;
+
+CREATE OR REPLACE FUNCTION apply_journal_to_client_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+        AND NEW.user_id = OLD.user_id
+        AND NEW.mood IS NOT DISTINCT FROM OLD.mood
+        AND NEW.created_at = OLD.created_at THEN
+        RETURN NULL;
+    END IF;
+
+    -- Skip rows removed by a cascading user delete (their stats go with the user)
+    IF TG_OP IN ('UPDATE', 'DELETE')
+        AND EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+        PERFORM adjust_client_stats(OLD.user_id, OLD.mood, OLD.created_at, -1);
+        PERFORM refresh_client_last_entry(OLD.user_id);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM adjust_client_stats(NEW.user_id, NEW.mood, NEW.created_at, 1);
+        PERFORM refresh_client_last_entry(NEW.user_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public;
+
+-- Only ever run by the trigger (no EXECUTE needed for that)
+REVOKE EXECUTE ON FUNCTION apply_journal_to_client_stats() FROM PUBLIC, anon, authenticated;
+
+-- Backfill / repair: recompute client_stats and client_daily_activity from journals
+CREATE OR REPLACE FUNCTION rebuild_client_stats()
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM client_daily_activity WHERE TRUE;
+    DELETE FROM client_stats WHERE TRUE;
+
+    INSERT INTO client_stats (
+        user_id, entry_count,
+        very_low_count, low_count, neutral_count, good_count, very_good_count,
+        last_entry_at, last_mood
+    )
+    SELECT
+        user_id,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE mood = 'very_low'),
+        COUNT(*) FILTER (WHERE mood = 'low'),
+        COUNT(*) FILTER (WHERE mood = 'neutral'),
+        COUNT(*) FILTER (WHERE mood = 'good'),
+        COUNT(*) FILTER (WHERE mood = 'very_good'),
+        MAX(created_at),
+        (ARRAY_AGG(mood ORDER BY created_at DESC))[1]
+    FROM journals
+    GROUP BY user_id;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+    INSERT INTO client_daily_activity (user_id, day, entry_count)
+    SELECT user_id, (created_at AT TIME ZONE 'UTC')::DATE, COUNT(*)
+    FROM journals
+    GROUP BY 1, 2;
+
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION rebuild_client_stats() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rebuild_client_stats() TO service_role;
+
+-- Backfill / repair: recompute the dashboard daily rollups from journals
+CREATE OR REPLACE FUNCTION rebuild_daily_rollups()
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM daily_mood_counts WHERE TRUE;
+    DELETE FROM daily_active_users WHERE TRUE;
+
+    INSERT INTO daily_mood_counts (day, mood, entry_count)
+    SELECT (created_at AT TIME ZONE 'UTC')::DATE, mood, COUNT(*)
+    FROM journals
+    WHERE mood IS NOT NULL
+    GROUP BY 1, 2;
+
+    INSERT INTO daily_active_users (day, active_users)
+    SELECT (created_at AT TIME ZONE 'UTC')::DATE, COUNT(DISTINCT user_id)
+    FROM journals
+    GROUP BY 1;
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION rebuild_daily_rollups() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rebuild_daily_rollups() TO service_role;
+
+-- Therapist dashboard counters from the rollup tables (a few small row reads)
+CREATE OR REPLACE FUNCTION get_dashboard_stats(
+    active_since TIMESTAMP WITH TIME ZONE,
+    trend_since TIMESTAMP WITH TIME ZONE
+)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total_clients', (SELECT COUNT(*) FROM users WHERE role = 'client'),
+        'active_clients', (
+            SELECT COUNT(*) FROM client_stats s
+            JOIN users u ON u.id = s.user_id AND u.role = 'client'
+            WHERE s.last_entry_at >= active_since
+        ),
+        'mood_trends', COALESCE((
+            SELECT json_object_agg(t.mood, t.entry_count)
+            FROM (
+                SELECT mood, SUM(entry_count)::INTEGER AS entry_count
+                FROM daily_mood_counts
+                WHERE day >= (trend_since AT TIME ZONE 'UTC')::DATE
+                GROUP BY mood
+                HAVING SUM(entry_count) > 0
+            ) t
+        ), '{}'::JSON),
+        'daily_active_users', COALESCE((
+            SELECT json_object_agg(d.day, d.active_users ORDER BY d.day)
+            FROM daily_active_users d
+            WHERE d.day >= (trend_since AT TIME ZONE 'UTC')::DATE
+        ), '{}'::JSON)
+    );
+$$ LANGUAGE sql STABLE;
 
 -- Row Level Security (RLS) Policies
 
@@ -110,6 +547,13 @@ ALTER TABLE journals ENABLE ROW LEVEL SECURITY;
 ALTER TABLE therapist_feedback ENABLE ROW LEVEL SECURITY;
 ALTER TABLE audit_log ENABLE ROW LEVEL SECURITY;
 ALTER TABLE access_log ENABLE ROW LEVEL SECURITY;
+ALTER TABLE mood_analysis_cache ENABLE ROW LEVEL SECURITY;
+ALTER TABLE client_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE client_daily_activity ENABLE ROW LEVEL SECURITY;
+ALTER TABLE daily_mood_counts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE daily_active_users ENABLE ROW LEVEL SECURITY;
+ALTER TABLE daily_affirmations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE journal_embeddings ENABLE ROW LEVEL SECURITY;
 
 -- Users policies
 CREATE POLICY "Users can view their own profile"
@@ -187,3 +631,7 @@ CREATE TRIGGER update_journals_updated_at BEFORE UPDATE ON journals
 CREATE TRIGGER update_feedback_updated_at BEFORE UPDATE ON therapist_feedback
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Triggers for client statistics rollups
+CREATE TRIGGER journals_client_stats AFTER INSERT OR UPDATE OR DELETE ON journals
+    FOR EACH ROW EXECUTE FUNCTION apply_journal_to_client_stats();
+